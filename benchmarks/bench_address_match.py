@@ -0,0 +1,134 @@
+""" Benchmarks the fuzzy address matching of join_county_redfin().
+
+Compares the indexed street matcher with the previous difflib path, which
+called get_close_matches() against every street of the zip code for each
+unmatched Redfin address. Redfin addresses come from the local Redfin
+extract. King County parcels are built from them with the street name
+spelled differently, plus filler parcels on a grid of King County style
+streets to reach a county-wide number of streets per zip code.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_address_match --parcels 2000
+"""
+
+import argparse
+import difflib
+import time
+
+import numpy as np
+import pandas as pd
+
+from data515_project import kc_real_estate as kc
+
+# Spellings the Assessor uses differently from Redfin
+RESPELL = {'street': 'st', 'avenue': 'ave', 'st': 'street', 'ave': 'av',
+           'place': 'pl', 'pl': 'place', 'court': 'ct', 'ne': 'n e',
+           'se': 's e', 'nw': 'n w', 'sw': 's w'}
+
+
+def make_addresses(parcels, seed=0):
+    """ Builds matching Redfin and King County addresses per zip code.
+
+    Args:
+        parcels(int): Filler parcels added to each zip code.
+        seed(int): Seed of the random generator.
+
+    Returns:
+        A tuple of a Redfin dataframe and a King County dataframe, both
+        with zip code, building number, and street name columns.
+    """
+
+    rng = np.random.default_rng(seed)
+    redfin = pd.read_csv(kc.redfin_path / 'All_King_Redfin.csv',
+                         low_memory=False)
+    redfin = redfin[['ZIP OR POSTAL CODE', 'ADDRESS']].dropna()
+    address = redfin['ADDRESS'].str.lower().str.split(n=1)
+    redfin = pd.DataFrame({'zip': redfin['ZIP OR POSTAL CODE'].values,
+                           'number': address.str[0].values,
+                           'street': address.str[1].str.strip().values})
+    redfin = redfin.dropna().reset_index(drop=True)
+
+    # Respell one word of each street for the parcels
+    def respell(street):
+        words = street.split()
+        changed = [i for i, word in enumerate(words) if word in RESPELL]
+        if changed:
+            i = changed[rng.integers(len(changed))]
+            words[i] = RESPELL[words[i]]
+        return ' '.join(words)
+
+    county = redfin.assign(street=redfin['street'].map(respell))
+
+    # Fill each zip code with parcels on grid streets
+    def ordinal(n):
+        if 10 <= n % 100 < 20:
+            return f'{n}th'
+        return f'{n}' + {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')
+
+    grid = [f'{ordinal(n)} {kind} {way}'
+            for n in range(1, 301)
+            for kind in ('ave', 'st', 'pl', 'ct', 'way')
+            for way in ('ne', 'se', 'nw', 'sw')]
+    filler = pd.DataFrame({
+        'zip': np.repeat(redfin['zip'].unique(), parcels),
+        'number': rng.integers(100, 40000, parcels *
+                               redfin['zip'].nunique()).astype(str),
+        'street': rng.choice(grid, parcels * redfin['zip'].nunique())})
+
+    return redfin, pd.concat([county, filler], ignore_index=True)
+
+
+def match_difflib(redfin, county):
+    """ Matches addresses as join_county_redfin() did with difflib."""
+
+    matched = []
+    for zip_code, rf in redfin.groupby('zip'):
+        kc_zip = county[county['zip'] == zip_code]
+        match_list = kc_zip['street'].drop_duplicates()
+        fuzzy = rf['street'].map(lambda x: difflib.get_close_matches(
+            str(x), match_list, n=1, cutoff=0.6)).str.join(',')
+        pairs = set(zip(kc_zip['number'], kc_zip['street']))
+        matched.append(pd.Series([(number, street) in pairs for number, street
+                                  in zip(rf['number'], fuzzy)],
+                                 index=rf.index))
+    return pd.concat(matched).sort_index()
+
+
+def match_indexed(redfin, county):
+    """ Matches addresses with the indexed street matcher."""
+
+    matched = []
+    for zip_code, rf in redfin.groupby('zip'):
+        kc_zip = county[county['zip'] == zip_code]
+        index = kc._StreetIndex(kc_zip['number'], kc_zip['street'])
+        matched.append(pd.Series(pd.notnull(index.match(rf['number'],
+                                                        rf['street'])),
+                                 index=rf.index))
+    return pd.concat(matched).sort_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--parcels', type=int, default=2000,
+                        help='filler parcels per zip code')
+    args = parser.parse_args()
+
+    redfin, county = make_addresses(args.parcels)
+    print(f'{len(redfin)} Redfin addresses, {len(county)} parcels, '
+          f'{county["street"].nunique()} streets')
+
+    results = {}
+    for name, match in (('difflib', match_difflib),
+                        ('indexed', match_indexed)):
+        start = time.perf_counter()
+        results[name] = match(redfin, county)
+        print(f'{name:8} {time.perf_counter() - start:8.2f}s  '
+              f'match rate {results[name].mean():.1%}')
+
+    lost = (results['difflib'] & ~results['indexed']).sum()
+    print(f'difflib matches missed by the index: {lost}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+""" Benchmarks the analysis pipeline on synthetic King County data.
+
+Generates assessor and Redfin data at each requested number of sales with
+benchmarks.synthetic, then times organize_county_data(),
+join_county_redfin(), aggregate_by_date() and aggregate_by_zip_spacial()
+on it, each step taking the output of the one before as the tool does.
+Times are the best of --repeat runs; peak memory is traced by tracemalloc
+in one more run, so tracing does not slow the timed runs. Nothing is
+downloaded.
+
+Results are written to benchmarks/results/<label>.json and compared with
+the latest earlier results there, or with --baseline. Steps that got
+slower or use more memory than --tolerance allows are reported as
+regressions, and --check makes them fail the run.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_suite --sales 10000 100000 --label v1.0.0
+"""
+
+import argparse
+import datetime
+import json
+import os
+from pathlib import Path
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import synthetic
+from data515_project import kc_real_estate as kc
+
+results_path = Path(__file__).parent / 'results'
+
+
+def make_inputs(sales, listings_per_sale, zip_codes, seed=0):
+    """ Generates the synthetic inputs of the pipeline.
+
+    Args:
+        sales(int): Number of sales.
+        listings_per_sale(float): Redfin listings generated per sale.
+        zip_codes(int): Number of zip codes.
+        seed(int): Seed of the random generator.
+
+    Returns:
+        A dictionary of the assessor frames, zip code list, zip code
+        boundaries and Redfin listings.
+    """
+
+    frames = synthetic.make_county_data(sales, zip_codes=zip_codes,
+                                        seed=seed)
+    zips = synthetic.make_zip_codes(zip_codes)
+    df_zip_shape = synthetic.make_zip_boundaries(zips)
+    redfin = synthetic.make_redfin_data(
+        max(100, int(sales * listings_per_sale)), frames[1], df_zip_shape,
+        seed=seed)
+
+    return {'frames': frames, 'zip codes': zips,
+            'zip boundaries': df_zip_shape, 'redfin': redfin}
+
+
+def pipeline(inputs):
+    """ Returns the benchmarked steps as (name, setup, run) tuples.
+
+    setup() prepares the arguments of a run outside of the measurements,
+    and run() takes them. Each step's setup uses the output of the step
+    before, kept in outputs by the first run.
+    """
+
+    outputs = {}
+
+    def organize():
+        outputs['organized'] = kc.organize_county_data(
+            *inputs['frames'], zip_code=inputs['zip codes'])
+        return outputs['organized']
+
+    def join():
+        outputs['joined'] = kc.join_county_redfin(outputs['organized'],
+                                                  inputs['redfin'])
+        return outputs['joined']
+
+    # The aggregations modify their input, so each run gets a copy, and
+    # each spatial run a new locator so memoized points are not reused
+    return [('organize_county_data', lambda: (), organize),
+            ('join_county_redfin', lambda: (), join),
+            ('aggregate_by_date',
+             lambda: (outputs['joined'].copy(),),
+             kc.aggregate_by_date),
+            ('aggregate_by_zip_spacial',
+             lambda: (outputs['joined'].copy(),
+                      kc.ZipLocator(inputs['zip boundaries'])),
+             kc.aggregate_by_zip_spacial)]
+
+
+def measure(setup, run, repeat):
+    """ Times run() and traces its peak memory.
+
+    Returns:
+        A tuple of the best time in seconds, the peak memory in MB and
+        the rows of the output.
+    """
+
+    times = []
+    for _ in range(repeat):
+        args = setup()
+        start = time.perf_counter()
+        output = run(*args)
+        times.append(time.perf_counter() - start)
+
+    args = setup()
+    tracemalloc.start()
+    try:
+        run(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return min(times), peak / 2 ** 20, len(output)
+
+
+def environment():
+    """ Describes the machine and package versions of a run."""
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL,
+                                universal_newlines=True,
+                                cwd=Path(__file__).parent).stdout.strip()
+    except OSError:
+        commit = ''
+
+    return {'commit': commit, 'python': platform.python_version(),
+            'pandas': pd.__version__, 'numpy': np.__version__,
+            'platform': platform.platform(), 'cpus': os.cpu_count()}
+
+
+def latest_results(label):
+    """ Returns the path of the latest results other than label's."""
+
+    paths = [path for path in results_path.glob('*.json')
+             if path.stem != label]
+    if not paths:
+        return None
+    return max(paths, key=lambda path: json.loads(path.read_text())
+               ['created'])
+
+
+def compare(results, baseline, tolerance):
+    """ Prints results next to a baseline and returns the regressions.
+
+    Args:
+        results(list): Result records of this run.
+        baseline(list): Result records of the baseline run.
+        tolerance(float): Allowed relative increase of time and memory.
+
+    Returns:
+        A list of (benchmark, sales, measure) of the regressions.
+    """
+
+    before = {(record['benchmark'], record['sales']): record
+              for record in baseline}
+    regressions = []
+
+    print(f'{"benchmark":26} {"sales":>9} {"seconds":>17} {"peak MB":>17}')
+    for record in results:
+        old = before.get((record['benchmark'], record['sales']))
+        if old is None:
+            continue
+        cells = []
+        for key in ('seconds', 'peak_mb'):
+            ratio = record[key] / old[key] if old[key] else 1.0
+            flag = '!' if ratio > 1 + tolerance else ' '
+            if flag == '!':
+                regressions.append((record['benchmark'], record['sales'],
+                                    key))
+            cells.append(f'{old[key]:7.2f}->{record[key]:7.2f}{flag}')
+        print(f'{record["benchmark"]:26} {record["sales"]:9} ' +
+              ' '.join(cells))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sales', type=int, nargs='+',
+                        default=[10000, 100000],
+                        help='numbers of sales to benchmark, 10k to 10M')
+    parser.add_argument('--listings-per-sale', type=float, default=0.01,
+                        help='Redfin listings generated per sale')
+    parser.add_argument('--zip-codes', type=int, default=60,
+                        help='zip codes the parcels are spread over')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='timed runs of each step')
+    parser.add_argument('--label',
+                        default=datetime.datetime.now().
+                        strftime('%Y%m%d-%H%M%S'),
+                        help='name of the results file, e.g. a release')
+    parser.add_argument('--baseline', type=Path,
+                        help='results to compare with, defaults to the '
+                        'latest in benchmarks/results')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='relative slow down or memory growth allowed')
+    parser.add_argument('--check', action='store_true',
+                        help='exit with an error on regressions')
+    args = parser.parse_args()
+
+    results = []
+    for sales in args.sales:
+        inputs = make_inputs(sales, args.listings_per_sale, args.zip_codes)
+        print(f'{sales} sales, {len(inputs["frames"][1])} buildings, '
+              f'{len(inputs["redfin"])} listings')
+
+        for name, setup, run in pipeline(inputs):
+            seconds, peak_mb, rows = measure(setup, run, args.repeat)
+            results.append({'benchmark': name, 'sales': sales, 'rows': rows,
+                            'seconds': seconds, 'peak_mb': peak_mb})
+            print(f'  {name:26} {seconds:8.3f}s {peak_mb:9.1f} MB '
+                  f'{rows:10} rows')
+
+    # Store the results and compare them with the baseline
+    baseline_path = args.baseline or latest_results(args.label)
+    results_path.mkdir(parents=True, exist_ok=True)
+    (results_path / f'{args.label}.json').write_text(json.dumps(
+        {'label': args.label,
+         'created': datetime.datetime.now().isoformat(timespec='seconds'),
+         'environment': environment(),
+         'results': results}, indent=1))
+
+    if baseline_path is None:
+        return 0
+
+    baseline = json.loads(Path(baseline_path).read_text())
+    print(f'\nCompared with {baseline["label"]}:')
+    regressions = compare(results, baseline['results'], args.tolerance)
+    for benchmark, sales, key in regressions:
+        print(f'Regression: {benchmark} at {sales} sales ({key})')
+
+    return 1 if regressions and args.check else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
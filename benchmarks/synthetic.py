@@ -0,0 +1,306 @@
+""" Generates synthetic King County Assessor and Redfin data.
+
+Builds sale, building, parcel and lookup frames with every column of their
+source in column_names.csv, under the raw assessor names and in the
+schema dtypes, as get_county_data(use_schema=True) returns them. Values
+are random but keep the structure the analysis relies on: sales point at
+parcels, every parcel has a building in a King County zip code, most
+properties are single family, coded fields use the codes of the lookup
+frame, and Redfin listings sit inside their zip code and partly share an
+address with a building, spelled the way Redfin spells it.
+
+Data is generated vectorized, so 10M sales take well under a minute, and
+the same seed always gives the same frames.
+"""
+
+import numpy as np
+import pandas as pd
+
+from data515_project import kc_real_estate as kc
+
+# Bounds of the zip code grid, roughly those of King County
+LATITUDES = (47.08, 47.78)
+LONGITUDES = (-122.52, -121.06)
+
+# Street kinds and directions of generated addresses
+STREET_TYPES = ('AVE', 'ST', 'PL', 'CT', 'WAY', 'DR')
+DIRECTIONS = ('NE', 'SE', 'NW', 'SW', 'N', 'S', 'E', 'W')
+
+# Redfin spellings of the street types
+REDFIN_TYPES = {'AVE': ['Ave', 'Avenue'], 'ST': ['St', 'Street'],
+                'PL': ['Pl', 'Place'], 'CT': ['Ct', 'Court'],
+                'WAY': ['Way'], 'DR': ['Dr', 'Drive']}
+
+# Items of each generated lookup type
+LOOKUP_ITEMS = 12
+
+# Single family property type of sales and parcels
+SALE_PROPERTY_TYPE = 11
+PARCEL_PROPERTY_TYPE = 'R'
+
+
+def make_zip_codes(count):
+    """ Returns count distinct King County style zip codes."""
+
+    return [str(98001 + i) for i in range(count)]
+
+
+def _ordinals(numbers):
+    # Formats street numbers as the assessor does, e.g. 272ND
+    numbers = pd.Series(numbers).astype(str)
+    suffix = np.select([numbers.str[-2:].isin(['11', '12', '13']),
+                        numbers.str[-1] == '1', numbers.str[-1] == '2',
+                        numbers.str[-1] == '3'],
+                       ['TH', 'ST', 'ND', 'RD'], 'TH')
+    return numbers + suffix
+
+
+def _random_column(rng, dtype, rows):
+    # Fills a column of the schema dtype with plausible random values
+    if dtype == 'Int16':
+        return rng.integers(0, 10, rows)
+    if dtype == 'Int32':
+        return rng.integers(0, 3000, rows)
+    if dtype == 'Int64':
+        return rng.integers(0, 10 ** 6, rows)
+    if dtype == 'float32':
+        return rng.integers(1, 4, rows).astype('float32')
+    if dtype == 'category':
+        return pd.Categorical.from_codes(rng.integers(0, 3, rows),
+                                         [' ', 'N', 'Y'])
+    if dtype == 'datetime64[ns]':
+        return pd.to_datetime(rng.integers(0, 10 ** 4, rows), unit='D')
+    return pd.Categorical.from_codes(
+        rng.integers(0, 26, rows),
+        [letter * 3 for letter in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ']).astype(str)
+
+
+def _schema_frame(rng, source, rows, values):
+    # Builds a frame with the schema columns of source, in schema order
+    schema = kc._column_schema()
+    schema = schema[schema['source'] == source]
+    lookup_items = pd.read_csv(kc.data_path / 'look_up_item.csv')
+    coded = set(lookup_items['Field Name'].str.strip())
+
+    columns = {}
+    for name, raw_name, dtype in zip(schema['name'], schema['raw_name'],
+                                     schema['dtype']):
+        if raw_name in values:
+            column = values[raw_name]
+        elif name in coded and dtype.startswith('Int'):
+            column = rng.integers(1, LOOKUP_ITEMS + 1, rows)
+        else:
+            column = _random_column(rng, dtype, rows)
+
+        # Wrap integers without the slow null check of astype()
+        if dtype.startswith('Int') and np.asarray(column).dtype.kind in 'iuf':
+            column = pd.arrays.IntegerArray(
+                np.asarray(column).astype(dtype.lower()),
+                np.zeros(rows, dtype=bool))
+        columns[raw_name] = pd.Series(column).astype(dtype)
+
+    return pd.DataFrame(columns)
+
+
+def make_county_data(sales, sales_per_parcel=2, zip_codes=60,
+                     start_date='2000-01-01', end_date='2020-12-31',
+                     single_family=0.8, seed=0):
+    """ Generates assessor sale, building, parcel and lookup frames.
+
+    Args:
+        sales(int): Number of sales.
+        sales_per_parcel(float): Mean number of sales of a parcel.
+        zip_codes(int): Number of zip codes the parcels are spread over.
+        start_date(str): First possible Document Date.
+        end_date(str): Last possible Document Date.
+        single_family(float): Share of single family sales, parcels and
+            buildings.
+        seed(int): Seed of the random generator.
+
+    Returns:
+        A tuple of the sales, buildings, parcels and lookup dataframes.
+    """
+
+    rng = np.random.default_rng(seed)
+    parcels = max(1, int(sales / sales_per_parcel))
+
+    # Parcels with one building each, spread over the zip codes
+    pins = rng.choice(900000 * 10000, parcels, replace=False)
+    major = 100000 + pins // 10000
+    minor = pins % 10000
+    zips = np.array(make_zip_codes(zip_codes))[rng.integers(0, zip_codes,
+                                                            parcels)]
+
+    numbers = rng.integers(100, 40000, parcels).astype(str)
+    street_names = _ordinals(rng.integers(1, 300, parcels))
+    street_types = np.array(STREET_TYPES)[rng.integers(0, len(STREET_TYPES),
+                                                       parcels)]
+    directions = np.array(DIRECTIONS)[rng.integers(0, len(DIRECTIONS),
+                                                   parcels)]
+    addresses = (pd.Series(numbers) + '   ' + street_names + ' ' +
+                 street_types + ' ' + directions + '  ' + zips)
+
+    df_building = _schema_frame(rng, 'building', parcels, {
+        'Major': major, 'Minor': minor, 'BldgNbr': np.ones(parcels),
+        'NbrLivingUnits': np.where(rng.random(parcels) < single_family,
+                                   1, 2),
+        'Address': addresses, 'BuildingNumber': numbers,
+        'StreetName': street_names, 'StreetType': street_types,
+        'DirectionSuffix': directions, 'ZipCode': zips,
+        'SqFtTotLiving': rng.integers(600, 6000, parcels),
+        'YrBuilt': rng.integers(1900, 2020, parcels)})
+
+    df_parcel = _schema_frame(rng, 'parcel', parcels, {
+        'Major': major, 'Minor': minor,
+        'PropType': np.where(rng.random(parcels) < single_family,
+                             PARCEL_PROPERTY_TYPE, 'C'),
+        'SqFtLot': rng.integers(2000, 50000, parcels)})
+
+    # Sales of random parcels over the date window
+    start = pd.Timestamp(start_date)
+    days = (pd.Timestamp(end_date) - start).days + 1
+    sold = rng.integers(0, parcels, sales)
+    df_sale = _schema_frame(rng, 'sale', sales, {
+        'ExciseTaxNbr': 10 ** 6 + rng.permutation(sales),
+        'Major': major[sold], 'Minor': minor[sold],
+        'DocumentDate': start + pd.to_timedelta(rng.integers(0, days, sales),
+                                                unit='D'),
+        'SalePrice': np.round(rng.lognormal(13.2, 0.5, sales), -3),
+        'PropertyType': np.where(rng.random(sales) < single_family,
+                                 SALE_PROPERTY_TYPE, 3)})
+
+    # Every coded field has LOOKUP_ITEMS codes per lookup type
+    look_up_types = sorted(pd.read_csv(kc.data_path /
+                                       'look_up_item.csv')['Look Up'].unique())
+    types = np.repeat(look_up_types, LOOKUP_ITEMS)
+    items = np.tile(np.arange(1, LOOKUP_ITEMS + 1), len(look_up_types))
+    df_lookup = _schema_frame(rng, 'lookup', len(types), {
+        'LUType': types, 'LUItem': items,
+        'LUDescription': [f'TYPE {look_up_type} ITEM {item}'
+                          for look_up_type, item in zip(types, items)]})
+
+    return df_sale, df_building, df_parcel, df_lookup
+
+
+def make_zip_boundaries(zip_codes):
+    """ Generates square zip code boundaries on a grid over King County.
+
+    Args:
+        zip_codes(list): Zip codes to generate boundaries for.
+
+    Returns:
+        A GeoDataFrame with a ZIP column and one polygon per zip code.
+    """
+    import geopandas as gpd
+    import shapely
+
+    columns = int(np.ceil(np.sqrt(len(zip_codes))))
+    rows = int(np.ceil(len(zip_codes) / columns))
+    height = (LATITUDES[1] - LATITUDES[0]) / rows
+    width = (LONGITUDES[1] - LONGITUDES[0]) / columns
+
+    cells = np.arange(len(zip_codes))
+    south = LATITUDES[0] + cells // columns * height
+    west = LONGITUDES[0] + cells % columns * width
+
+    return gpd.GeoDataFrame({'ZIP': np.array(zip_codes, dtype=int)},
+                            geometry=shapely.box(west, south, west + width,
+                                                 south + height),
+                            crs='epsg:4326')
+
+
+def make_redfin_data(listings, df_building, df_zip_shape, match_rate=0.5,
+                     seed=0):
+    """ Generates Redfin listings, part of them at county addresses.
+
+    Listings at a county address use Redfin's spelling of it, in title
+    case with the street type sometimes spelled out, and some carry a
+    unit, so joining them exercises the exact and fuzzy matching. The
+    others are at addresses of no building.
+
+    Args:
+        listings(int): Number of listings.
+        df_building(DataFrame): Buildings from make_county_data().
+        df_zip_shape(GeoDataFrame): Boundaries from make_zip_boundaries().
+        match_rate(float): Share of listings at a county address.
+        seed(int): Seed of the random generator.
+
+    Returns:
+        A Pandas dataframe with the columns of the Redfin extract.
+    """
+
+    rng = np.random.default_rng(seed)
+
+    # Listings at county addresses and at made up ones
+    matched = int(listings * match_rate)
+    picked = df_building.iloc[rng.integers(0, len(df_building), matched)]
+    numbers = np.concatenate([
+        picked['BuildingNumber'].astype(str).to_numpy(),
+        rng.integers(40000, 50000, listings - matched).astype(str)])
+    street_names = np.concatenate([
+        picked['StreetName'].astype(str).to_numpy(),
+        _ordinals(rng.integers(1, 300, listings - matched)).to_numpy()])
+    street_types = np.concatenate([
+        picked['StreetType'].astype(str).to_numpy(),
+        np.array(STREET_TYPES)[rng.integers(0, len(STREET_TYPES),
+                                            listings - matched)]])
+    directions = np.concatenate([
+        picked['DirectionSuffix'].astype(str).to_numpy(),
+        np.array(DIRECTIONS)[rng.integers(0, len(DIRECTIONS),
+                                          listings - matched)]])
+    zips = np.concatenate([
+        picked['ZipCode'].astype(str).to_numpy(),
+        df_zip_shape['ZIP'].astype(str).to_numpy()[
+            rng.integers(0, len(df_zip_shape), listings - matched)]])
+
+    # Spell the streets as Redfin does
+    spelled = pd.Series(street_types).map(
+        lambda street_type: REDFIN_TYPES[street_type][
+            rng.integers(len(REDFIN_TYPES[street_type]))])
+    units = (' Unit ' + pd.Series(rng.integers(1, 20, listings)).astype(str)).\
+        where(rng.random(listings) < 0.1, '')
+    addresses = (pd.Series(numbers) + ' ' + pd.Series(street_names).str.lower()
+                 + ' ' + spelled + ' ' + directions + units)
+
+    # Place the listings inside their zip code
+    bounds = (df_zip_shape.set_index(df_zip_shape['ZIP'].astype(str)).
+              bounds.loc[zips])
+    latitude = bounds['miny'] + (bounds['maxy'] - bounds['miny']) * \
+        rng.uniform(0.05, 0.95, listings)
+    longitude = bounds['minx'] + (bounds['maxx'] - bounds['minx']) * \
+        rng.uniform(0.05, 0.95, listings)
+
+    square_feet = rng.integers(600, 6000, listings).astype(float)
+    price = np.round(rng.lognormal(13.5, 0.5, listings), -3).astype(int)
+    mls = pd.Series(10 ** 6 + rng.permutation(listings)).astype(str)
+
+    return pd.DataFrame({
+        'SALE TYPE': 'MLS Listing',
+        'SOLD DATE': np.nan,
+        'PROPERTY TYPE': 'Single Family Residential',
+        'ADDRESS': addresses.to_numpy(),
+        'CITY': 'Seattle',
+        'STATE OR PROVINCE': 'WA',
+        'ZIP OR POSTAL CODE': zips.astype(int),
+        'PRICE': price,
+        'BEDS': rng.integers(1, 6, listings).astype(float),
+        'BATHS': rng.integers(2, 8, listings) / 2,
+        'LOCATION': 'Seattle',
+        'SQUARE FEET': square_feet,
+        'LOT SIZE': rng.integers(2000, 50000, listings).astype(float),
+        'YEAR BUILT': rng.integers(1900, 2020, listings).astype(float),
+        'DAYS ON MARKET': rng.integers(1, 120, listings).astype(float),
+        '$/SQUARE FEET': np.round(price / square_feet),
+        'HOA/MONTH': np.nan,
+        'STATUS': 'Active',
+        'NEXT OPEN HOUSE START TIME': np.nan,
+        'NEXT OPEN HOUSE END TIME': np.nan,
+        'URL (SEE http://www.redfin.com/buy-a-home/comparative-market-' +
+        'analysis FOR INFO ON PRICING)': ('http://www.redfin.com/WA/' +
+                                          mls).to_numpy(),
+        'SOURCE': 'NWMLS',
+        'MLS#': mls.to_numpy(),
+        'FAVORITE': 'N',
+        'INTERESTED': 'Y',
+        'LATITUDE': latitude.to_numpy(),
+        'LONGITUDE': longitude.to_numpy()})
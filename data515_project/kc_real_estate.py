@@ -8,36 +8,69 @@ website while data on currently active listings is from the Redfin API.
 Functions:
 
     get_county_data()
+    get_county_datasets()
+    get_county_sales()
     get_redfin_data()
+    save_redfin_snapshot()
+    list_redfin_snapshots()
+    read_redfin_snapshot()
+    redfin_snapshot_delta()
+    redfin_market_movement()
     organize_county_data()
+    ingest_county_data()
+    read_county_catalog()
+    CountySession
     join_county_redfin()
     aggregate_by_zip_spacial()
+    ZipLocator
+    StageTrace
     zipcode_choro()
     aggregate_by_date()
+    PeriodAggregate
+    QuantileSketch
+    MarketCube
+    read_market_cube()
     trend_plot()
+    render_charts()
     plotly_by_date()
+    write_figure_bundle()
     zip_code_agg_plotly()
     view_redfin_data_by_agg()
+    get_zip_boundaries()
+    get_zip_geojson()
 
 Examples:
 
 """
 
 # Import packages
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait as futures_wait)
+import contextlib
 import datetime
 import difflib
+import functools
 import io
 from pathlib import Path
+import pickle
+import re
+import shutil
+import tempfile
+import threading
 import time
+import tracemalloc
 import json
+import os
+import urllib.parse
 import urllib.request
+import warnings
+import zipfile
 import requests
 
-import geopandas as gpd
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import plotly.express as px
+
+# geopandas, matplotlib and plotly are imported by the functions using them
 
 # Define paths
 home_path = Path.home()
@@ -48,16 +81,307 @@ redfin_path = data_path / 'redfin'
 examples_path = Path.cwd() / 'examples'
 output_path = working_path / 'output'
 
+# Seconds a cached assessor file is trusted when it has no validators
+county_cache_ttl = 24 * 60 * 60
+
+# King County zip code boundaries
+zip_boundaries_url = ('https://opendata.arcgis.com/datasets/' +
+                      '06da0f67fc1948e3aae93063750ad02b_790.geojson')
+
+# Date format in the names of dated Redfin pulls
+redfin_snapshot_format = '%Y-%m-%d-%H-%M-%S'
+
+# Map zooms of the simplified zip code boundaries
+zip_geometry_zooms = (8, 10, 12)
+
+# Most homes the Redfin API returns for one request
+redfin_home_cap = 5000
+
+# Redfin gis-csv API, queried over tiles of the King County bounds
+redfin_url = 'https://www.redfin.com/stingray/api/gis-csv'
+redfin_bounds = (-123.04941, 46.84777, -121.01694, 47.92442)
+redfin_params = {'al': 1, 'market': 'seattle', 'min_stories': 1,
+                 'num_homes': redfin_home_cap,
+                 'ord': 'redfin-recommended-asc', 'page_number': 1,
+                 'region_id': 118, 'region_type': 5, 'sf': '1,2,3,5,6,7',
+                 'status': 1, 'uipt': '1,2,3,4,5,6', 'v': 8}
+
+# Assessor files described by the schema in column_names.csv
+county_sources = {'Real%20Property%20Sales': 'sale',
+                  'Residential%20Building': 'building',
+                  'Parcel': 'parcel',
+                  'Lookup': 'lookup',
+                  'Real%20Property%20Account': 'account'}
+
+# Canonical street suffixes and directionals of normalized addresses
+address_abbreviations = {'avenue': 'ave', 'av': 'ave', 'street': 'st',
+                         'place': 'pl', 'court': 'ct', 'drive': 'dr',
+                         'road': 'rd', 'lane': 'ln', 'boulevard': 'blvd',
+                         'parkway': 'pkwy', 'highway': 'hwy',
+                         'terrace': 'ter', 'circle': 'cir',
+                         'north': 'n', 'south': 's', 'east': 'e',
+                         'west': 'w', 'northeast': 'ne', 'southeast': 'se',
+                         'northwest': 'nw', 'southwest': 'sw'}
+
+# Words starting the unit of an address
+address_unit_markers = ('unit', 'apt', 'ste', 'suite', '#')
+
+
+# Trace recording the pipeline stages, None when tracing is off
+_active_trace = None
+
+
+class StageTrace:
+    """ Records the wall time, memory and rows of pipeline stages.
+
+    Tracing is opt-in: stages of the pipeline functions are only recorded
+    while a StageTrace is active in a with block. Each stage records its
+    wall time, the peak of traced memory above the memory in use when it
+    started, and the rows of the dataframes it was passed and returned.
+    Stages nest, so the fuzzy matching of each zip code is recorded under
+    join_county_redfin(), and downloads in get_county_datasets() threads
+    are recorded under it.
+
+    Memory is traced with tracemalloc, which slows the traced code, so it
+    can be turned off. Peaks of nested stages need Python 3.9 or later;
+    before that a stage's peak is the highest since tracing started.
+    tracemalloc counts the whole process, so the peak of a stage that runs
+    alongside stages in other threads includes their memory too.
+
+    Attributes:
+        records: The stages recorded, in the order they started.
+    """
+
+    def __init__(self, trace_memory=True):
+        """ Creates an inactive trace.
+
+        Args:
+            trace_memory(bool): Whether to trace memory with tracemalloc.
+        """
+
+        self.trace_memory = trace_memory
+        self.records = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._open = {}
+        self._start = None
+        self._previous = None
+        self._started_tracing = False
+
+    def __enter__(self):
+        global _active_trace
+
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._previous = _active_trace
+        self._start = time.perf_counter()
+        _active_trace = self
+        return self
+
+    def __exit__(self, *exc_info):
+        global _active_trace
+
+        _active_trace = self._previous
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return False
+
+    def _stack(self):
+        # Returns the stages open in this thread
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _enter(self, name, rows_in):
+        # Opens a stage under the innermost open stage of this thread
+        stack = self._stack()
+        record = {'stage': name,
+                  'path': '/'.join([open_record['stage']
+                                    for open_record in stack] + [name]),
+                  'depth': len(stack),
+                  'start': time.perf_counter() - self._start,
+                  'seconds': None, 'memory_mb': None,
+                  'rows_in': rows_in, 'rows_out': None}
+
+        with self._lock:
+            if self.trace_memory and tracemalloc.is_tracing():
+                # The peak is global, so pass it on to the open stages of
+                # every thread before resetting it
+                current, peak = tracemalloc.get_traced_memory()
+                for open_record in self._open.values():
+                    open_record['_peak'] = max(open_record['_peak'], peak)
+                if hasattr(tracemalloc, 'reset_peak'):
+                    tracemalloc.reset_peak()
+                record['_memory'] = current
+                record['_peak'] = current
+                self._open[id(record)] = record
+            self.records.append(record)
+        stack.append(record)
+        return record
+
+    def _exit(self, record):
+        # Closes a stage, recording its peak memory
+        stack = self._stack()
+        stack.pop()
+        record['seconds'] = (time.perf_counter() - self._start -
+                             record['start'])
+
+        with self._lock:
+            self._open.pop(id(record), None)
+            if '_memory' in record and tracemalloc.is_tracing():
+                peak = max(record.pop('_peak'),
+                           tracemalloc.get_traced_memory()[1])
+                record['memory_mb'] = ((peak - record.pop('_memory')) /
+                                       2 ** 20)
+
+    def report(self):
+        """ Returns the recorded stages as a JSON serializable dictionary.
+
+        Returns:
+            A dictionary with the stages under 'stages', each with its
+            name, path of enclosing stages, depth, start and wall time in
+            seconds, peak memory in MB and input and output rows, and
+            whether memory was traced under 'memory traced'.
+        """
+
+        with self._lock:
+            stages = [{key: value for key, value in record.items()
+                       if not key.startswith('_')}
+                      for record in self.records]
+
+        return {'stages': stages, 'memory traced': self.trace_memory}
+
+    def to_json(self, file_path=None):
+        """ Returns the report as JSON, also writing it to file_path.
+
+        Args:
+            file_path(str or Path): File to write the report to.
+
+        Returns:
+            The report as a JSON string.
+        """
+
+        report = json.dumps(self.report(), indent=1)
+        if file_path is not None:
+            Path(file_path).write_text(report)
+        return report
+
+    def summary(self):
+        """ Returns the recorded stages as a text table, nested by depth."""
+
+        def cell(value, form):
+            return '' if value is None else format(value, form)
+
+        lines = [f'{"stage":44} {"seconds":>9} {"memory MB":>10} ' +
+                 f'{"rows in":>10} {"rows out":>10}']
+        for record in self.report()['stages']:
+            lines.append(f'{"  " * record["depth"] + record["stage"]:44} ' +
+                         f'{cell(record["seconds"], ".3f"):>9} ' +
+                         f'{cell(record["memory_mb"], ".1f"):>10} ' +
+                         f'{cell(record["rows_in"], "d"):>10} ' +
+                         f'{cell(record["rows_out"], "d"):>10}')
+        return '\n'.join(lines)
+
+
+def _count_rows(values):
+    """ Returns the rows of the dataframes among values, None if none."""
+
+    rows = None
+    for value in values:
+        if isinstance(value, dict):
+            value = list(value.values())
+        frames = value if isinstance(value, (list, tuple)) else [value]
+        for frame in frames:
+            if isinstance(frame, pd.DataFrame):
+                rows = (rows or 0) + len(frame)
+    return rows
+
+
+@contextlib.contextmanager
+def _stage(name, rows_in=None):
+    """ Records a stage in the active StageTrace, if there is one.
+
+    Yields the record of the stage, a dictionary whose 'rows_out' can be
+    set to record the output rows.
+    """
+
+    trace = _active_trace
+    if trace is None:
+        yield {}
+        return
+
+    record = trace._enter(name, rows_in)
+    try:
+        yield record
+    finally:
+        trace._exit(record)
+
+
+def _traced(func):
+    """ Records each call of func as a stage of the active StageTrace."""
+
+    @functools.wraps(func)
+    def traced(*args, **kwargs):
+        if _active_trace is None:
+            return func(*args, **kwargs)
+
+        with _stage(func.__qualname__,
+                    _count_rows(list(args) + list(kwargs.values()))) \
+                as record:
+            result = func(*args, **kwargs)
+            record['rows_out'] = _count_rows([result])
+            return result
+
+    return traced
+
+
+def _open_stages():
+    """ Returns the stages open in this thread of the active trace."""
+
+    return [] if _active_trace is None else list(_active_trace._stack())
+
 
-def get_county_data(file_name, num_rows=None):
+def _in_stages(stages, func, *args, **kwargs):
+    """ Calls func in another thread under the open stages of a thread."""
+
+    trace = _active_trace
+    if trace is None:
+        return func(*args, **kwargs)
+
+    trace._local.stack = list(stages)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        trace._local.stack = []
+
+
+@_traced
+def get_county_data(file_name, num_rows=None, use_cache=True, cache_ttl=None,
+                    session=None, use_schema=False):
     """ Retrieves a single data-file from the King County Assessors webstie.
 
     Retrieves the single data-file from the King County Assessors webstie
-    defined by file_name using the Pandas read_csv() function.
+    defined by file_name, streaming the zipped download into the Pandas
+    read_csv() function. Full files are cached in kc_path as parquet files
+    and revalidated against the webstie with conditional requests
+    (ETag/Last-Modified) on later calls.
+
+    With use_schema, only the columns marked keep in column_names.csv are
+    parsed, straight into the compact dtypes listed there, which greatly
+    reduces memory use. Columns keep their raw names.
 
     Args:
         file_name(str): The name of the file to download.
         num_rows(int): The number of rows to return.
+        use_cache(bool): Whether to use the local cache in kc_path.
+        cache_ttl(int): Number of seconds a cached file is returned without
+            revalidation. Defaults to always revalidating, or to
+            county_cache_ttl when the webstie sends no ETag/Last-Modified.
+        session(requests.Session): Session to download with. Defaults to a
+            new connection per request.
+        use_schema(bool): Whether to read only the schema columns.
 
     Returns:
         A Pandas dataframe containing all columns of the data retreived from
@@ -67,6 +391,7 @@ def get_county_data(file_name, num_rows=None):
     Raises:
         ValueError: If passed file_name is not a string.
         ValueError: If passed file_name is not valid.
+        ValueError: If passed file_name has no schema and use_schema is set.
         ValueError: If passed num_rows is not a positive integer.
         OSError: If a connection to the URL is unable to be established.
     """
@@ -75,6 +400,253 @@ def get_county_data(file_name, num_rows=None):
     data_raw = pd.DataFrame()
 
     # Check inputs
+    file_name, url = _county_file_url(file_name)
+
+    if num_rows is not None:
+        if not isinstance(num_rows, int) & (num_rows > 0):
+            raise ValueError('Number or rows to return must be a positive' +
+                             f'integer not {num_rows}')
+
+    source = None
+    if use_schema:
+        if file_name not in county_sources:
+            raise ValueError(f'No schema is defined for {file_name}')
+        source = county_sources[file_name]
+
+    # Define inner functions
+    def read_data(encoding=None):
+        # Reads the data through the local cache or directly from the URL
+
+        # Partial reads only go through the cache once it holds the file
+        if use_cache and (num_rows is None or
+                          _county_cache_paths(file_name,
+                                              source)[0].exists()):
+            with _stage('cache ' + file_name) as record:
+                data = _fetch_county_file(file_name, url, cache_ttl,
+                                          encoding, session, source)
+                if num_rows is not None:
+                    data = data.head(num_rows)
+                record['rows_out'] = len(data)
+            return data
+
+        with _stage('download ' + file_name) as record:
+            response = (session or requests).get(url, stream=True,
+                                                 timeout=60)
+            response.raise_for_status()
+            data = _read_zipped_csv(response, num_rows, encoding, source)
+            record['rows_out'] = len(data)
+        return data
+
+    # Read in the data
+    try:
+        data_raw = read_data()
+
+    except OSError:
+        # try three more times with delay
+        for i in range(3):
+            time.sleep(1)
+            try:
+                data_raw = read_data()
+            except OSError:
+                pass
+        if data_raw.empty:
+            raise OSError('King County Assessor\'s page could not be ' +
+                          'reached. Please check that ' +
+                          'https://info.kingcounty.gov/assessor/' +
+                          'DataDownload/default.aspx is available')
+
+    except UnicodeDecodeError:
+        # change encoding to latin-1 in read_csv
+        data_raw = read_data(encoding='latin-1')
+
+    # Check result and return
+    if data_raw.shape[0] == 0:
+        raise RuntimeError('No data was returned. Please try again later.')
+
+    return data_raw
+
+
+@_traced
+def get_county_datasets(file_names, use_cache=True, cache_ttl=None,
+                        max_workers=4, use_schema=False):
+    """ Retrieves several data-files from the King County Assessors webstie.
+
+    Downloads the data-files defined by file_names concurrently over a
+    shared pool of connections, so the total time is close to that of the
+    largest file. Each file is retrieved as in get_county_data().
+
+    Args:
+        file_names(list): The names of the files to download.
+        use_cache(bool): Whether to use the local cache in kc_path.
+        cache_ttl(int): Number of seconds a cached file is returned without
+            revalidation.
+        max_workers(int): The number of files downloaded at the same time.
+        use_schema(bool): Whether to read only the schema columns.
+
+    Returns:
+        A dictionary mapping each passed file name to a Pandas dataframe
+        containing all columns of the data retreived for that file.
+
+    Raises:
+        ValueError: If passed file_names is not a list of strings.
+        ValueError: If any passed file name is not valid.
+        OSError: If a connection to the URL is unable to be established.
+    """
+
+    # Check inputs
+    if not isinstance(file_names, list):
+        raise ValueError('Passed file_names must be of type list')
+    for file_name in file_names:
+        _county_file_url(file_name)
+
+    # Share one connection pool between the download threads
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1,
+                                            pool_maxsize=max_workers)
+    session.mount('https://', adapter)
+
+    # Download files concurrently, traced under this call
+    stages = _open_stages()
+    with session, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {file_name: executor.submit(_in_stages, stages,
+                                              get_county_data, file_name,
+                                              use_cache=use_cache,
+                                              cache_ttl=cache_ttl,
+                                              session=session,
+                                              use_schema=use_schema)
+                   for file_name in file_names}
+
+        return {file_name: future.result()
+                for file_name, future in futures.items()}
+
+
+@_traced
+def get_county_sales(start_date=None, end_date=None, pins=None,
+                     property_type=11, use_cache=True, cache_ttl=None,
+                     session=None, use_schema=True, chunk_size=250000):
+    """ Retrieves filtered sales from the King County Assessors webstie.
+
+    Reads the Real Property Sales file in chunks of chunk_size rows and
+    keeps only the sales of property_type between start_date and end_date
+    on the parcels in pins, so memory scales with the filtered result
+    rather than the full sales history. With use_cache, chunks are read
+    from the parquet file cached in kc_path, which is written first from
+    the download when it is missing or out of date; otherwise they are
+    parsed from the streamed download. The first and last Document Date of
+    the full history are tracked while reading and stored in the attrs of
+    the result under 'Document Date range' for organize_county_data().
+
+    Args:
+        start_date(str): Include sales from this date.
+        end_date(str): Include sales to this date.
+        pins(DataFrame): Parcels to include, in Major and Minor columns.
+            Defaults to all parcels.
+        property_type(int): Property Type code of sales to include.
+            Defaults to single family houses, None includes all.
+        use_cache(bool): Whether to read from the local cache in kc_path.
+        cache_ttl(int): Number of seconds a cached file is used without
+            revalidation.
+        session(requests.Session): Session to download with.
+        use_schema(bool): Whether to read only the schema columns.
+        chunk_size(int): The number of rows read at a time.
+
+    Returns:
+        A Pandas dataframe containing the filtered sales with the columns
+        returned by get_county_data().
+
+    Raises:
+        ValueError: If passed pins is missing Major or Minor columns.
+        OSError: If a connection to the URL is unable to be established.
+    """
+
+    # Check inputs
+    file_name, url = _county_file_url('Real%20Property%20Sales')
+    source = county_sources[file_name] if use_schema else None
+
+    pin_list = None
+    if pins is not None:
+        if ~pd.Series(['Major', 'Minor']).isin(pins.columns).all():
+            raise ValueError('Passed pins must contain Major and Minor ' +
+                             'columns')
+        pin_list = (pd.to_numeric(pins['Major'], errors='coerce') * 10000 +
+                    pd.to_numeric(pins['Minor'], errors='coerce')).unique()
+
+    date_range = []
+
+    # Define inner functions
+    def filter_chunk(chunk):
+        # Keeps the matching sales of a chunk and tracks its date range
+        cols = {col.strip(): col for col in chunk.columns}
+        dates = pd.to_datetime(chunk[cols['DocumentDate']])
+        chunk[cols['DocumentDate']] = dates
+        date_range.extend([dates.min(), dates.max()])
+
+        keep = pd.Series(True, index=chunk.index)
+        if property_type is not None:
+            keep &= chunk[cols['PropertyType']] == property_type
+        if start_date is not None:
+            keep &= dates >= start_date
+        if end_date is not None:
+            keep &= dates <= end_date
+        if pin_list is not None:
+            pin = (pd.to_numeric(chunk[cols['Major']], errors='coerce') *
+                   10000 +
+                   pd.to_numeric(chunk[cols['Minor']], errors='coerce'))
+            keep &= pin.isin(pin_list)
+
+        return chunk[keep.to_numpy(dtype=bool, na_value=False)]
+
+    # Read the data in chunks, storing a new version in the cache first
+    if use_cache:
+        response = _open_county_file(file_name, url, cache_ttl, session,
+                                     source)
+        if response is not None:
+            _store_county_file(file_name, url, response, source=source)
+            response = None
+    else:
+        response = (session or requests).get(url, stream=True, timeout=60)
+        response.raise_for_status()
+
+    if response is None:
+        import pyarrow.parquet as pq
+        batches = (pq.ParquetFile(_county_cache_paths(file_name, source)[0]).
+                   iter_batches(batch_size=chunk_size))
+        data_sales = pd.concat([filter_chunk(batch.to_pandas())
+                                for batch in batches],
+                               ignore_index=True)
+    else:
+        data_sales = _read_zipped_csv(response, source=source,
+                                      chunk_filter=filter_chunk,
+                                      chunk_size=chunk_size)
+
+    # Restore the categoricals chunks were parsed into
+    if source is not None:
+        data_sales = data_sales.astype(
+            _schema_read_args(source, data_sales.columns)['dtype'])
+
+    # Store the date range of the full history
+    date_range = pd.Series(date_range).dropna()
+    if not date_range.empty:
+        data_sales.attrs['Document Date range'] = (date_range.min(),
+                                                   date_range.max())
+
+    return data_sales
+
+
+def _county_file_url(file_name):
+    """ Validates an assessor file name and returns it with its URL.
+
+    Args:
+        file_name(str): The name of the file to download.
+
+    Returns:
+        A tuple of the URL-encoded file name and the URL of the file.
+
+    Raises:
+        ValueError: If passed file_name is not a string.
+        ValueError: If passed file_name is not valid.
+    """
+
     valid_names = ['Accessory', 'Apartment%20Complex', 'Change%20History',
                    'Change%20History%20Detail', 'Commercial%20Building',
                    'Condo%20Complex%20and%20Units',
@@ -99,264 +671,1598 @@ def get_county_data(file_name, num_rows=None):
                          'https://info.kingcounty.gov/assessor/' +
                          'DataDownload/default.aspx for correct file name')
 
-    if num_rows is not None:
-        if not isinstance(num_rows, int) & (num_rows > 0):
-            raise ValueError('Number or rows to return must be a positive' +
-                             f'integer not {num_rows}')
-
     # Define base URL
     url = f'https://aqua.kingcounty.gov/extranet/assessor/{file_name}.zip'
 
-    # Read in the data
+    return file_name, url
+
+
+def _county_cache_paths(file_name, source=None):
+    """ Returns the cached data and metadata paths for an assessor file."""
+
+    cache_name = file_name.replace('%20', '_')
+    if source is not None:
+        cache_name += '_schema'
+
+    return (kc_path / f'{cache_name}.parquet',
+            kc_path / f'{cache_name}.json')
+
+
+def _fetch_county_file(file_name, url, cache_ttl=None, encoding=None,
+                       session=None, source=None):
+    """ Returns an assessor file from the local cache or the webstie.
+
+    Serves the cached copy of file_name while _open_county_file() finds it
+    current, otherwise parses the new version from the webstie and writes
+    it to the cache as a parquet file.
+
+    Args:
+        file_name(str): The name of the file to retrieve.
+        url(str): The URL of the zipped file on the assessor's webstie.
+        cache_ttl(int): Number of seconds a cached file is trusted.
+        encoding(str): The encoding used to parse the file.
+        session(requests.Session): Session to download with.
+        source(str): The schema source to read the file with.
+
+    Returns:
+        A Pandas dataframe containing all columns of the file.
+
+    Raises:
+        OSError: If the file is not cached and the URL cannot be reached.
+    """
+
+    response = _open_county_file(file_name, url, cache_ttl, session, source)
+    if response is None:
+        return pd.read_parquet(_county_cache_paths(file_name, source)[0])
+
+    return _store_county_file(file_name, url, response, encoding, source)
+
+
+def _store_county_file(file_name, url, response, encoding=None, source=None):
+    """ Parses a new version of an assessor file and writes it to the cache.
+
+    Args:
+        file_name(str): The name of the file to store.
+        url(str): The URL of the zipped file on the assessor's webstie.
+        response(requests.Response): A streamed response for the zip file.
+        encoding(str): The encoding used to parse the file.
+        source(str): The schema source to read the file with.
+
+    Returns:
+        A Pandas dataframe containing all columns of the file.
+    """
+
+    data_file, meta_file = _county_cache_paths(file_name, source)
+
+    data_raw = _to_columnar(_read_zipped_csv(response, encoding=encoding,
+                                             source=source))
+
+    kc_path.mkdir(parents=True, exist_ok=True)
+    data_raw.to_parquet(data_file, index=False)
+    meta_file.write_text(json.dumps(
+        {'url': url,
+         'etag': response.headers.get('ETag'),
+         'last_modified': response.headers.get('Last-Modified'),
+         'fetched': time.time()}))
+
+    return data_raw
+
+
+def _open_county_file(file_name, url, cache_ttl=None, session=None,
+                      source=None):
+    """ Checks whether the cached copy of an assessor file is current.
+
+    Trusts the cached copy of file_name while it is younger than cache_ttl
+    seconds, otherwise revalidates it with a conditional request. A stale
+    cached copy is trusted if the webstie cannot be reached.
+
+    Args:
+        file_name(str): The name of the file to retrieve.
+        url(str): The URL of the zipped file on the assessor's webstie.
+        cache_ttl(int): Number of seconds a cached file is trusted.
+        session(requests.Session): Session to download with.
+        source(str): The schema source the file is read with.
+
+    Returns:
+        None if the cached copy is current, otherwise a streamed response
+        for the new version of the file.
+
+    Raises:
+        OSError: If the file is not cached and the URL cannot be reached.
+    """
+
+    data_file, meta_file = _county_cache_paths(file_name, source)
+
+    # Load cache metadata
+    meta = {}
+    if data_file.exists() and meta_file.exists():
+        meta = json.loads(meta_file.read_text())
+
+    # Trust cached copy while it is fresh
+    validators = {'If-None-Match': meta.get('etag'),
+                  'If-Modified-Since': meta.get('last_modified')}
+    validators = {key: value for key, value in validators.items() if value}
+    if cache_ttl is None and not validators:
+        cache_ttl = county_cache_ttl
+    if (meta and cache_ttl is not None and
+            (time.time() - meta['fetched']) < cache_ttl):
+        return None
+
+    # Revalidate against the webstie
     try:
-        data_raw = pd.read_csv(url,
-                               nrows=num_rows,
-                               low_memory=False)
+        response = (session or requests).get(url, headers=validators,
+                                             stream=True, timeout=60)
+        response.raise_for_status()
+    except requests.exceptions.RequestException:
+        if meta:
+            return None
+        raise
 
-    except OSError:
-        # try three more times with delay
-        for i in range(3):
-            time.sleep(1)
+    if response.status_code == 304:
+        meta['fetched'] = time.time()
+        meta_file.write_text(json.dumps(meta))
+        return None
+
+    return response
+
+
+def _read_zipped_csv(response, num_rows=None, encoding=None, source=None,
+                     chunk_filter=None, chunk_size=None):
+    """ Streams a zipped CSV download into the Pandas read_csv() function.
+
+    Spools the download to a temporary file in chunks rather than holding
+    the archive in memory, then parses the first archive member straight
+    from the decompressing stream. Falls back to latin-1 encoding if the
+    member is not valid UTF-8. If chunk_filter is passed, the member is
+    parsed chunk_size rows at a time and only the rows chunk_filter returns
+    for each chunk are kept.
+
+    Args:
+        response(requests.Response): A streamed response for a zip file.
+        num_rows(int): The number of rows to return.
+        encoding(str): The encoding used to parse the file.
+        source(str): The schema source to read the file with.
+        chunk_filter(function): Filters each chunk of parsed rows.
+        chunk_size(int): The number of rows parsed per chunk.
+
+    Returns:
+        A Pandas dataframe containing the first file in the archive.
+    """
+
+    # Define inner functions
+    def read_member(archive, member, encoding):
+        # Parses the archive member, projected to the schema if requested
+        read_args = {}
+        if source is not None:
+            with archive.open(member) as csv_file:
+                header = pd.read_csv(csv_file, nrows=0,
+                                     encoding=encoding).columns
+            read_args = _schema_read_args(source, header)
+
+        if chunk_filter is not None:
+            read_args['chunksize'] = chunk_size
+
+        with archive.open(member) as csv_file:
+            data = pd.read_csv(csv_file,
+                               nrows=num_rows,
+                               encoding=encoding,
+                               low_memory=False,
+                               **read_args)
+            if chunk_filter is not None:
+                data = pd.concat([chunk_filter(chunk) for chunk in data],
+                                 ignore_index=True)
+            return data
+
+    with tempfile.TemporaryFile() as archive_file:
+        for chunk in response.iter_content(chunk_size=1024 * 1024):
+            archive_file.write(chunk)
+
+        with zipfile.ZipFile(archive_file) as archive:
+            member = archive.namelist()[0]
             try:
-                data_raw = pd.read_csv(url,
-                                       nrows=num_rows,
-                                       low_memory=False)
-            except OSError:
-                pass
-        if data_raw.empty:
-            raise OSError('King County Assessor\'s page could not be ' +
+                return read_member(archive, member, encoding)
+            except UnicodeDecodeError:
+                if encoding is not None:
+                    raise
+                return read_member(archive, member, 'latin-1')
+
+
+@functools.lru_cache(maxsize=None)
+def _column_schema():
+    """ Returns the assessor column schema defined in column_names.csv."""
+
+    return pd.read_csv(data_path / 'column_names.csv')
+
+
+def _schema_read_args(source, header):
+    """ Builds read_csv() arguments that project and type an assessor file.
+
+    Matches the schema to the file header by raw column name, ignoring the
+    padding some assessor files have around their column names.
+
+    Args:
+        source(str): The schema source of the file.
+        header(list): The column names of the file.
+
+    Returns:
+        A dictionary of usecols, dtype and parse_dates arguments.
+    """
+
+    schema = _column_schema()
+    schema = schema[(schema['source'] == source) & (schema['keep'] == 1)]
+    dtypes = dict(zip(schema['raw_name'], schema['dtype']))
+
+    columns = [col for col in header if col.strip() in dtypes]
+
+    return {'usecols': columns,
+            'dtype': {col: dtypes[col.strip()] for col in columns
+                      if dtypes[col.strip()] not in ('object',
+                                                     'datetime64[ns]')},
+            'parse_dates': [col for col in columns
+                            if dtypes[col.strip()] == 'datetime64[ns]'],
+            'skipinitialspace': True}
+
+
+@functools.lru_cache(maxsize=None)
+def _read_sample_data():
+    """ Reads the example joined data used as the default input."""
+
+    return pd.read_csv(examples_path / "sample_data_98075_2018-19.csv",
+                       low_memory=False)
+
+
+def _sample_data():
+    """ Returns a copy of the example joined data, read on first use."""
+
+    return _read_sample_data().copy()
+
+
+def _to_columnar(data):
+    """ Casts mixed-type object columns to strings so they fit parquet."""
+
+    for col in data.columns[data.dtypes == object]:
+        if pd.api.types.infer_dtype(data[col], skipna=True) != 'string':
+            data[col] = data[col].where(data[col].isnull(),
+                                        data[col].astype(str))
+
+    return data
+
+
+@_traced
+def get_redfin_data(session=None, max_workers=4, rate_limit=2.0, retries=3,
+                    max_depth=8, save_snapshot=True, snapshot_path=None):
+    """ Retrieves active King County SFH Redfin listings.
+
+    Retrieves active Redfin listings from either the Redfin API
+    or a local file if the API fails. Results are limited to
+    single family homes in King County.
+
+    The API returns at most redfin_home_cap homes per request, so the
+    county is split adaptively into tiles: a tile returning the cap is
+    split in four and its quadrants are fetched instead. Tiles are
+    fetched concurrently over one pool of connections, at most rate_limit
+    requests per second, and retried with exponential backoff when the
+    API throttles or fails. Homes on the border of two tiles are kept
+    once per MLS#. Each pull from the API is stored as a dated snapshot
+    with save_redfin_snapshot().
+
+    Args:
+        session(requests.Session): Session to download with. Defaults to
+            a new session pooling max_workers connections.
+        max_workers(int): The number of tiles fetched at the same time.
+        rate_limit(float): The most requests sent per second, None for
+            no limit.
+        retries(int): The number of times a failed tile is retried.
+        max_depth(int): The number of times a tile is split at most.
+        save_snapshot(bool): Whether to store the pull as a snapshot.
+        snapshot_path(str or Path): Directory of the snapshots. Defaults
+            to redfin_path.
+
+    Returns:
+        A Pandas dataframe containing all columns of the data retreived from
+        the Redfin API or locally stored file.
+
+    Raises:
+        OSError: If a connection to the API URL is unable to be established.
+        FileNotFoundError: If the local file is not found.
+
+    Warns:
+        UserWarning: If a tile still holds redfin_home_cap homes after
+            max_depth splits, so the pull is incomplete.
+    """
+
+    # Define inner functions
+    def get_from_api():
+        # Retreives Redfin data using the API, tile by tile
+
+        redfin_dataframe = _fetch_redfin_tiles(session, max_workers,
+                                               rate_limit, retries,
+                                               max_depth)
+        if redfin_dataframe.empty:
+            raise OSError('The Redfin API page could not be ' +
                           'reached. Please check that ' +
-                          'https://info.kingcounty.gov/assessor/' +
-                          'DataDownload/default.aspx is available')
+                          'https://redfin.com is available')
+        if save_snapshot:
+            with _stage('save snapshot', len(redfin_dataframe)):
+                save_redfin_snapshot(redfin_dataframe,
+                                     snapshot_path=snapshot_path)
+        return redfin_dataframe
 
-    except UnicodeDecodeError:
-        # change encoding to latin-1 in read_csv
-        data_raw = pd.read_csv(url,
-                               nrows=num_rows,
-                               encoding='latin-1',
-                               low_memory=False)
+    def get_from_file():
+        # Retreives Redfin data from local file
 
-    # Check result and return
-    if data_raw.shape[0] == 0:
-        raise RuntimeError('No data was returned. Please try again later.')
+        file_path = redfin_path / "All_King_Redfin.csv"
+
+        return pd.read_csv(file_path)
+
+    # Retreive Redfin data
+    try:
+        with _stage('redfin api'):
+            return get_from_api()
+    except ValueError:
+        with _stage('redfin file'):
+            return get_from_file()
+
+
+def _redfin_tile_url(bounds):
+    """ Returns the gis-csv URL of the listings within bounds.
+
+    Args:
+        bounds(tuple): West, south, east and north edges of the tile.
+    """
+
+    west, south, east, north = bounds
+    corners = [(west, south), (east, south), (east, north), (west, north),
+               (west, south)]
+    params = dict(redfin_params,
+                  cluster_bounds=','.join(f'{lon:.5f} {lat:.5f}'
+                                          for lon, lat in corners))
+
+    return (redfin_url + '?' +
+            urllib.parse.urlencode(sorted(params.items()),
+                                   quote_via=urllib.parse.quote))
+
+
+def _split_redfin_tile(bounds):
+    """ Returns the four quadrants of a tile."""
+
+    west, south, east, north = bounds
+    lon, lat = (west + east) / 2, (south + north) / 2
+
+    return [(west, south, lon, lat), (lon, south, east, lat),
+            (west, lat, lon, north), (lon, lat, east, north)]
+
+
+class _RateLimiter:
+    """ Spaces calls from any number of threads to a maximum rate."""
+
+    def __init__(self, rate):
+        self._interval = 1 / rate if rate else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """ Sleeps until the next call is allowed."""
+
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self._interval
+        time.sleep(start - now)
+
+
+def _fetch_redfin_tile(session, bounds, limiter, retries):
+    """ Fetches the listings of one tile, retrying with backoff.
+
+    Args:
+        session(requests.Session): Session to download with.
+        bounds(tuple): West, south, east and north edges of the tile.
+        limiter(_RateLimiter): Limiter shared by the tiles.
+        retries(int): The number of times a failed request is retried.
+
+    Returns:
+        A Pandas dataframe of the listings, empty when there are none.
+
+    Raises:
+        ValueError: If the API response has been blocked.
+        OSError: If the tile still fails after retries.
+    """
+
+    url = _redfin_tile_url(bounds)
+
+    with _stage('tile ' + ','.join(f'{edge:.3f}' for edge in bounds)) \
+            as record:
+        for attempt in range(retries + 1):
+            limiter.wait()
+            try:
+                response = session.get(url, timeout=60)
+                if response.status_code in (429, 500, 502, 503, 504):
+                    raise requests.HTTPError(
+                        f'Redfin API returned {response.status_code}',
+                        response=response)
+                response.raise_for_status()
+                break
+            except requests.RequestException as error:
+                if attempt == retries:
+                    raise
+                # Wait as long as the API asks, or back off exponentially
+                delay = 2 ** attempt
+                if error.response is not None and \
+                        error.response.headers.get('Retry-After', '').\
+                        isdigit():
+                    delay = int(error.response.headers['Retry-After'])
+                time.sleep(delay)
+
+        # Check if API response has been blocked
+        url_data = response.content
+        if "spam bot" in str(url_data):
+            raise ValueError("Redfin api error")
+
+        data = pd.DataFrame()
+        if url_data.strip():
+            data = pd.read_csv(io.StringIO(url_data.decode('utf-8')))
+        record['rows_out'] = len(data)
+
+    return data
+
+
+def _fetch_redfin_tiles(session, max_workers, rate_limit, retries,
+                        max_depth):
+    """ Fetches the county's listings in tiles under the API cap.
+
+    Args:
+        session(requests.Session): Session to download with, None for a
+            new pooled session.
+        max_workers(int): The number of tiles fetched at the same time.
+        rate_limit(float): The most requests sent per second.
+        retries(int): The number of times a failed tile is retried.
+        max_depth(int): The number of times a tile is split at most.
+
+    Returns:
+        A Pandas dataframe of the listings, one row per MLS#.
+
+    Warns:
+        UserWarning: If a tile still holds the cap after max_depth splits,
+            so some of its listings are missing.
+    """
+
+    own_session = session is None
+    if own_session:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1,
+                                                pool_maxsize=max_workers)
+        session.mount('https://', adapter)
+
+    limiter = _RateLimiter(rate_limit)
+    stages = _open_stages()
+    tiles = []
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+            def submit(bounds, depth):
+                future = executor.submit(_in_stages, stages,
+                                         _fetch_redfin_tile, session,
+                                         bounds, limiter, retries)
+                pending[future] = (bounds, depth)
+
+            # Split tiles holding the cap until each is complete
+            pending = {}
+            submit(redfin_bounds, 0)
+            while pending:
+                done, _ = futures_wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    bounds, depth = pending.pop(future)
+                    try:
+                        data = future.result()
+                    except Exception:
+                        # Stop fetching when a tile fails
+                        for other in pending:
+                            other.cancel()
+                        raise
+                    if len(data) >= redfin_home_cap and depth < max_depth:
+                        for quadrant in _split_redfin_tile(bounds):
+                            submit(quadrant, depth + 1)
+                        continue
+                    if len(data) >= redfin_home_cap:
+                        warnings.warn(f'The Redfin tile {bounds} still '
+                                      f'holds {redfin_home_cap} homes after '
+                                      f'{max_depth} splits, so some of its '
+                                      'listings are missing. Please raise '
+                                      'max_depth')
+                    tiles.append(data)
+    finally:
+        if own_session:
+            session.close()
+
+    tiles = [data for data in tiles if not data.empty]
+    if not tiles:
+        return pd.DataFrame()
+
+    # Keep homes on tile borders once
+    data = pd.concat(tiles, ignore_index=True)
+    if 'MLS#' in data.columns:
+        data = data[data['MLS#'].isnull() |
+                    ~data['MLS#'].duplicated()]
+
+    return data.drop_duplicates().reset_index(drop=True)
+
+
+def save_redfin_snapshot(redfin_data, snapshot_time=None, snapshot_path=None):
+    """ Stores Redfin listings as a compressed, dated parquet snapshot.
+
+    Snapshots are named redfin_<date>.parquet after the time of the pull,
+    like the dated csv pulls in redfin_path, and compressed with zstd.
+
+    Args:
+        redfin_data(DataFrame): Listings returned by get_redfin_data().
+        snapshot_time(datetime): Time of the pull. Defaults to now.
+        snapshot_path(str or Path): Directory of the snapshots. Defaults
+            to redfin_path.
+
+    Returns:
+        The Path of the snapshot.
+    """
+
+    snapshot_path = Path(snapshot_path) if snapshot_path is not None else \
+        redfin_path
+    snapshot_time = snapshot_time or datetime.datetime.now()
+    snapshot_file = snapshot_path / ('redfin_' + snapshot_time.strftime(
+        redfin_snapshot_format) + '.parquet')
+
+    # Write next to the snapshot and rename, so readers never see half
+    snapshot_path.mkdir(parents=True, exist_ok=True)
+    temp_file = snapshot_file.with_suffix('.tmp')
+    _to_columnar(redfin_data.copy()).to_parquet(temp_file, index=False,
+                                                compression='zstd')
+    temp_file.replace(snapshot_file)
+
+    return snapshot_file
+
+
+def list_redfin_snapshots(snapshot_path=None):
+    """ Lists the dated Redfin snapshots, oldest first.
+
+    Both parquet snapshots and dated csv pulls named
+    redfin_<date>.csv are listed.
+
+    Args:
+        snapshot_path(str or Path): Directory of the snapshots. Defaults
+            to redfin_path.
+
+    Returns:
+        A Pandas series of snapshot paths indexed by the time of the pull.
+    """
+
+    snapshot_path = Path(snapshot_path) if snapshot_path is not None else \
+        redfin_path
+
+    snapshots = {}
+    for snapshot_file in snapshot_path.glob('redfin_*'):
+        if snapshot_file.suffix not in ('.parquet', '.csv'):
+            continue
+        try:
+            snapshot_time = datetime.datetime.strptime(
+                snapshot_file.stem[len('redfin_'):], redfin_snapshot_format)
+        except ValueError:
+            continue
+        # A parquet snapshot replaces a csv pull of the same time
+        if snapshot_file.suffix == '.parquet' or \
+                snapshot_time not in snapshots:
+            snapshots[snapshot_time] = snapshot_file
+
+    return pd.Series(snapshots, dtype=object).sort_index()
+
+
+def read_redfin_snapshot(snapshot, columns=None, snapshot_path=None):
+    """ Reads the columns of interest of one Redfin snapshot.
+
+    Only the passed columns are read from the file, so reading a few
+    columns of a snapshot is cheap.
+
+    Args:
+        snapshot(str, datetime or Path): Time of the pull, as listed by
+            list_redfin_snapshots(), or path of the snapshot.
+        columns(list): Columns to read. Defaults to all.
+        snapshot_path(str or Path): Directory of the snapshots. Defaults
+            to redfin_path.
+
+    Returns:
+        A Pandas dataframe of the listings of the snapshot.
+
+    Raises:
+        ValueError: If there is no snapshot of the passed time.
+    """
+
+    if isinstance(snapshot, Path):
+        snapshot_file = snapshot
+    else:
+        snapshots = list_redfin_snapshots(snapshot_path)
+        snapshot_time = pd.Timestamp(snapshot)
+        if snapshot_time not in snapshots.index:
+            raise ValueError(f'There is no Redfin snapshot of {snapshot}')
+        snapshot_file = snapshots[snapshot_time]
+
+    if snapshot_file.suffix == '.csv':
+        return pd.read_csv(snapshot_file, usecols=columns, low_memory=False)
+    return pd.read_parquet(snapshot_file, columns=columns)
+
+
+def redfin_snapshot_delta(old_snapshot, new_snapshot, snapshot_path=None):
+    """ Finds the listings that changed between two Redfin snapshots.
+
+    Reads only MLS#, ADDRESS, ZIP OR POSTAL CODE and PRICE of both
+    snapshots and hash-joins them on MLS#.
+
+    Args:
+        old_snapshot(str, datetime or Path): Earlier snapshot.
+        new_snapshot(str, datetime or Path): Later snapshot.
+        snapshot_path(str or Path): Directory of the snapshots. Defaults
+            to redfin_path.
+
+    Returns:
+        A Pandas dataframe with one row per new, delisted or price changed
+        listing: its MLS#, ADDRESS and ZIP OR POSTAL CODE, its Old price
+        and New price, and the Change, one of 'new', 'delisted' or
+        'price changed'.
+    """
+
+    return _snapshot_delta(_read_delta_columns(old_snapshot, snapshot_path),
+                           _read_delta_columns(new_snapshot, snapshot_path))
+
+
+def _read_delta_columns(snapshot, snapshot_path=None):
+    """ Reads the listings of a snapshot needed for deltas, by MLS#."""
+
+    data = read_redfin_snapshot(snapshot, ['MLS#', 'ADDRESS',
+                                           'ZIP OR POSTAL CODE', 'PRICE'],
+                                snapshot_path)
+    data = data[data['MLS#'].notnull()]
+    return data.assign(**{'MLS#': data['MLS#'].astype(str)}).\
+        drop_duplicates('MLS#')
+
+
+def _snapshot_delta(old_data, new_data):
+    """ Hash-joins the delta columns of two snapshots on MLS#.
+
+    Returns:
+        The changed listings as returned by redfin_snapshot_delta().
+    """
+
+    delta = pd.merge(old_data, new_data, how='outer', on='MLS#',
+                     suffixes=(' old', ' new'), indicator=True)
+
+    # Listings without a price in both snapshots are unchanged
+    same_price = (delta['PRICE old'].eq(delta['PRICE new']) |
+                  (delta['PRICE old'].isna() & delta['PRICE new'].isna()))
+    change = pd.Series(np.select(
+        [delta['_merge'] == 'right_only', delta['_merge'] == 'left_only',
+         ~same_price],
+        ['new', 'delisted', 'price changed'], ''), index=delta.index)
+
+    # Describe each listing by its latest address
+    delta = pd.DataFrame({
+        'MLS#': delta['MLS#'],
+        'ADDRESS': delta['ADDRESS new'].fillna(delta['ADDRESS old']),
+        'ZIP OR POSTAL CODE': delta['ZIP OR POSTAL CODE new'].fillna(
+            delta['ZIP OR POSTAL CODE old']),
+        'Old price': delta['PRICE old'],
+        'New price': delta['PRICE new'],
+        'Change': change})
+
+    return delta[delta['Change'] != ''].reset_index(drop=True)
+
+
+def redfin_market_movement(start=None, end=None, snapshot_path=None):
+    """ Summarizes the market movement between consecutive snapshots.
+
+    Compares each snapshot between start and end with the one before it
+    with redfin_snapshot_delta(), so only two snapshots, and only their
+    delta columns, are in memory at a time.
+
+    Args:
+        start(str or datetime): First snapshot time to include. Defaults to
+            the first snapshot.
+        end(str or datetime): Last snapshot time to include. Defaults to
+            the last snapshot.
+        snapshot_path(str or Path): Directory of the snapshots. Defaults
+            to redfin_path.
+
+    Returns:
+        A Pandas dataframe indexed by the time of each later snapshot,
+        with its Active listings, New listings, Delisted listings, Price
+        changes, Price cuts and Mean price change since the snapshot
+        before.
+    """
+
+    snapshots = list_redfin_snapshots(snapshot_path)
+    snapshots = snapshots[start:end]
+
+    # Read each snapshot once, keeping only the one before in memory
+    movement = []
+    old_data = None
+    for snapshot_file in snapshots:
+        new_data = _read_delta_columns(snapshot_file)
+        if old_data is None:
+            old_data = new_data
+            continue
+
+        delta = _snapshot_delta(old_data, new_data)
+        old_data = new_data
+
+        changed = delta[delta['Change'] == 'price changed']
+        price_change = changed['New price'] - changed['Old price']
+        movement.append({
+            'Active listings': len(new_data),
+            'New listings': (delta['Change'] == 'new').sum(),
+            'Delisted listings': (delta['Change'] == 'delisted').sum(),
+            'Price changes': len(changed),
+            'Price cuts': (price_change < 0).sum(),
+            'Mean price change': price_change.mean()})
+
+    return pd.DataFrame(movement, index=pd.DatetimeIndex(
+        snapshots.index[1:], name='Snapshot time'),
+                        columns=['Active listings', 'New listings',
+                                 'Delisted listings', 'Price changes',
+                                 'Price cuts', 'Mean price change'])
+
+
+@_traced
+def organize_county_data(df_sale=None, df_building=None, df_parcel=None,
+                         df_lookup=None, zip_code: list = None,
+                         start_year='2010', start_month='1', start_day='1',
+                         end_year='2020', end_month='1', end_day='1',
+                         store_path=None):
+    """ Cleans and organizes data retrieved from King County Assessors website.
+
+    Renames columns consistently, filters data using default and customizable
+    inputs, merges data to a single csv file. Accepts both full frames and
+    the projected frames returned by get_county_data(use_schema=True).
+    When no frames are passed, only the zip code and sale year partitions
+    of the query are read from the store written by ingest_county_data().
+
+    Args:
+        df_sale(DataFrame): King County Assessor's sales data
+        df_building(DataFrame): King County Assessor's buildings data
+        df_parcel(DataFrame): King County Assessor's parcel data
+        df_lookup(DataFrame): King County Assessor's lookup data
+        zip_code(list): List of zip codes in the King County. Defaults to
+            every zip code of the buildings.
+        start_year(str): Include property sale data from this year.
+        start_month(str): Include property sale data from this month.
+        start_day(str): Include property sale data from this day.
+        end_year(str): Include property sale data to this year.
+        end_month(str): Include property sale data to this month.
+        end_day(str): Include property sale data to this day.
+        store_path(str or Path): Directory of the store to read when no
+            frames are passed. Defaults to kc_path / 'store'.
+
+    Returns:
+        A Pandas dataframe containing all the data retrieved from
+        the King County Assessor's website, filtered and merged.
+
+    Raises:
+        ValueError: If passed zip code is not valid.
+        ValueError: If no frames are passed and there is no store.
+        ValueError: If passed start_year is before the first record.
+        ValueError: If passed end_year is after the last record.
+        ValueError: If start date is after end date based on passed values.
+    """
+    #df_lookup_items = pd.read_csv('https://raw.githubusercontent.com/' +
+    #                              'chrico7/data515_project/' +
+    #                              'master/data/look_up_item.csv')
+    #df_col_names = pd.read_csv('https://raw.githubusercontent.com/' +
+    #                           'chrico7/data515_project/' +
+    #                           'master/data/column_names.csv')
+
+    df_lookup_items = pd.read_csv(data_path / 'look_up_item.csv')
+
+    # Read the partitions of the query from the store
+    from_store = all(data is None for data in (df_sale, df_building,
+                                               df_parcel, df_lookup))
+    if from_store and zip_code is not None:
+        _check_zip_codes(zip_code,
+                         read_county_catalog(store_path)['zip codes'])
+    if from_store:
+        with _stage('read store') as record:
+            df_sale, df_building, df_parcel, df_lookup = _read_county_store(
+                zip_code, start_year, end_year, store_path)
+            record['rows_out'] = _count_rows([(df_sale, df_building,
+                                               df_parcel)])
+
+    with _stage('clean', _count_rows([(df_sale, df_building,
+                                       df_parcel)])) as record:
+        df_sale_sf, df_building_sf, df_parcel_sf, df_lookup, date_range = \
+            _clean_county_data(df_sale, df_building, df_parcel, df_lookup)
+        record['rows_out'] = _count_rows([(df_sale_sf, df_building_sf,
+                                           df_parcel_sf)])
+
+    # check zip code(s)
+    if zip_code is None:
+        zip_code = _valid_zip_codes(df_building_sf['Zip code'])
+    elif not from_store:
+        _check_zip_codes(zip_code, _valid_zip_codes(df_building_sf['Zip code']))
+
+    # check dates
+    _check_query_dates(date_range, start_year, start_month, start_day,
+                       end_year, end_month, end_day)
+    start_date = start_year + '-' + start_month + '-' + start_day
+    end_date = end_year + '-' + end_month + '-' + end_day
+
+    # filter by a start date and end date
+    df_sale_sf_recent = df_sale_sf[df_sale_sf['Document Date'] >= start_date]
+    df_sale_sf_recent = df_sale_sf_recent[df_sale_sf_recent['Document Date']
+                                          <= end_date]
+    # filter by zip
+    df_building_sf_zip = df_building_sf[df_building_sf['Zip code'].isin(zip_code)]
+    #print(df_building_sf['Zip code'].value_counts())
+    #print(df_building_sf_zip['Zip code'].value_counts())
+    # combine data into a single frame
+    with _stage('merge', _count_rows([(df_building_sf_zip, df_parcel_sf,
+                                       df_sale_sf_recent)])) as record:
+        new_df = pd.merge(df_building_sf_zip, df_parcel_sf,
+                          how='left',
+                          left_on=['Major', 'Minor'],
+                          right_on=['Major', 'Minor'])
+        df_all = pd.merge(new_df, df_sale_sf_recent,
+                          how='left',
+                          left_on=['Major', 'Minor'],
+                          right_on=['Major', 'Minor'])
+        record['rows_out'] = len(df_all)
+    # replace numerical codes in records to readable descriptions
+    with _stage('decode lookups', len(df_all)) as record:
+        df_all = _decode_lookups(df_all, df_lookup, df_lookup_items)
+        record['rows_out'] = len(df_all)
+    return df_all
+
+
+def _clean_county_data(df_sale, df_building, df_parcel, df_lookup):
+    """ Cleans assessor data and keeps the single family houses.
+
+    Renames the columns to the names in column_names.csv, drops sales
+    without a numeric Major, parses Document Date, drops buildings without
+    a numeric zip code and keeps single family parcels, buildings and
+    sales. The passed frames are not modified.
+
+    Args:
+        df_sale(DataFrame): King County Assessor's sales data
+        df_building(DataFrame): King County Assessor's buildings data
+        df_parcel(DataFrame): King County Assessor's parcel data
+        df_lookup(DataFrame): King County Assessor's lookup data
+
+    Returns:
+        A tuple of the cleaned sales, buildings, parcels and lookup
+        dataframes, and the first and last Document Date of all sales.
+    """
+
+    df_col_names = _column_schema()
+
+    # Sales from get_county_sales() carry the range of the full history
+    date_range = df_sale.attrs.get('Document Date range')
+
+    # Define inner functions
+    def rename_columns(data, source):
+        # Renames raw assessor columns to the names in column_names.csv
+        names = df_col_names[df_col_names['source'] == source]
+        names = dict(zip(names['raw_name'], names['name']))
+        return data.rename(columns=lambda col: names.get(col.strip(), col))
+
+    df_sale = rename_columns(df_sale, 'sale')
+    df_building = rename_columns(df_building, 'building')
+    df_parcel = rename_columns(df_parcel, 'parcel')
+    df_lookup = rename_columns(df_lookup, 'lookup')
+
+    df_lookup['Look Up Description'] = (df_lookup['Look Up Description'].
+                                        str.strip())
+
+    df_sale = df_sale[pd.to_numeric(df_sale['Major'],
+                                    errors='coerce').notnull()]
+    df_sale = df_sale.astype({'Major': int, 'Minor': int})
+    df_sale['Document Date'] = pd.to_datetime(df_sale['Document Date'])
+
+    if date_range is None:
+        date_range = (df_sale['Document Date'].min(),
+                      df_sale['Document Date'].max())
+
+    # clean up the data
+    df_building['Zip code'] = pd.to_numeric(df_building['Zip code'],
+                                            errors='coerce')
+    df_building = df_building.dropna(subset=['Zip code'])
+    df_building['Zip code'] = df_building['Zip code'].astype(int)
+    df_building['Zip code'] = df_building['Zip code'].astype(str)
+
+    # limit properties to only single family houses
+    df_parcel_sf = df_parcel.loc[df_parcel['Property Type'] == 'R']
+    df_parcel_sf = df_parcel_sf.drop(columns=['Property Type'])
+    df_sale_sf = df_sale.loc[df_sale['Property Type'] == 11]
+    df_building_sf = df_building.loc[df_building['Number Living Units'] == 1]
+
+    return df_sale_sf, df_building_sf, df_parcel_sf, df_lookup, date_range
+
+
+def _check_query_dates(date_range, start_year, start_month, start_day,
+                       end_year, end_month, end_day):
+    """ Checks a query date window against the range of the sales.
+
+    Raises:
+        ValueError: If passed start_year is before the first record.
+        ValueError: If passed end_year is after the last record.
+        ValueError: If start date is after end date based on passed values.
+    """
+
+    begin_year = date_range[0].year
+    end_year = date_range[1].year
+
+    if int(start_year) < int(begin_year):
+        raise ValueError('There is no record before year' + str(begin_year))
+    if int(start_year) > int(end_year):
+        raise ValueError('There is no record after year' + str(end_year))
+    if datetime.date(int(start_year), int(start_month), int(start_day)) > \
+            datetime.date(int(end_year), int(end_month), int(end_day)):
+        raise ValueError('Start date is after end date')
+
+
+@_traced
+def ingest_county_data(df_sale, df_building, df_parcel, df_lookup,
+                       store_path=None):
+    """ Writes assessor data to a local store partitioned by zip code.
+
+    Writes the buildings, parcels and sales to parquet datasets partitioned
+    by zip code, with sales also partitioned by year of Document Date, so
+    organize_county_data() only reads the partitions of the zip codes and
+    years it is asked for. Parcels and sales take the zip code of their
+    buildings; those without a building with a valid zip code are left out,
+    as organize_county_data() would drop them. A catalog of the valid zip
+    codes, the rows per zip code, the date range of the full sales history
+    and the null counts per column is kept with the store, see
+    read_county_catalog(). An existing store is replaced once the new one
+    is complete.
+
+    Args:
+        df_sale(DataFrame): King County Assessor's sales data
+        df_building(DataFrame): King County Assessor's buildings data
+        df_parcel(DataFrame): King County Assessor's parcel data
+        df_lookup(DataFrame): King County Assessor's lookup data
+        store_path(str or Path): Directory of the store. Defaults to
+            kc_path / 'store'.
+
+    Returns:
+        The Path of the store.
+    """
+
+    store_path = Path(store_path) if store_path is not None else \
+        kc_path / 'store'
+
+    # Define inner functions
+    def column(data, source, name):
+        # Returns the column of data with the raw or renamed schema name
+        schema = _column_schema()
+        raw_name = schema.loc[(schema['source'] == source) &
+                              (schema['name'] == name), 'raw_name'].iloc[0]
+        cols = {col.strip(): col for col in data.columns}
+        return data[cols.get(raw_name, cols.get(name))]
+
+    def pin_keys(data, source):
+        # Packs Major and Minor into one number as get_county_sales() does
+        return (pd.to_numeric(column(data, source, 'Major'),
+                              errors='coerce') * 10000 +
+                pd.to_numeric(column(data, source, 'Minor'),
+                              errors='coerce'))
+
+    # Zip code of each building and parcel
+    zip_codes = pd.to_numeric(column(df_building, 'building', 'Zip code'),
+                              errors='coerce')
+    df_building = _to_columnar(df_building[zip_codes.notnull()].copy())
+    df_building['zip'] = zip_codes.dropna().astype(int).to_numpy()
+    pin_zips = pd.DataFrame({'pin': pin_keys(df_building, 'building'),
+                             'zip': df_building['zip']}).drop_duplicates()
+
+    df_parcel = _to_columnar(df_parcel.copy())
+    df_parcel = (df_parcel.assign(pin=pin_keys(df_parcel, 'parcel')).
+                 merge(pin_zips, on='pin').drop(columns='pin'))
+
+    # Zip code and year of each sale
+    df_sale = _to_columnar(df_sale.copy())
+    dates = pd.to_datetime(column(df_sale, 'sale', 'Document Date'))
+    date_range = df_sale.attrs.get('Document Date range',
+                                   (dates.min(), dates.max()))
+    df_sale = (df_sale.assign(pin=pin_keys(df_sale, 'sale'),
+                              year=dates.dt.year)[dates.notnull()].
+               merge(pin_zips, on='pin').drop(columns='pin'))
+    df_sale['year'] = df_sale['year'].astype(int)
+
+    # Describe the stored data in a catalog
+    single_family = column(df_building, 'building',
+                           'Number Living Units') == 1
+    catalog = {
+        'zip codes': _valid_zip_codes(df_building.loc[single_family, 'zip']),
+        'Document Date range': [str(date) for date in date_range],
+        'rows': {name: {str(code): int(count) for code, count in
+                        data['zip'].value_counts().sort_index().items()}
+                 for name, data in (('building', df_building),
+                                    ('parcel', df_parcel),
+                                    ('sale', df_sale))},
+        'null counts': {name: {col.strip(): int(count) for col, count in
+                               data.drop(columns=['zip', 'year'],
+                                         errors='ignore').
+                               isnull().sum().items()}
+                        for name, data in (('building', df_building),
+                                           ('parcel', df_parcel),
+                                           ('sale', df_sale))}}
+
+    # Write the new store next to the old one and swap them
+    temp_path = store_path.with_name(store_path.name + '.tmp')
+    shutil.rmtree(temp_path, ignore_errors=True)
+    temp_path.mkdir(parents=True)
+
+    df_building.to_parquet(temp_path / 'building', partition_cols=['zip'],
+                           index=False)
+    df_parcel.to_parquet(temp_path / 'parcel', partition_cols=['zip'],
+                         index=False)
+    df_sale.to_parquet(temp_path / 'sale', partition_cols=['zip', 'year'],
+                       index=False)
+    _to_columnar(df_lookup.copy()).to_parquet(temp_path / 'lookup.parquet',
+                                              index=False)
+    (temp_path / 'catalog.json').write_text(json.dumps(catalog, indent=1))
+
+    shutil.rmtree(store_path, ignore_errors=True)
+    temp_path.replace(store_path)
+
+    return store_path
+
+
+def read_county_catalog(store_path=None):
+    """ Reads the catalog of the store written by ingest_county_data().
+
+    Args:
+        store_path(str or Path): Directory of the store. Defaults to
+            kc_path / 'store'.
+
+    Returns:
+        A dictionary with the valid King County zip codes under 'zip
+        codes', the first and last Document Date of all sales under
+        'Document Date range', the rows per zip code of the building,
+        parcel and sale data under 'rows' and their null counts per column
+        under 'null counts'.
+
+    Raises:
+        ValueError: If there is no store at store_path.
+    """
+
+    store_path = Path(store_path) if store_path is not None else \
+        kc_path / 'store'
+    catalog_file = store_path / 'catalog.json'
+    if not catalog_file.exists():
+        raise ValueError(f'No county store found at {store_path}. ' +
+                         'Please run ingest_county_data() first')
+
+    return json.loads(catalog_file.read_text())
+
+
+def _valid_zip_codes(zip_codes):
+    """ Returns the distinct King County (98xxx) zip codes as strings."""
+
+    zip_codes = pd.Series(pd.unique(pd.Series(zip_codes).dropna())).astype(str)
+    return sorted(zip_codes[zip_codes.str.match(r'^98\d{3}$')])
+
+
+def _check_zip_codes(zip_code, valid_zip):
+    """ Raises a ValueError for the first zip code not in valid_zip."""
+
+    valid_zip = set(valid_zip)
+    for code in zip_code:
+        if str(code) not in valid_zip:
+            raise ValueError('The zip code ' + str(code) +
+                             ' you\'ve entered is not in King County')
+
+
+def _read_county_store(zip_code, start_year, end_year, store_path=None):
+    """ Reads the partitions of the county store a query touches.
+
+    Args:
+        zip_code(list): Zip codes to read, None reads every zip code.
+        start_year(str): First year of sales to read, None reads every
+            year.
+        end_year(str): Last year of sales to read.
+        store_path(str or Path): Directory of the store written by
+            ingest_county_data(). Defaults to kc_path / 'store'.
+
+    Returns:
+        A tuple of the sales, buildings, parcels and lookup dataframes.
+        The sales carry the date range of the full history in their attrs.
+
+    Raises:
+        ValueError: If there is no store at store_path.
+    """
+
+    catalog = read_county_catalog(store_path)
+    store_path = Path(store_path) if store_path is not None else \
+        kc_path / 'store'
+
+    # Only read the partitions of zip codes holding buildings
+    zip_filter = []
+    if zip_code is not None:
+        zips = [int(code) for code in zip_code
+                if str(code) in catalog['rows']['building']]
+        zip_filter = [('zip', 'in', zips or [0])]
+    year_filter = []
+    if start_year is not None:
+        year_filter = [('year', '>=', int(start_year)),
+                       ('year', '<=', int(end_year))]
+
+    df_building = pd.read_parquet(store_path / 'building',
+                                  filters=zip_filter or None).\
+        drop(columns='zip')
+    df_parcel = pd.read_parquet(store_path / 'parcel',
+                                filters=zip_filter or None).\
+        drop(columns='zip')
+    df_sale = pd.read_parquet(store_path / 'sale',
+                              filters=zip_filter + year_filter or None).\
+        drop(columns=['zip', 'year'])
+    df_lookup = pd.read_parquet(store_path / 'lookup.parquet')
+
+    df_sale.attrs['Document Date range'] = tuple(
+        pd.Timestamp(date) for date in catalog['Document Date range'])
+
+    return df_sale, df_building, df_parcel, df_lookup
+
+
+class CountySession:
+    """ Answers repeated zip code and date queries on King County data.
+
+    Cleans the assessor data once, joins the single family buildings with
+    their parcels, decodes the lookup codes and indexes the houses by zip
+    code and the sales by Document Date. Each query is then a slice of the
+    houses and the sales, joined on Major and Minor, and returns the same
+    data as organize_county_data().
+
+    Attributes:
+        date_range: First and last Document Date of all sales.
+        zip_codes: King County zip codes with single family houses.
+    """
+
+    @_traced
+    def __init__(self, df_sale=None, df_building=None, df_parcel=None,
+                 df_lookup=None, store_path=None):
+        """ Cleans and indexes the assessor data.
+
+        Args:
+            df_sale(DataFrame): King County Assessor's sales data
+            df_building(DataFrame): King County Assessor's buildings data
+            df_parcel(DataFrame): King County Assessor's parcel data
+            df_lookup(DataFrame): King County Assessor's lookup data
+            store_path(str or Path): Directory of the store to read when
+                no frames are passed. Defaults to kc_path / 'store'.
+
+        Raises:
+            ValueError: If no frames are passed and there is no store.
+        """
+
+        if all(data is None for data in (df_sale, df_building, df_parcel,
+                                         df_lookup)):
+            df_sale, df_building, df_parcel, df_lookup = _read_county_store(
+                None, None, None, store_path)
+
+        df_lookup_items = pd.read_csv(data_path / 'look_up_item.csv')
+        df_sale, df_building, df_parcel, df_lookup, self.date_range = \
+            _clean_county_data(df_sale, df_building, df_parcel, df_lookup)
+
+        # Join the houses with their parcels and decode them once
+        houses = pd.merge(df_building, df_parcel, how='left',
+                          on=['Major', 'Minor'])
+        self._houses = _decode_lookups(houses, df_lookup, df_lookup_items)
+        self._zip_rows = self._houses.groupby('Zip code').indices
+        self.zip_codes = _valid_zip_codes(df_building['Zip code'])
+
+        # Decode the sales once and sort them by date
+        df_sale = _decode_lookups(df_sale.reset_index(drop=True), df_lookup,
+                                  df_lookup_items)
+        self._sale_order = np.argsort(df_sale['Document Date'].to_numpy(),
+                                      kind='stable')
+        self._sales = df_sale.iloc[self._sale_order].reset_index(drop=True)
+        self._sale_dates = self._sales['Document Date'].to_numpy()
+        self._sale_pins = (self._sales['Major'].to_numpy(dtype=np.int64) *
+                           10000 +
+                           self._sales['Minor'].to_numpy(dtype=np.int64))
+        self._sale_codes = [col for col in df_sale.columns
+                            if isinstance(df_sale[col].dtype,
+                                          pd.CategoricalDtype) and
+                            'nan' in df_sale[col].cat.categories]
+
+    @_traced
+    def query(self, zip_code: list, start_year='2010', start_month='1',
+              start_day='1', end_year='2020', end_month='1', end_day='1'):
+        """ Returns the houses and sales of zip codes in a date window.
+
+        Args:
+            zip_code(list): List of zip codes in the King County.
+            start_year(str): Include property sale data from this year.
+            start_month(str): Include property sale data from this month.
+            start_day(str): Include property sale data from this day.
+            end_year(str): Include property sale data to this year.
+            end_month(str): Include property sale data to this month.
+            end_day(str): Include property sale data to this day.
+
+        Returns:
+            A Pandas dataframe of the same data as organize_county_data().
+
+        Raises:
+            ValueError: If passed zip code is not valid.
+            ValueError: If passed start_year is before the first record.
+            ValueError: If passed end_year is after the last record.
+            ValueError: If start date is after end date based on passed
+                values.
+        """
+
+        _check_zip_codes(zip_code, self.zip_codes)
+        _check_query_dates(self.date_range, start_year, start_month,
+                           start_day, end_year, end_month, end_day)
+        start_date = pd.Timestamp(start_year + '-' + start_month + '-' +
+                                  start_day).to_datetime64()
+        end_date = pd.Timestamp(end_year + '-' + end_month + '-' +
+                                end_day).to_datetime64()
+
+        # Slice the houses of the zip codes, in their original order
+        rows = [self._zip_rows[code] for code in dict.fromkeys(zip_code)
+                if code in self._zip_rows]
+        houses = self._houses.iloc[np.sort(np.concatenate(rows))
+                                   if rows else []]
+
+        # Slice the sales of the window on those houses, in their original
+        # order
+        first, last = (np.searchsorted(self._sale_dates, start_date, 'left'),
+                       np.searchsorted(self._sale_dates, end_date, 'right'))
+        pins = (houses['Major'].to_numpy(dtype=np.int64) * 10000 +
+                houses['Minor'].to_numpy(dtype=np.int64))
+        keep = first + np.flatnonzero(np.isin(self._sale_pins[first:last],
+                                              pins))
+        sales = self._sales.iloc[keep[np.argsort(self._sale_order[keep],
+                                                 kind='stable')]]
+
+        with _stage('merge', len(houses) + len(sales)) as record:
+            df_all = pd.merge(houses, sales, how='left',
+                              on=['Major', 'Minor'])
+
+            # Houses without a sale decode to 'nan' as in
+            # organize_county_data()
+            for col in self._sale_codes:
+                if col in df_all.columns:
+                    df_all[col] = df_all[col].fillna('nan')
+            record['rows_out'] = len(df_all)
+
+        return df_all
+
+
+def _decode_lookups(data, df_lookup, df_lookup_items):
+    """ Replaces numerical lookup codes with their readable descriptions.
+
+    Builds one code to description mapping per Look Up Type and decodes
+    every column listed in look_up_item.csv with a vectorized map. Columns
+    sharing a Look Up Type become categoricals over the same categories.
+    Codes without a description are decoded to 'nan'.
+
+    Args:
+        data(DataFrame): Merged King County Assessor's data.
+        df_lookup(DataFrame): King County Assessor's lookup data.
+        df_lookup_items(DataFrame): Look Up Type of each coded field.
+
+    Returns:
+        The passed dataframe with its coded columns decoded.
+    """
+
+    fields = df_lookup_items[df_lookup_items['Field Name'].
+                             isin(data.columns)]
+
+    lookups = {}
+    for col, look_up_type in zip(fields['Field Name'], fields['Look Up']):
+
+        # Build the mapping once per Look Up Type
+        if look_up_type not in lookups:
+            items = (df_lookup[df_lookup['Look Up Type'] == look_up_type].
+                     drop_duplicates('Look Up Item'))
+            codes = pd.Series(items['Look Up Description'].values,
+                              index=items['Look Up Item'].values)
+            categories = codes.drop_duplicates().tolist()
+            if 'nan' not in categories:
+                categories.append('nan')
+            lookups[look_up_type] = (codes,
+                                     pd.CategoricalDtype(categories))
+
+        codes, dtype = lookups[look_up_type]
+        data[col] = (data[col].astype(object).map(codes).
+                     fillna('nan').astype(dtype))
+
+    return data
+
+
+_zip_code_pattern = re.compile(r'^9\d{4}(?:-\d{4})?$')
+
+# Building number and street of a normalized address
+_address_parts_pattern = re.compile(r'^(\S*)(?: (.*))?$')
+
+
+@functools.lru_cache(maxsize=2**20)
+def _normalize_address(address):
+    """ Returns the canonical form of a street address and its unit.
+
+    Lowercases the address, collapses whitespace, drops a trailing zip
+    code and parenthesized notes, splits off the unit and replaces
+    street suffixes and directionals with the abbreviations in
+    address_abbreviations, in a single pass over its words. Results are
+    memoized per address string, so addresses seen by earlier joins are
+    not normalized again.
+
+    Args:
+        address(str): Street address from the Assessor or Redfin.
+
+    Returns:
+        A tuple of the normalized street address and the unit, both None
+        when address is not a string. The unit is None when there is none.
+    """
+
+    if not isinstance(address, str):
+        return None, None
+
+    words = address.lower().split()
+
+    # Drop a trailing zip code
+    if len(words) > 1 and _zip_code_pattern.match(words[-1]):
+        words.pop()
+
+    street = words[:1]
+    unit = None
+    in_note = False
+    for position, word in enumerate(words[1:], 1):
+
+        # Drop parenthesized notes such as (homesite 6)
+        if in_note or word.startswith('('):
+            in_note = not word.endswith(')')
+            continue
 
-    return data_raw
+        if word in address_unit_markers or word.startswith('#'):
+            unit = ' '.join(words[position +
+                                  (word in address_unit_markers):])
+            unit = unit.strip('# ') or None
+            break
+        street.append(address_abbreviations.get(word, word))
 
+    return ' '.join(street), unit
 
-def get_redfin_data():
-    """ Retrieves active King County SFH Redfin listings.
 
-    Retrieves active Redfin listings from either the Redfin API
-    or a local file if the API fails. Results are limited to
-    single family homes in King County.
+def _normalize_addresses(addresses):
+    """ Normalizes a column of addresses once per distinct address.
 
-    Returns:
-        A Pandas dataframe containing all columns of the data retreived from
-        the Redfin API or locally stored file.
+    Args:
+        addresses(Series): Street addresses.
 
-    Raises:
-        OSError: If a connection to the API URL is unable to be established.
-        FileNotFoundError: If the local file is not found.
+    Returns:
+        A Series of normalized street addresses, without their units.
     """
 
-    # Define inner functions
-    def get_from_api():
-        # Retreives Redfin data using the API
+    distinct = addresses.drop_duplicates()
+    return addresses.map(dict(zip(distinct, [_normalize_address(address)[0]
+                                             for address in distinct])))
 
-        # Define API URL
-        all_king_url = (r'https://www.redfin.com/stingray/api/gis-csv?al=1&' +
-                        r'cluster_bounds=-123.04941%2046.84777%' +
-                        r'2C-121.01694%2046.84777%2C-121.01694%2047.92442%' +
-                        r'2C-123.04941%2047.92442%2C-123.04941%2046.84777&' +
-                        r'market=seattle&min_stories=1&num_homes=5000&' +
-                        r'ord=redfin-recommended-asc&page_number=1&' +
-                        r'region_id=118&region_type=5&sf=1,2,3,5,6,7&' +
-                        r'status=1&uipt=1,2,3,4,5,6&v=8')
 
-        # Get API response
-        url_data = requests.get(all_king_url).content
+class _StreetIndex:
+    """ Finds the closest King County street name for Redfin addresses.
 
-        # Check if API response has been blocked
-        if "spam bot" in str(url_data):
-            raise ValueError("Redfin api error")
+    Street names are blocked by building number, so an address is only
+    compared with streets holding a parcel at the same number, and indexed
+    by character counts. The character counts give the difflib quick_ratio()
+    upper bound of every candidate in one vectorized step, and the exact
+    ratio() is only computed for candidates whose bound can still beat the
+    best match. Matches are the same top-1 result, cutoff and tie-breaking
+    as difflib get_close_matches() applied to the block.
+    """
 
-        # If API response is not blocked
-        redfin_dataframe = pd.read_csv(io.StringIO(url_data.decode('utf-8')))
-        if redfin_dataframe.empty:
-            raise OSError('The Redfin API page could not be ' +
-                          'reached. Please check that ' +
-                          'https://redfin.com is available')
-        return redfin_dataframe
+    def __init__(self, numbers, streets):
+        """ Indexes the street names of one zip code.
+
+        Args:
+            numbers(Series): Building number of each parcel.
+            streets(Series): Street name of each parcel.
+        """
+
+        blocks = (pd.DataFrame({'number': np.asarray(numbers, dtype=object),
+                                'street': np.asarray(streets, dtype=object)}).
+                  dropna().drop_duplicates())
+        street_ids, self._streets = pd.factorize(blocks['street'])
+        self._streets = self._streets.to_numpy(dtype=object)
+
+        # Count the characters of each street name
+        chars = np.frombuffer(''.join(self._streets).encode('utf-32-le'),
+                              dtype=np.uint32)
+        alphabet, cols = np.unique(chars, return_inverse=True)
+        self._alphabet = {chr(char): col for col, char in enumerate(alphabet)}
+        self._lengths = np.array([len(street) for street in self._streets],
+                                 dtype=np.int32)
+        self._counts = np.zeros((len(self._streets), len(alphabet)),
+                                dtype=np.int32)
+        np.add.at(self._counts,
+                  (np.repeat(np.arange(len(self._streets)), self._lengths),
+                   cols), 1)
+
+        # Block the street names by building number
+        positions = pd.Series(street_ids).groupby(
+            blocks['number'].values).indices
+        self._blocks = {number: street_ids[rows]
+                        for number, rows in positions.items()}
+
+    def match(self, numbers, streets, cutoff=0.6):
+        """ Returns the closest indexed street for each address.
+
+        Args:
+            numbers(Series): Building number of each address.
+            streets(Series): Street name of each address.
+            cutoff(float): Minimum similarity of a match in [0, 1].
+
+        Returns:
+            A numpy array of matched street names, None where no street
+            with the same building number is at least cutoff similar.
+        """
+
+        # Match each distinct address once
+        queries = list(zip(numbers, streets))
+        matched = {}
+        for number, street in queries:
+            if (number, street) not in matched:
+                matched[number, street] = self._match_one(number, street,
+                                                          cutoff)
+
+        return np.array([matched[query] for query in queries], dtype=object)
+
+    def _match_one(self, number, street, cutoff):
+        """ Returns the closest street in the block of one address."""
+
+        candidates = self._blocks.get(number)
+        if candidates is None or not isinstance(street, str):
+            return None
+
+        # Bound the similarity of every candidate by its shared characters
+        counts = np.zeros(len(self._alphabet), dtype=np.int32)
+        for char in street:
+            col = self._alphabet.get(char)
+            if col is not None:
+                counts[col] += 1
+        shared = np.minimum(self._counts[candidates], counts).sum(axis=1)
+        lengths = self._lengths[candidates] + len(street)
+        bounds = np.where(lengths > 0, 2.0 * shared / np.maximum(lengths, 1),
+                          1.0)
+
+        # Score candidates from the highest bound until none can do better
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(street)
+        best = None
+        for position in np.argsort(-bounds, kind='stable'):
+            if bounds[position] < cutoff or (best is not None and
+                                             bounds[position] < best[0]):
+                break
+            candidate = self._streets[candidates[position]]
+            matcher.set_seq1(candidate)
+            score = matcher.ratio()
+            if score >= cutoff and (best is None or
+                                    (score, candidate) > best):
+                best = (score, candidate)
+
+        return None if best is None else best[1]
+
+
+def _match_zip(temp_rf, temp_kc):
+    """ Fuzzy matches the Redfin and King County addresses of one zip code.
 
-    def get_from_file():
-        # Retreives Redfin data from local file
+    Args:
+        temp_rf(DataFrame): Unmatched Redfin listings of the zip code.
+        temp_kc(DataFrame): Unmatched King County parcels of the zip code.
 
-        file_path = redfin_path / "All_King_Redfin.csv"
+    Returns:
+        A dataframe of the matched listings with the columns of both.
+    """
 
-        return pd.read_csv(file_path)
+    temp_rf = temp_rf[temp_rf['ADDRESS'].notnull()].copy()
+    temp_kc = temp_kc[temp_kc['Situs Address'].notnull()].copy()
 
-    # Retreive Redfin data
-    try:
-        return get_from_api()
-    except ValueError:
-        return get_from_file()
+    # Extract building number and street info
+    temp_rf[['rf_num', 'rf_street']] = (temp_rf['ADDRESS'].astype(str).
+                                        str.extract(_address_parts_pattern))
+    temp_kc[['kc_num', 'kc_street']] = (temp_kc['Situs Address'].astype(str).
+                                        str.extract(_address_parts_pattern))
 
+    # Add in fuzzy match field
+    street_index = _StreetIndex(temp_kc['kc_num'], temp_kc['kc_street'])
+    temp_rf.loc[:, 'fuzzy_match'] = street_index.match(
+        temp_rf['rf_num'], temp_rf['rf_street'].astype(str))
+    temp_rf = temp_rf[temp_rf['fuzzy_match'].notnull()]
 
-def organize_county_data(df_sale, df_building, df_parcel, df_lookup,
-                         zip_code: list,
-                         start_year='2010', start_month='1', start_day='1',
-                         end_year='2020', end_month='1', end_day='1'):
-    """ Cleans and organizes data retrieved from King County Assessors website.
+    # Merge on building number and fuzzy match
+    temp_all = pd.merge(temp_kc,
+                        temp_rf,
+                        how='inner',
+                        left_on=['kc_num', 'kc_street'],
+                        right_on=['rf_num', 'fuzzy_match'])
+
+    # Drop cols
+    return temp_all.drop(['rf_num', 'rf_street',
+                          'fuzzy_match',
+                          'kc_num', 'kc_street'], axis=1)
 
-    Renames columns consistently, filters data using default and customizable
-    inputs, merges data to a single csv file.
+
+def _address_fingerprints(addresses, zip_codes):
+    """ Hashes normalized addresses together with their zip codes.
 
     Args:
-        df_sale(DataFrame): King County Assessor's sales data
-        df_building(DataFrame): King County Assessor's buildings data
-        df_parcel(DataFrame): King County Assessor's parcel data
-        df_lookup(DataFrame): King County Assessor's lookup data
-        zip_code(list): List of zip codes in the King County.
-        start_year(str): Include property sale data from this year.
-        start_month(str): Include property sale data from this month.
-        start_day(str): Include property sale data from this day.
-        end_year(str): Include property sale data to this year.
-        end_month(str): Include property sale data to this month.
-        end_day(str): Include property sale data to this day.
+        addresses(Series): Normalized street addresses.
+        zip_codes(Series): Zip codes of the addresses.
 
     Returns:
-        A Pandas dataframe containing all the data retrieved from
-        the King County Assessor's website, filtered and merged.
-
-    Raises:
-        ValueError: If passed zip code is not valid.
-        ValueError: If passed start_year is before the first record.
-        ValueError: If passed end_year is after the last record.
-        ValueError: If start date is after end date based on passed values.
+        A Series of 64-bit fingerprints aligned with addresses.
     """
-    #df_lookup_items = pd.read_csv('https://raw.githubusercontent.com/' +
-    #                              'chrico7/data515_project/' +
-    #                              'master/data/look_up_item.csv')
-    #df_col_names = pd.read_csv('https://raw.githubusercontent.com/' +
-    #                           'chrico7/data515_project/' +
-    #                           'master/data/column_names.csv')
-
-    df_lookup_items = pd.read_csv(data_path / 'look_up_item.csv')
-    df_col_names = pd.read_csv(data_path / 'column_names.csv')
 
-    df_sale.columns = (df_col_names[df_col_names['source'] == 'sale'].
-                       name.tolist())
-    df_building.columns = (df_col_names[df_col_names['source'] == 'building'].
-                           name.tolist())
-    df_parcel.columns = (df_col_names[df_col_names['source'] == 'parcel'].
-                         name.tolist())
-    df_lookup.columns = (df_col_names[df_col_names['source'] == 'lookup'].
-                         name.tolist())
+    zip_codes = pd.to_numeric(zip_codes, errors='coerce').astype('Int64')
+    return pd.util.hash_pandas_object(addresses.astype(str) + '|' +
+                                      zip_codes.astype(str), index=False)
 
-    df_lookup['Look Up Description'] = (df_lookup['Look Up Description'].
-                                        str.strip())
 
-    df_sale = df_sale[df_sale['Major'] != '      ']
-    df_sale = df_sale.astype({'Major': int, 'Minor': int})
-    # get valid zip codes in King County
-#    kc_zip_codes = df_building['Zip code'].dropna().unique()
-#    index = []
-#    for i in range(len(kc_zip_codes)):
-#        if type(kc_zip_codes[i]) == float:
-#            kc_zip_codes[i] = int(kc_zip_codes[i])
-#            kc_zip_codes[i] = str(kc_zip_codes[i])
-#
-#        if (kc_zip_codes[i][:2] != '98' or (len(kc_zip_codes[i]) != 5 and
-#                                            len(kc_zip_codes[i]) != 10)):
-#            index.append(i)
-#
-#    valid_zip = np.delete(kc_zip_codes, index)
-#
-#    for i in range(len(valid_zip)):
-#        if len(valid_zip[i]) == 10:
-#            valid_zip[i] = valid_zip[i][:5]
-#
-#    print(zip_code)
-    # check zip code(s)
-#    for code in zip_code:
-#        if code not in np.unique(valid_zip):
-#            raise ValueError('The zip code ' + str(code) +
-#                             ' you\'ve entered is not in King County')
-    # check dates
-    df_sale['Document Date'] = pd.to_datetime(df_sale['Document Date'])
-    start_date = start_year + '-' + start_month + '-' + start_day
-    end_date = end_year + '-' + end_month + '-' + end_day
+def _read_match_table(match_table):
+    """ Reads the stored MLS# matches, empty when there are none yet."""
 
-    begin_year = (df_sale.sort_values(['Document Date'], ascending=[True])
-                  ['Document Date'].iloc[0].year)
-    end_year = (df_sale.sort_values(['Document Date'], ascending=[True])
-                ['Document Date'].iloc[-1].year)
+    if Path(match_table).exists():
+        return pd.read_parquet(match_table)
 
-    if int(start_year) < int(begin_year):
-        raise ValueError('There is no record before year' + str(begin_year))
-    if int(start_year) > int(end_year):
-        raise ValueError('There is no record after year' + str(end_year))
-    if datetime.date(int(start_year), int(start_month), int(start_day)) > \
-            datetime.date(int(end_year), int(end_month), int(end_day)):
-        raise ValueError('Start date is after end date')
+    return pd.DataFrame({'MLS key': pd.Series(dtype=object),
+                         'Major': pd.Series(dtype=np.int64),
+                         'Minor': pd.Series(dtype=np.int64),
+                         'Listing fingerprint': pd.Series(dtype=np.uint64),
+                         'Parcel fingerprint': pd.Series(dtype=np.uint64)})
 
-    # clean up the data
-    df_building['Zip code'] = pd.to_numeric(df_building['Zip code'],
-                                            errors='coerce')
-    df_building = df_building.dropna(subset=['Zip code'])
-    df_building['Zip code'] = df_building['Zip code'].astype(int)
-    df_building['Zip code'] = df_building['Zip code'].astype(str)
 
-    # limit properties to only single family houses
-    df_parcel_sf = df_parcel.loc[df_parcel['Property Type'] == 'R']
-    df_parcel_sf = df_parcel_sf.drop(columns=['Property Type'])
-    df_sale_sf = df_sale.loc[df_sale['Property Type'] == 11]
-    df_building_sf = df_building.loc[df_building['Number Living Units'] == 1]
+def _write_match_table(match_table, stored, listings, matches):
+    """ Replaces the stored matches of the listings matched again.
 
-    # filter by a start date and end date
-    df_sale_sf_recent = df_sale_sf[df_sale_sf['Document Date'] >= start_date]
-    df_sale_sf_recent = df_sale_sf_recent[df_sale_sf_recent['Document Date']
-                                          <= end_date]
-    # filter by zip
-    #print(zip_code)
-    df_building_sf_zip = df_building_sf[df_building_sf['Zip code'].isin(zip_code)]
-    #print(df_building_sf['Zip code'].value_counts())
-    #print(df_building_sf_zip['Zip code'].value_counts())
-    # combine data into a single frame
-    new_df = pd.merge(df_building_sf_zip, df_parcel_sf,
-                      how='left',
-                      left_on=['Major', 'Minor'],
-                      right_on=['Major', 'Minor'])
-    df_all = pd.merge(new_df, df_sale_sf_recent,
-                      how='left',
-                      left_on=['Major', 'Minor'],
-                      right_on=['Major', 'Minor'])
-    # replace numerical codes in records to readable descriptions
-    for col in df_all.columns:
-        if col in df_lookup_items['Field Name'].tolist():
-            look_up_type = int(df_lookup_items.loc[df_lookup_items['Field Name']
-                                                   == col]['Look Up'])
-            look_up_items = df_lookup.loc[df_lookup['Look Up Type']
-                                          == look_up_type]
-
-            description_list = []
-            for i in range(len(df_all[col])):
-                num = df_all[col].iloc[i]
-                description = (look_up_items.loc[look_up_items['Look Up Item']
-                                                 == num]['Look Up Description'])
-                if len(description) == 0:
-                    description_list.append('nan')
-                else:
-                    description_list.append(description.values[0])
-            df_all[col] = description_list
-    return df_all
+    Stored matches are kept for listings absent from this join, and for
+    listings present with the same address. Listings with a new address
+    lose their stored match and take the new ones from matches, if any.
 
+    Args:
+        match_table(str or Path): Parquet file of the stored matches.
+        stored(DataFrame): Matches read from match_table.
+        listings(DataFrame): MLS key and Listing fingerprint of every
+            listing in the join.
+        matches(DataFrame): New exact and fuzzy matches.
+    """
 
-def join_county_redfin(kc_data, redfin_data):
+    matches = pd.DataFrame({
+        'MLS key': matches['MLS#'].astype(str),
+        'Major': matches['Major'].astype(np.int64),
+        'Minor': matches['Minor'].astype(np.int64),
+        'Listing fingerprint': _address_fingerprints(
+            matches['ADDRESS'], matches['ZIP OR POSTAL CODE']),
+        'Parcel fingerprint': _address_fingerprints(
+            matches['Situs Address'], matches['Zip code'])})
+
+    # Drop stored matches of listings with new matches or a new address
+    keys = ['MLS key', 'Listing fingerprint']
+    moved = (stored['MLS key'].isin(listings['MLS key']) &
+             ~pd.MultiIndex.from_frame(stored[keys]).isin(
+                 pd.MultiIndex.from_frame(listings[keys])))
+    stored = stored[~moved & ~stored['MLS key'].isin(matches['MLS key'])]
+
+    # Write to a temporary file first so readers never see a partial table
+    match_table = Path(match_table)
+    match_table.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = match_table.with_name(match_table.name + '.tmp')
+    (pd.concat([stored, matches], ignore_index=True).drop_duplicates().
+     to_parquet(temp_path, index=False))
+    temp_path.replace(match_table)
+
+
+@_traced
+def join_county_redfin(kc_data, redfin_data, n_jobs=1, match_table=None):
     """ Joins King County and Redfin data frames based on address mapping.
     Joins the passed dataframes kc_data and redfin_data (representing King
     County and Redfin data respectively) using the pandas merge() function
-    and address matching with the difflib get_close_matches() function.
+    and fuzzy address matching of the street name among parcels with the
+    same building number and zip code.
     King County data must contain Major, Minor, Situs Address, and Zip code
     fields. Redfin data must contain MLS#, ADDRESS, and ZIP OR POSTAL CODE
     fields.
@@ -366,13 +2272,22 @@ def join_county_redfin(kc_data, redfin_data):
                  Must contain Major, Minor, Situs Address, and Zip code fields.
         redfin_data: Dataframe from the Redfin website API.
                      Must contain MLS#, ADDRESS, and ZIP OR POSTAL CODE fields.
+        n_jobs(int): Number of processes fuzzy matching zip codes in
+                     parallel. -1 uses every CPU. Defaults to 1, matching
+                     in this process.
+        match_table(str or Path): Parquet file keeping the MLS# to Major
+                     and Minor matches between calls. Listings whose
+                     normalized address and matched parcel's address are
+                     unchanged reuse their stored match, and only new or
+                     changed listings are matched. Defaults to matching
+                     every listing.
 
     Returns:
         A pandas dataframe containing all fields of both the input kc_data and
         redfin_data dataframes. Data frames are joined on the respective
         address fields with a direct match, or for those without an exact
-        match, a fuzzy match as defined by the difflib get_close_matches()
-        function.
+        match, the closest street name with the same building number as
+        scored by difflib with a cutoff of 0.6.
 
     Raises:
         ValueError: If passed kc_data is not of type dataframe
@@ -381,6 +2296,7 @@ def join_county_redfin(kc_data, redfin_data):
         ValueError: If passed redfin_data is empty
         KeyError: If passed kc_data is missing required columns
         KeyError: If passed redfin_data is missing required columns
+        ValueError: If passed n_jobs is not a positive integer or -1
     """
 
     # Initialize dataframe
@@ -410,53 +2326,64 @@ def join_county_redfin(kc_data, redfin_data):
         raise KeyError('Passed redfin_data does not contain required' +
                        ' columns: Major, Minor, Situs Address, and Zip code')
 
+    # check number of processes
+    if not isinstance(n_jobs, int) or not (n_jobs > 0 or n_jobs == -1):
+        raise ValueError('Passed n_jobs must be a positive integer or -1' +
+                         f' not {n_jobs}')
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+
     # Format data
 
     # Extract relevant columns
     kc_trim = kc_data[kc_cols].drop_duplicates()
     redfin_trim = redfin_data[redfin_cols].drop_duplicates()
 
-    # Extract list of unique zip_codes
+    # Convert zip codes to integers
     kc_trim.loc[:, 'Zip code'] = (pd.to_numeric(kc_trim['Zip code'].
                                                 fillna('0').astype(str).
                                                 str[:5],
                                                 errors='coerce').
                                   fillna('0').astype(int))
-    zip_codes = (kc_trim.loc[(kc_trim['Zip code'] != 0) &
-                             (kc_trim['Zip code'].astype(str).str.len() == 5) &
-                             (kc_trim['Zip code'].astype(str).
-                              str.contains('^9')),
-                             'Zip code'].
-                 drop_duplicates().reset_index(drop=True))
-
-    # Replace zip code in Situs Address field
-    kc_trim.loc[:, 'Situs Address'] = (kc_trim['Situs Address'].
-                                       str.replace('|'.join(zip_codes.
-                                                            astype(str).
-                                                            to_list()), '')
-                                       .str.strip())
-
-    # Trim spaces from Situs Address field
-    kc_trim.loc[:, 'Situs Address'] = (kc_trim['Situs Address'].
-                                       str.split().str.join(' '))
-
-    # Set both address fields to lowercase
-    kc_trim.loc[:, 'Situs Address'] = kc_trim['Situs Address'].str.lower()
-    redfin_trim.loc[:, 'ADDRESS'] = redfin_trim['ADDRESS'].str.lower()
-
-    # Drop unit IDs from redfin data address field and insert into position 2
-    redfin_trim.loc[:, 'ADDRESS'] = (redfin_trim['ADDRESS'].
-                                     where(~(redfin_trim['ADDRESS'].
-                                             str.contains('unit', na=False)),
-                                           redfin_trim['ADDRESS'].
-                                           str.split('unit', 1).str[0]))
+
+    # Normalize both address fields, dropping zip codes and unit IDs
+    with _stage('normalize addresses', len(kc_trim) + len(redfin_trim)):
+        kc_trim.loc[:, 'Situs Address'] = _normalize_addresses(
+            kc_trim['Situs Address'])
+        redfin_trim.loc[:, 'ADDRESS'] = _normalize_addresses(
+            redfin_trim['ADDRESS'])
+
+    # Reuse stored matches of listings and parcels with unchanged addresses
+    matches_stored = pd.DataFrame(columns=['MLS#', 'Major', 'Minor'])
+    if match_table is not None:
+        stored = _read_match_table(match_table)
+        listings = pd.DataFrame({
+            'MLS#': redfin_trim['MLS#'],
+            'MLS key': redfin_trim['MLS#'].astype(str),
+            'Listing fingerprint': _address_fingerprints(
+                redfin_trim['ADDRESS'], redfin_trim['ZIP OR POSTAL CODE'])})
+        parcels = pd.DataFrame({
+            'Major': kc_trim['Major'],
+            'Minor': kc_trim['Minor'],
+            'Parcel fingerprint': _address_fingerprints(
+                kc_trim['Situs Address'], kc_trim['Zip code'])})
+        matches_stored = (stored.
+                          merge(listings, on=['MLS key',
+                                              'Listing fingerprint']).
+                          merge(parcels, on=['Major', 'Minor',
+                                             'Parcel fingerprint']))
+        matches_stored = matches_stored[['MLS#', 'Major', 'Minor']]
+        redfin_trim = redfin_trim[~redfin_trim['MLS#'].
+                                  isin(matches_stored['MLS#'])]
 
     # Join data on exact address matches
-    matches_exact = pd.merge(redfin_trim,
-                             kc_trim,
-                             how='outer',
-                             left_on='ADDRESS',
-                             right_on='Situs Address')
+    with _stage('exact match', len(kc_trim) + len(redfin_trim)) as record:
+        matches_exact = pd.merge(redfin_trim,
+                                 kc_trim,
+                                 how='outer',
+                                 left_on='ADDRESS',
+                                 right_on='Situs Address')
+        record['rows_out'] = len(matches_exact)
 
     # Extract sectors left to match
     redfin_tbd = matches_exact.loc[matches_exact['Situs Address'].isnull(),
@@ -473,72 +2400,177 @@ def join_county_redfin(kc_data, redfin_data):
                                    isnull())].drop_duplicates()
 
     # Get fuzzy match on address for each zip code
-    matches_fuzzy = pd.DataFrame()
-    for zip_code in redfin_tbd['ZIP OR POSTAL CODE'].drop_duplicates():
-
-        # Extract subsets with common zip
-        temp_rf = redfin_tbd[redfin_tbd['ZIP OR POSTAL CODE'] ==
-                             zip_code].copy()
-        temp_kc = kc_tbd[kc_tbd['Zip code'] == zip_code].copy()
-
-        # Extract building number
-        temp_rf.loc[:, 'rf_num'] = (temp_rf['ADDRESS'].str.split(' ', 1).
-                                    str[0].str.strip())
-        temp_kc.loc[:, 'kc_num'] = (temp_kc['Situs Address'].str.split(' ', 1).
-                                    str[0].str.strip())
-
-        # Extract street info
-        temp_rf.loc[:, 'rf_street'] = (temp_rf['ADDRESS'].str.split(' ', 1).
-                                       str[1].str.strip())
-        temp_kc.loc[:, 'kc_street'] = (temp_kc['Situs Address'].
-                                       str.split(' ', 1).
-                                       str[1].str.strip())
-
-        # Add in fuzzy match field
-        match_list = temp_kc['kc_street'].drop_duplicates()
-        temp_rf.loc[:, 'fuzzy_match'] = (temp_rf['rf_street']
-                                         .map(lambda x:
-                                              difflib.get_close_matches(str(x),
-                                                                        match_list,
-                                                                        n=1,
-                                                                        cutoff=0.6))).str.join(',')
-
-        # Merge on building number and fuzzy match
-        temp_all = pd.merge(temp_kc,
-                            temp_rf,
-                            how='inner',
-                            left_on=['kc_num', 'kc_street'],
-                            right_on=['rf_num', 'fuzzy_match'])
-
-        # Drop cols
-        temp_all = temp_all.drop(['rf_num', 'rf_street',
-                                  'fuzzy_match',
-                                  'kc_num', 'kc_street'], axis=1)
-
-        # Append to frame
-        matches_fuzzy = matches_fuzzy.append(temp_all)
+    kc_by_zip = dict(list(kc_tbd.groupby('Zip code', sort=False)))
+    subsets = [(temp_rf, kc_by_zip[zip_code]) for zip_code, temp_rf in
+               redfin_tbd.groupby('ZIP OR POSTAL CODE', sort=False)
+               if zip_code in kc_by_zip]
+
+    with _stage('fuzzy match', _count_rows(subsets)) as fuzzy_record:
+        if n_jobs == 1 or len(subsets) < 2:
+            matches_fuzzy = []
+            for temp_rf, temp_kc in subsets:
+                with _stage('zip ' + str(int(temp_kc['Zip code'].iloc[0])),
+                            len(temp_rf) + len(temp_kc)) as record:
+                    matches_fuzzy.append(_match_zip(temp_rf, temp_kc))
+                    record['rows_out'] = len(matches_fuzzy[-1])
+        else:
+            # Submit the largest zips first so no worker is left with one
+            # at the end, and gather the results in zip code order
+            order = sorted(range(len(subsets)), reverse=True,
+                           key=lambda i: (len(subsets[i][0]) *
+                                          len(subsets[i][1])))
+            with ProcessPoolExecutor(max_workers=min(n_jobs,
+                                                     len(subsets))) \
+                    as executor:
+                matched = dict(zip(order, executor.map(
+                    _match_zip, *zip(*[subsets[i] for i in order]))))
+            matches_fuzzy = [matched[i] for i in range(len(subsets))]
+        fuzzy_record['rows_out'] = _count_rows(matches_fuzzy)
 
     # Combine matches
-    matches_all = pd.concat([matches_exact, matches_fuzzy])
+    matches_all = pd.concat([matches_exact] + matches_fuzzy)
+
+    # Store the new matches
+    if match_table is not None:
+        _write_match_table(match_table, stored, listings, matches_all)
 
     # Extract join fields
-    match_fields = (matches_all[['MLS#', 'Major', 'Minor']].
+    match_fields = (pd.concat([matches_stored,
+                               matches_all[['MLS#', 'Major', 'Minor']]]).
                     drop_duplicates())
 
     # Join kc and redfin data
-    data_final = pd.merge(kc_data,
-                          match_fields,
-                          how='left', on=['Major', 'Minor'])
+    with _stage('merge', len(kc_data) + len(redfin_data)) as record:
+        data_final = pd.merge(kc_data,
+                              match_fields,
+                              how='left', on=['Major', 'Minor'])
 
-    data_final = pd.merge(data_final,
-                          redfin_data,
-                          how='left', on=['MLS#'])
+        data_final = pd.merge(data_final,
+                              redfin_data,
+                              how='left', on=['MLS#'])
+        record['rows_out'] = len(data_final)
 
     return data_final
 
 
+@functools.lru_cache(maxsize=None)
+def get_zip_boundaries():
+    """ Retrieves the King County zip code boundaries.
+
+    Downloads the zip code GeoJSON from zip_boundaries_url once and keeps
+    it in a local binary cache in kc_path. Boundaries are parsed once per
+    process and the same objects are returned on every later call, so
+    they should not be modified.
+
+    Returns:
+        A tuple of a GeoDataFrame with one row per zip code and the raw
+        GeoJSON dictionary.
+
+    Raises:
+        OSError: If the boundaries are not cached and the URL is unable to
+            be reached.
+    """
+    import geopandas as gpd
+
+    cache_file = kc_path / 'zip_boundaries.pkl'
+
+    # Read the local cache
+    if cache_file.exists():
+        with open(cache_file, 'rb') as boundaries_file:
+            return pickle.load(boundaries_file)
+
+    # Download and parse the boundaries
+    with urllib.request.urlopen(zip_boundaries_url) as url:
+        data = json.loads(url.read().decode())
+    df_zip_shape = gpd.GeoDataFrame.from_features(data['features'],
+                                                  crs='epsg:4326')
+
+    kc_path.mkdir(parents=True, exist_ok=True)
+    with open(cache_file, 'wb') as boundaries_file:
+        pickle.dump((df_zip_shape, data), boundaries_file)
+
+    return df_zip_shape, data
+
+
+def get_zip_geojson(zip_codes=None, zoom=9, df_zip_shape=None):
+    """ Returns zip code boundaries simplified for a map zoom.
+
+    Boundaries are simplified for each zoom in zip_geometry_zooms, once,
+    to half a pixel at that zoom, and the coarsest level at least as fine
+    as zoom is used; beyond the finest level, boundaries are returned at
+    full resolution. The zip codes are simplified as a coverage, so
+    neighbouring zip codes keep their shared borders without gaps or
+    overlaps. Only the ZIP property is kept, and coordinates are rounded
+    to the precision of the level.
+
+    Args:
+        zip_codes(list): Zip codes to keep. Defaults to every zip code.
+        zoom(float): Zoom of the map, as passed to Plotly.
+        df_zip_shape(GeoDataFrame): Zip code polygons with a ZIP column.
+            Defaults to the polygons from get_zip_boundaries().
+
+    Returns:
+        A GeoJSON dictionary of the zip codes, whose features are keyed
+        by properties.ZIP.
+    """
+
+    levels = [level for level in zip_geometry_zooms if level >= zoom]
+    level = min(levels) if levels else None
+
+    if df_zip_shape is None:
+        df_zip_shape = _simplified_zip_boundaries(level)
+    else:
+        df_zip_shape = _simplify_zip_boundaries(df_zip_shape, level)
+
+    if zip_codes is not None:
+        zip_codes = pd.to_numeric(pd.Series(zip_codes), errors='coerce')
+        df_zip_shape = df_zip_shape[pd.to_numeric(df_zip_shape['ZIP'],
+                                                  errors='coerce').
+                                    isin(zip_codes)]
+
+    return df_zip_shape.__geo_interface__
+
+
+@functools.lru_cache(maxsize=None)
+def _simplified_zip_boundaries(level):
+    """ Returns get_zip_boundaries() simplified for a zoom level."""
+
+    return _simplify_zip_boundaries(get_zip_boundaries()[0], level)
+
+
+def _simplify_zip_boundaries(df_zip_shape, level):
+    """ Simplifies zip code polygons to half a pixel at a zoom level.
+
+    Args:
+        df_zip_shape(GeoDataFrame): Zip code polygons with a ZIP column.
+        level(int): Zoom level, None to keep full resolution.
+
+    Returns:
+        A GeoDataFrame of the ZIP and geometry columns.
+    """
+    import shapely
+
+    df_zip_shape = df_zip_shape[['ZIP', 'geometry']].copy()
+    if level is None:
+        return df_zip_shape
+
+    # A 256 pixel tile spans 360 degrees of longitude at zoom 0
+    tolerance = 360 / (256 * 2 ** level) / 2
+    geometry = df_zip_shape.geometry.to_numpy()
+    if hasattr(shapely, 'coverage_simplify'):
+        geometry = shapely.coverage_simplify(geometry, tolerance)
+    else:
+        geometry = shapely.simplify(geometry, tolerance,
+                                    preserve_topology=True)
+
+    decimals = int(np.ceil(-np.log10(tolerance))) + 1
+    df_zip_shape.geometry = shapely.transform(
+        geometry, lambda coords: np.round(coords, decimals))
+    return df_zip_shape
+
+
 #Generate visualizations from resulting dataframes, aggregating for easy charting
-def view_redfin_data_by_agg(input_dataframe, aggreg_meth):
+def view_redfin_data_by_agg(input_dataframe, aggreg_meth, show=True):
     """ Visualizes all Redfin Data currently availabe in a Plotly
         visualization.
 
@@ -547,23 +2579,27 @@ def view_redfin_data_by_agg(input_dataframe, aggreg_meth):
         aggreg_meth: A string that represents the column name which we will be the
         column which aggregations are done on. Possible values: 'SQUARE FEET',
         'PRICE', 'DAYS ON MARKET', 'LOT SIZE'
+        show: whether to display the figure, False to return it instead, e.g.
+        for write_figure_bundle()
 
     Returns:
-        A Plotly Figure
+        A Plotly Figure if show is False, otherwise None so notebooks do not
+        display the figure twice
 
     Raises:
         KeyError: If passed aggreg_meth value is not correct
     """
+    import plotly.express as px
+
     possible_vals = ['SQUARE FEET', 'PRICE', 'DAYS ON MARKET', 'LOT SIZE']
     if aggreg_meth not in possible_vals:
         raise KeyError("Passed in aggregation is not correct. Please pass correct value.")
     else:
         data_rf = input_dataframe.loc[input_dataframe['SALE TYPE'] == 'MLS Listing']
-        with urllib.request.urlopen("https://opendata.arcgis.com/datasets/06da0f67fc1948e3aae93063750ad02b_790.geojson") as url:
-            data = json.loads(url.read().decode())
         df = data_rf
         small = df[['ZIP OR POSTAL CODE', aggreg_meth]]
         df_new = pd.DataFrame(small.groupby(['ZIP OR POSTAL CODE']).mean()).reset_index()
+        data = get_zip_geojson(df_new['ZIP OR POSTAL CODE'], zoom=9)
         fig = px.choropleth_mapbox(df_new, geojson=data, locations='ZIP OR POSTAL CODE',
                                    color=aggreg_meth,
                                    featureidkey='properties.ZIP',
@@ -574,11 +2610,12 @@ def view_redfin_data_by_agg(input_dataframe, aggreg_meth):
                                    labels={aggreg_meth:aggreg_meth}
                                   )
         fig.update_layout(margin={"r":0, "t":0, "l":0, "b":0})
-        fig.show()
-def aggregate_by_zip_spacial(input_dataframe=
-                             pd.read_csv(examples_path /
-                                         "sample_data_98075_2018-19.csv",
-                                         low_memory=False)):
+        if show:
+            fig.show()
+            return None
+        return fig
+@_traced
+def aggregate_by_zip_spacial(input_dataframe=None, zip_locator=None, cube=None):
     """
     Aggregates a joined input dataframe by date to allow easy graphing of trends
 
@@ -587,12 +2624,31 @@ def aggregate_by_zip_spacial(input_dataframe=
         the local join_county_redfin() function. If no input is provided, then the
         default example dataframe is used.
 
+        zip_locator: a ZipLocator used to place listings within zip code boundaries.
+        If no locator is provided, one shared locator over get_zip_boundaries() is used.
+
+        cube: optional MarketCube to read the aggregates from instead. Listings are
+        then located as when the cube was built.
+
     Returns:
         A Pandas dataframe aggregating key columns of interest within the dataframe.
 
     Raises:
         KeyError: If passed input_dataframe is missing required columns
     """
+    if zip_locator is None:
+        zip_locator = _default_zip_locator()
+
+    #pull in King County zip shapefiles and pare down to geometry and zip
+    df_zip_shape = zip_locator.df_zip_shape[['ZIP', 'geometry']]
+
+    if cube is not None:
+        input_dataframe = cube.by_zip()
+        input_dataframe['Zip code'] = input_dataframe['Zip code'].astype('int64')
+        return df_zip_shape.merge(input_dataframe, left_on='ZIP', right_on='Zip code')
+    if input_dataframe is None:
+        input_dataframe = _sample_data()
+
     # defined required columns for aggregation
     required_cols = ['Document Date', 'LONGITUDE', 'LATITUDE', 'PRICE',
                      'DAYS ON MARKET', 'SQUARE FEET', '$/SQUARE FEET']
@@ -606,36 +2662,117 @@ def aggregate_by_zip_spacial(input_dataframe=
     #convert kc date column to dates
     input_dataframe['Document Date'] = input_dataframe['Document Date'].astype('datetime64[ns]')
 
-    #convert to geodataframe for easy merging
-    input_dataframe = gpd.GeoDataFrame(input_dataframe,
-                                       crs="epsg:4326",
-                                       geometry=gpd.points_from_xy(input_dataframe['LONGITUDE'],
-                                                                   input_dataframe['LATITUDE']))
-
-    #pull in King County zip shapefiles and pare down to geometry and zip
-    df_zip_shape = gpd.read_file(
-        "https://opendata.arcgis.com/datasets/06da0f67fc1948e3aae93063750ad02b_790.geojson")
-    df_zip_shape = df_zip_shape[['ZIP', 'geometry']]
+    #keep listings located within a King County zip code
+    with _stage('locate', len(input_dataframe)) as record:
+        located = zip_locator.locate(input_dataframe['LATITUDE'],
+                                     input_dataframe['LONGITUDE'])
+        input_dataframe = input_dataframe[~np.isnan(located)]
+        record['rows_out'] = len(input_dataframe)
 
     #aggregate meaningful redfin variables
-    input_dataframe = gpd.sjoin(df_zip_shape,
-                                input_dataframe).groupby("Zip code").agg({'PRICE':'mean',
-                                                                          'DAYS ON MARKET':'mean',
-                                                                          'SQUARE FEET':'mean',
-                                                                          '$/SQUARE FEET':'mean'})
+    grouped = input_dataframe.groupby("Zip code")
+    input_dataframe = grouped.agg({'PRICE':'mean',
+                                   'DAYS ON MARKET':'mean',
+                                   'SQUARE FEET':'mean',
+                                   '$/SQUARE FEET':'mean'})
 
     #rename columns to reflect aggregation
     input_dataframe.columns = ['Mean sale price',
                                'Mean days on market',
                                'Mean size (square feet)',
                                'Mean cost per sqft']
+
+    #add median and 90th percentile listing prices
+    for quantile in (0.5, 0.9):
+        input_dataframe[_quantile_name(quantile)] = (
+            grouped['PRICE'].quantile(quantile).astype(float))
     #convert zip code column to int
     input_dataframe = input_dataframe.reset_index()
     input_dataframe['Zip code'] = input_dataframe['Zip code'].astype('int64')
     merged_df = df_zip_shape.merge(input_dataframe, left_on='ZIP', right_on='Zip code')
     return merged_df
 
-def zipcode_choro(opening_data=aggregate_by_zip_spacial(), mapping_var='Mean sale price'):
+class ZipLocator:
+    """ Assigns King County zip codes to coordinates.
+
+    Builds a spatial index over the zip code polygons once, with prepared
+    geometries, and assigns zip codes to whole arrays of coordinates in a
+    single vectorized query. Assignments are memoized per coordinate, so
+    points seen before are not queried again.
+
+    Attributes:
+        df_zip_shape: GeoDataFrame of the zip code polygons.
+    """
+
+    def __init__(self, df_zip_shape=None):
+        """ Indexes the zip code polygons.
+
+        Args:
+            df_zip_shape(GeoDataFrame): Zip code polygons with a ZIP column.
+                Defaults to the polygons from get_zip_boundaries().
+        """
+        import shapely
+
+        if df_zip_shape is None:
+            df_zip_shape = get_zip_boundaries()[0]
+
+        self.df_zip_shape = df_zip_shape
+        self._zip_codes = df_zip_shape['ZIP'].to_numpy(dtype=float)
+        self._polygons = np.asarray(df_zip_shape.geometry.values, dtype=object)
+        shapely.prepare(self._polygons)
+        self._tree = shapely.STRtree(self._polygons)
+        self._assigned = pd.Series(dtype=float)
+
+    def locate(self, latitude, longitude):
+        """ Returns the zip code containing each coordinate.
+
+        Args:
+            latitude(array): Latitudes of the points.
+            longitude(array): Longitudes of the points.
+
+        Returns:
+            A numpy array of zip codes, NaN where a point is missing or
+            falls outside every zip code.
+        """
+        import shapely
+
+        latitude = np.asarray(latitude, dtype=float)
+        longitude = np.asarray(longitude, dtype=float)
+        valid = ~(np.isnan(latitude) | np.isnan(longitude))
+
+        # Key each coordinate by its position to 1e-7 degrees
+        keys = ((np.round(latitude[valid] * 1e7).astype(np.int64) << 32) |
+                (np.round(longitude[valid] * 1e7).astype(np.int64) &
+                 0xFFFFFFFF))
+
+        # Query the index for coordinates not seen before
+        keys_new, first = np.unique(keys, return_index=True)
+        is_new = ~pd.Index(keys_new).isin(self._assigned.index)
+        if is_new.any():
+            first = np.flatnonzero(valid)[first[is_new]]
+            points = shapely.points(longitude[first], latitude[first])
+            point_idx, zip_idx = self._tree.query(points)
+            hits = shapely.intersects(self._polygons[zip_idx], points[point_idx])
+
+            # Points on a shared border keep their first zip code
+            zip_codes = np.full(len(points), np.nan)
+            zip_codes[point_idx[hits][::-1]] = self._zip_codes[zip_idx[hits]][::-1]
+            self._assigned = pd.concat([self._assigned,
+                                        pd.Series(zip_codes, index=keys_new[is_new])])
+
+        located = np.full(len(latitude), np.nan)
+        located[valid] = self._assigned.reindex(keys).to_numpy()
+        return located
+
+
+@functools.lru_cache(maxsize=None)
+def _default_zip_locator():
+    """ Returns the ZipLocator shared by the aggregation functions."""
+
+    return ZipLocator()
+
+
+def zipcode_choro(opening_data=None, mapping_var='Mean sale price'):
     """
     Creates a simple zipcode choropleth map for the variable of interest
 
@@ -655,6 +2792,9 @@ def zipcode_choro(opening_data=aggregate_by_zip_spacial(), mapping_var='Mean sal
         ValueError: If passed mapping_var is not a column within input_dataframe.
         ValueError: If passed input_dataframe does not have 2 or more zipcodes to map
     """
+    if opening_data is None:
+        opening_data = aggregate_by_zip_spacial()
+
     # check that mapping_var is within input_dataframe
     if mapping_var not in opening_data.columns:
         raise ValueError('The mapping variable that you\'ve entered is not valid. ' +
@@ -667,14 +2807,11 @@ def zipcode_choro(opening_data=aggregate_by_zip_spacial(), mapping_var='Mean sal
                          ' expand the dataframe to produce a meaningful map.')
 
     #create a basic matplotlib figure
-    ch_fig, ch_ax = plt.subplots(1)
-    opening_data.plot(column=mapping_var, ax=ch_ax, linewidth=0.5, edgecolor='0.5',
-                      legend=True)
-    ch_ax.set_axis_off()
-    plt.axis('equal')
-    plt.title(mapping_var)
-    plt.savefig(output_path / 'zipcode_choro_output.png')
-def zip_code_agg_plotly(input_dataframe, aggreg_meth):
+    _render_chart_chunk([(opening_data, mapping_var, mapping_var,
+                          output_path / 'zipcode_choro_output.png')])
+
+
+def zip_code_agg_plotly(input_dataframe, aggreg_meth, cube=None, show=True):
     """
     Creates Plot.ly map for the variable of interest
 
@@ -686,22 +2823,33 @@ def zip_code_agg_plotly(input_dataframe, aggreg_meth):
         aggreg_meth: a string identifying the variable to be mapped; must be a column name
         within input_dataframe.
 
+        cube: optional MarketCube whose zip code aggregates, as from
+        aggregate_by_zip_spacial, are mapped instead of input_dataframe.
+
+        show: whether to display the figure, False to return it instead, e.g.
+        for write_figure_bundle()
+
     Returns:
         A Plot.ly Figure of the data by Zip Code with color corresponding to aggregation value
+        if show is False, otherwise None so notebooks do not display the figure twice
 
     Raises:
         ValueError: If passed mapping_var is not a column within input_dataframe.
     """
+    import plotly.express as px
+
+    if cube is not None:
+        input_dataframe = cube.by_zip()
+
     if aggreg_meth not in input_dataframe.columns:
         raise ValueError('The aggregation variable that you\'ve entered is not valid. ' +
                          'Please select a column from your input dataframe (below)' +
                          'or select a new input dataframe.')
     else:
-        with urllib.request.urlopen("https://opendata.arcgis.com/datasets/06da0f67fc1948e3aae93063750ad02b_790.geojson") as url:
-            data = json.loads(url.read().decode())
         df = input_dataframe
         small = df[['Zip code', aggreg_meth]]
         df_new = pd.DataFrame(small.groupby(['Zip code']).mean()).reset_index()
+        data = get_zip_geojson(df_new['Zip code'], zoom=9)
         fig = px.choropleth_mapbox(df_new, geojson=data, locations='Zip code',
                                    color=aggreg_meth,
                                    featureidkey='properties.ZIP',
@@ -712,16 +2860,21 @@ def zip_code_agg_plotly(input_dataframe, aggreg_meth):
                                    labels={aggreg_meth:aggreg_meth}
                                   )
         fig.update_layout(margin={"r":0, "t":0, "l":0, "b":0})
-        fig.show()
-def aggregate_by_date(input_dataframe=pd.read_csv(examples_path /
-                                                  "sample_data_98075_2018-19.csv",
-                                                  low_memory=False)):
+        if show:
+            fig.show()
+            return None
+        return fig
+@_traced
+def aggregate_by_date(input_dataframe=None, cube=None):
     """
     Aggregates a joined input dataframe by date to allow easy graphing of trends
 
     Args:
         input_dataframe: an input dataframe of a format consistent with the output of [func].
         If no input is provided, the default example dataframe is used
+
+        cube: optional MarketCube to read the aggregates from instead, per period
+        of the cube
     Returns:
         A Pandas dataframe aggregating key columns [ ]
     Raises:
@@ -730,22 +2883,812 @@ def aggregate_by_date(input_dataframe=pd.read_csv(examples_path /
         ValueError: If passed num_rows is not a positive integer.
         OSError: If a connection to the URL is unable to be established.
     """
+    if cube is not None:
+        return cube.by_date()
+    if input_dataframe is None:
+        input_dataframe = _sample_data()
+
     #convert county transaction date to datetime format
     input_dataframe['Document Date'] = input_dataframe['Document Date'].astype('datetime64[ns]')
 
     #aggregate key variables in dataframe by date
-    input_aggregate = input_dataframe.groupby(["Document Date"]).agg(
+    grouped = input_dataframe.groupby(["Document Date"])
+    input_aggregate = grouped.agg(
         {'Sale Price':'mean',
          'Excise Tax Number':'nunique'})
 
     #rename columns to reflect aggregation
     input_aggregate.columns = ['Mean sale price', 'Number of transactions']
 
+    #add median and 90th percentile sale prices
+    for quantile in (0.5, 0.9):
+        input_aggregate[_quantile_name(quantile)] = (
+            grouped['Sale Price'].quantile(quantile).astype(float))
+
     #remove any miscodes (some dates in 2070)
     input_aggregate = input_aggregate[input_aggregate.index < datetime.datetime.now()]
     return input_aggregate
 
-def trend_plot(input_dataframe=aggregate_by_date(), trend_variable='Mean sale price'):
+
+class PeriodAggregate:
+    """ Aggregates sales by week, month or quarter and zip code.
+
+    Resamples the sales of a joined dataframe to periods of freq, per zip
+    code or county wide, with the number of transactions, the total and
+    the mean sale price of each period. With a window, each period also
+    gets the rolling mean and quantiles of the sale prices of the window
+    periods ending with it. Rolling means take O(n) from cumulative sums,
+    and rolling quantiles O(n log w) from one pass of a sorted window.
+
+    New sales are added with append(), which only recomputes the periods
+    whose windows hold a new sale, so aggregates of long histories are
+    kept up to date without starting over.
+
+    Attributes:
+        freq: Pandas frequency of the periods, 'W', 'M' or 'Q'.
+        by_zip: Whether sales are aggregated per zip code.
+        window: Number of periods of the rolling windows, None for none.
+        quantiles: Quantiles of the rolling windows.
+        table: Pandas dataframe of the aggregates, indexed by Zip code, if
+            by_zip, and the start of each period with sales, under
+            'Document Date'.
+    """
+
+    @_traced
+    def __init__(self, input_dataframe=None, freq='M', by_zip=True,
+                 window=None, quantiles=(0.5,)):
+        """ Aggregates the sales of a joined dataframe.
+
+        Args:
+            input_dataframe(DataFrame): Joined data with Document Date,
+                Sale Price and Zip code columns, and optionally Excise Tax
+                Number to count each sale once. Defaults to the example
+                dataframe.
+            freq(str): Pandas frequency of the periods, 'W', 'M' or 'Q'.
+            by_zip(bool): Whether to aggregate per zip code.
+            window(int): Number of periods of the rolling windows. Defaults
+                to no rolling statistics.
+            quantiles(tuple): Quantiles of the rolling windows, in [0, 1].
+
+        Raises:
+            KeyError: If passed input_dataframe is missing required columns
+            ValueError: If passed window is not a positive integer
+            ValueError: If passed quantiles are not within [0, 1]
+        """
+
+        if input_dataframe is None:
+            input_dataframe = _sample_data()
+
+        if window is not None and (not isinstance(window, int) or
+                                   window < 1):
+            raise ValueError('Passed window must be a positive integer' +
+                             f' not {window}')
+        if any(not 0 <= quantile <= 1 for quantile in quantiles):
+            raise ValueError('Passed quantiles must be within [0, 1]')
+
+        self.freq = freq
+        self.by_zip = by_zip
+        self.window = window
+        self.quantiles = tuple(quantiles)
+
+        self._sales = self._period_sales(input_dataframe)
+        self.table = self._aggregate(self._sales)
+
+    def _period_sales(self, input_dataframe):
+        # Returns each valid sale once with its zip code and period
+        required_cols = ['Document Date', 'Sale Price', 'Zip code']
+        if ~pd.Series(required_cols).isin(input_dataframe.columns).all():
+            raise KeyError('Passed input data does not contain required ' +
+                           'columns: Document Date, Sale Price and Zip code')
+
+        columns = required_cols + [col for col in ['Excise Tax Number']
+                                   if col in input_dataframe.columns]
+        sales = input_dataframe[columns].copy()
+        sales['Document Date'] = pd.to_datetime(sales['Document Date'])
+
+        #remove missing values and miscodes (some dates in 2070)
+        sales = sales.dropna(subset=required_cols)
+        sales = sales[sales['Document Date'] < datetime.datetime.now()]
+        if 'Excise Tax Number' in sales.columns:
+            sales = sales[sales['Excise Tax Number'].isnull() |
+                          ~sales['Excise Tax Number'].duplicated()]
+        if not self.by_zip:
+            sales['Zip code'] = 0
+
+        sales['Period'] = pd.PeriodIndex(sales['Document Date'],
+                                         freq=self.freq).asi8
+        return sales.sort_values(['Zip code', 'Period', 'Document Date'],
+                                 kind='stable').reset_index(drop=True)
+
+    def _aggregate(self, sales, first_periods=None):
+        """ Aggregates sales sorted by zip code, period and date.
+
+        Args:
+            sales(DataFrame): Sales from _period_sales().
+            first_periods(Series): First period to return per zip code.
+                Defaults to every period.
+
+        Returns:
+            The aggregates of the periods with sales, as in table.
+        """
+
+        window = self.window or 1
+        zip_codes, zip_index = np.unique(sales['Zip code'].to_numpy(),
+                                         return_inverse=True)
+        periods = sales['Period'].to_numpy(dtype=np.int64)
+        prices = sales['Sale Price'].to_numpy(dtype=float)
+
+        # Key each sale by zip code and period, so windows stay in a zip
+        first_period = periods.min() if len(periods) else 0
+        span = (periods.max() - first_period + window + 1) if len(periods) \
+            else 1
+        keys = zip_index * span + (periods - first_period)
+        keys_unique, group_start = np.unique(keys, return_index=True)
+        group_end = np.append(group_start[1:], len(keys))
+
+        table = pd.DataFrame({
+            'Zip code': zip_codes[zip_index[group_start]],
+            'Document Date': sales['Document Date'].iloc[group_start].
+                             dt.to_period(self.freq).dt.start_time.
+                             to_numpy(),
+            'Number of transactions': group_end - group_start,
+            'Total sale price': np.add.reduceat(prices, group_start)
+                                if len(prices) else []})
+        table['Mean sale price'] = (table['Total sale price'] /
+                                    table['Number of transactions'])
+
+        if self.window is not None:
+            # Each period's window starts window - 1 periods before it
+            window_start = np.searchsorted(keys, keys_unique - window + 1,
+                                           'left')
+            totals = np.concatenate([[0], np.cumsum(prices)])
+            table['Rolling mean sale price'] = (
+                (totals[group_end] - totals[window_start]) /
+                (group_end - window_start))
+
+            # Every sale of a period gets the window of the period
+            indexer = _PeriodWindowIndexer(
+                start=np.repeat(window_start, group_end - group_start),
+                end=np.repeat(group_end, group_end - group_start))
+            rolling = pd.Series(prices).rolling(indexer, min_periods=1)
+            for quantile in self.quantiles:
+                table[_rolling_quantile_name(quantile)] = (
+                    rolling.quantile(quantile).to_numpy()[group_start])
+
+        if first_periods is not None:
+            table = table[table['Document Date'] >=
+                          table['Zip code'].map(first_periods)]
+
+        table = table.set_index(['Zip code', 'Document Date'])
+        if not self.by_zip:
+            table = table.droplevel('Zip code')
+        return table
+
+    @_traced
+    def append(self, new_sales):
+        """ Adds new sales, updating only the periods they change.
+
+        Sales already aggregated, by Excise Tax Number, are skipped.
+
+        Args:
+            new_sales(DataFrame): New sales with the columns required by
+                the constructor.
+
+        Returns:
+            The updated table.
+
+        Raises:
+            KeyError: If passed new_sales is missing required columns
+        """
+
+        new_sales = self._period_sales(new_sales)
+        if 'Excise Tax Number' in new_sales.columns:
+            new_sales = new_sales[
+                new_sales['Excise Tax Number'].isnull() |
+                ~new_sales['Excise Tax Number'].isin(
+                    self._sales['Excise Tax Number'])]
+        if new_sales.empty:
+            return self.table
+
+        self._sales = pd.concat([self._sales, new_sales]).sort_values(
+            ['Zip code', 'Period', 'Document Date'],
+            kind='stable').reset_index(drop=True)
+
+        # Recompute the periods from the first new one of each zip code,
+        # from the sales of the window before it on
+        first_new = new_sales.groupby('Zip code')['Period'].min()
+        window = self.window or 1
+        affected = self._sales[self._sales['Period'] >=
+                               self._sales['Zip code'].map(first_new).
+                               sub(window - 1)]
+        first_periods = (new_sales.groupby('Zip code')['Document Date'].
+                         min().dt.to_period(self.freq).dt.start_time)
+        updated = self._aggregate(affected, first_periods)
+
+        # Replace the changed periods in the table
+        kept = self.table
+        if self.by_zip:
+            dates = kept.index.get_level_values('Document Date')
+            zip_codes = kept.index.get_level_values('Zip code')
+            first = zip_codes.map(first_periods)
+            kept = kept[~(dates >= first)]
+        else:
+            kept = kept[kept.index < first_periods.iloc[0]]
+        self.table = pd.concat([kept, updated]).sort_index()
+
+        return self.table
+
+
+class _PeriodWindowIndexer(pd.api.indexers.BaseIndexer):
+    """ Rolling windows with precomputed bounds per value."""
+
+    def get_window_bounds(self, num_values=0, min_periods=None, center=None,
+                          closed=None, step=None):
+        """ Returns the start and end of the window of each value."""
+
+        return (self.start.astype(np.int64), self.end.astype(np.int64))
+
+
+def _rolling_quantile_name(quantile):
+    """ Returns the table column of a rolling quantile."""
+
+    if quantile == 0.5:
+        return 'Rolling median sale price'
+    return f'Rolling p{quantile * 100:g} sale price'
+
+
+class QuantileSketch:
+    """ Mergeable sketch of the quantiles of a stream of values.
+
+    Keeps the values as centroids, means with weights, like a merging
+    t-digest. Up to 5 * compression centroids are kept exactly; beyond
+    that, neighbouring centroids are merged so that no more than about
+    compression / 2 remain, small ones at the tails and large ones in
+    the middle, and quantiles are interpolated between them. Memory stays
+    bounded however many values are added, the error of a quantile is
+    smallest near 0 and 1, and sketches of partitions merge into the
+    sketch of their union, so quantiles can be computed chunk by chunk.
+    At the default compression the rank of a quantile is off by less
+    than 1%, about 0.75% at worst in the middle once thousands of chunk
+    sketches are merged.
+
+    Attributes:
+        compression: Bound on the number of centroids, larger for less
+            error.
+        means: Numpy array of the centroid means, ascending.
+        weights: Numpy array of the number of values of each centroid.
+        minimum: Smallest value added, NaN while empty.
+        maximum: Largest value added, NaN while empty.
+    """
+
+    def __init__(self, values=None, compression=200):
+        """ Creates a sketch, of values if passed.
+
+        Args:
+            values(array): Values to add. Missing values are ignored.
+            compression(int): Bound on the number of centroids.
+
+        Raises:
+            ValueError: If passed compression is not a positive integer
+        """
+
+        if not isinstance(compression, int) or compression < 1:
+            raise ValueError('Passed compression must be a positive ' +
+                             f'integer not {compression}')
+
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.minimum = np.nan
+        self.maximum = np.nan
+        if values is not None:
+            self.update(values)
+
+    @property
+    def count(self):
+        """ Number of values added."""
+
+        return float(self.weights.sum())
+
+    def update(self, values):
+        """ Adds values to the sketch.
+
+        Args:
+            values(array): Values to add. Missing values are ignored.
+
+        Returns:
+            The sketch.
+        """
+
+        values = pd.to_numeric(pd.Series(values), errors='coerce').\
+            astype(float).dropna().to_numpy()
+        return self._add(values, np.ones(len(values)),
+                         values.min(initial=np.inf),
+                         values.max(initial=-np.inf))
+
+    def merge(self, other):
+        """ Adds the values of another sketch to the sketch.
+
+        Args:
+            other(QuantileSketch): Sketch to merge.
+
+        Returns:
+            The sketch.
+        """
+
+        return self._add(other.means, other.weights, other.minimum,
+                         other.maximum)
+
+    def _add(self, means, weights, minimum, maximum):
+        # Adds centroids and merges them if there are too many
+        if not len(means):
+            return self
+        self.minimum = np.fmin(self.minimum, minimum)
+        self.maximum = np.fmax(self.maximum, maximum)
+
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+
+        if len(means) > 5 * self.compression:
+            # Centroids in the same unit of the scale function are merged
+            cumulative = np.cumsum(weights)
+            middle = (cumulative - weights / 2) / cumulative[-1]
+            scale = np.floor(self.compression / (2 * np.pi) *
+                             np.arcsin(2 * middle - 1))
+            starts = np.flatnonzero(np.diff(scale, prepend=np.nan))
+            totals = np.add.reduceat(means * weights, starts)
+            weights = np.add.reduceat(weights, starts)
+            means = totals / weights
+
+        self.means, self.weights = means, weights
+        return self
+
+    def quantile(self, q):
+        """ Estimates quantiles of the values added.
+
+        Quantiles interpolate linearly between values, like
+        numpy.quantile(), and are exact while every centroid is a single
+        value.
+
+        Args:
+            q(float or array): Quantiles, in [0, 1].
+
+        Returns:
+            A float, or numpy array for an array of q, NaN while empty.
+
+        Raises:
+            ValueError: If passed q is not within [0, 1]
+        """
+
+        quantiles = np.asarray(q, dtype=float)
+        if ((quantiles < 0) | (quantiles > 1)).any():
+            raise ValueError('Passed quantiles must be within [0, 1]')
+        if not len(self.means):
+            return np.full(quantiles.shape, np.nan)[()]
+
+        # Each centroid sits at the middle rank of its values, between the
+        # minimum and maximum at the first and last rank
+        last = self.weights.sum() - 1
+        ranks = np.cumsum(self.weights) - (self.weights + 1) / 2
+        inner = (ranks > 0) & (ranks < last)
+        ranks = np.concatenate([[0], ranks[inner], [last]])
+        means = np.concatenate([[self.minimum], self.means[inner],
+                                [self.maximum]])
+
+        return np.interp(quantiles * last, ranks, means)[()]
+
+
+def _quantile_name(quantile):
+    """ Returns the aggregate column of a sale price quantile."""
+
+    if quantile == 0.5:
+        return 'Median sale price'
+    return f'P{quantile * 100:g} sale price'
+
+
+# Measures of the market cube, by column of the joined data
+cube_measures = ['Sale Price', 'PRICE', 'DAYS ON MARKET', 'SQUARE FEET',
+                 '$/SQUARE FEET']
+
+# Dimensions of the market cube besides Zip code and Document Date
+cube_dimensions = ['Bedrooms', 'Building Grade', 'Year built band']
+
+# Measures of the market cube also sketched for quantiles
+cube_sketch_measures = ['Sale Price', 'PRICE']
+
+
+class MarketCube:
+    """ Pre-aggregated market measures by zip code, period and home type.
+
+    Groups a joined dataframe once into cells keyed by Zip code, the start
+    of the period of the Document Date, Bedrooms, Building Grade and the
+    decade of Year Built. Each cell keeps the count, sum and sum of squares
+    of every measure, and the number of distinct sales, so any roll-up of
+    cells is a sum and gives exact means and standard deviations. Sale
+    and listing prices also get a QuantileSketch per cell, merged by
+    roll-ups for their medians and 90th percentiles. Cubes of new data
+    merge with append().
+
+    aggregate_by_date(), plotly_by_date(), aggregate_by_zip_spacial() and
+    zip_code_agg_plotly() take a cube in place of a dataframe, so the
+    charts of a dashboard share one group-by of the joined data. With
+    freq='D' they return the same values as from the dataframe.
+
+    Attributes:
+        freq: Pandas frequency of the periods, e.g. 'D' or 'M'.
+        compression: Compression of the quantile sketches.
+        cells: Pandas dataframe of the cells, with the dimensions followed
+            by '<measure> count', '<measure> sum' and '<measure> sum of
+            squares' columns, 'Number of transactions', 'Listing rows'
+            and '<measure> sketch' columns of QuantileSketch.
+    """
+
+    @_traced
+    def __init__(self, input_dataframe=None, freq='M', zip_locator=None,
+                 compression=200):
+        """ Aggregates a joined dataframe into cells.
+
+        Args:
+            input_dataframe(DataFrame): Joined data with Zip code and
+                Document Date columns, as from join_county_redfin().
+                Missing measure and dimension columns are left empty.
+                Defaults to the example dataframe.
+            freq(str): Pandas frequency of the periods.
+            zip_locator(ZipLocator): Locator whose zip codes Redfin
+                listings must fall within to count, as in
+                aggregate_by_zip_spacial(). Defaults to counting every
+                listing with coordinates.
+            compression(int): Compression of the quantile sketches.
+
+        Raises:
+            KeyError: If passed input_dataframe is missing required columns
+        """
+
+        if input_dataframe is None:
+            input_dataframe = _sample_data()
+
+        self.freq = freq
+        self.compression = compression
+        self.cells = self._cells(input_dataframe, zip_locator)
+
+    def _cells(self, input_dataframe, zip_locator):
+        # Groups the rows of a joined dataframe into cells
+        required_cols = ['Zip code', 'Document Date']
+        if ~pd.Series(required_cols).isin(input_dataframe.columns).all():
+            raise KeyError('Passed input data does not contain required ' +
+                           'columns: Zip code and Document Date')
+
+        rows = pd.DataFrame(index=input_dataframe.index)
+        rows['Zip code'] = input_dataframe['Zip code']
+        dates = pd.to_datetime(input_dataframe['Document Date'])
+        rows['Document Date'] = dates.dt.to_period(self.freq).dt.start_time
+        for col in ['Bedrooms', 'Building Grade']:
+            rows[col] = (input_dataframe[col] if col in input_dataframe.columns
+                         else np.nan)
+        rows['Year built band'] = (input_dataframe['Year Built'] // 10 * 10
+                                   if 'Year Built' in input_dataframe.columns
+                                   else np.nan)
+        keys = ['Zip code', 'Document Date'] + cube_dimensions
+
+        # Listings count where located, like aggregate_by_zip_spacial()
+        if {'LATITUDE', 'LONGITUDE'} <= set(input_dataframe.columns):
+            if zip_locator is not None:
+                listed = ~np.isnan(zip_locator.locate(
+                    input_dataframe['LATITUDE'], input_dataframe['LONGITUDE']))
+            else:
+                listed = (input_dataframe['LATITUDE'].notnull() &
+                          input_dataframe['LONGITUDE'].notnull()).to_numpy()
+        else:
+            listed = np.zeros(len(input_dataframe), dtype=bool)
+        rows['Listing rows'] = listed.astype(np.int64)
+
+        for measure in cube_measures:
+            values = (pd.to_numeric(input_dataframe[measure], errors='coerce')
+                      if measure in input_dataframe.columns
+                      else pd.Series(np.nan, index=input_dataframe.index))
+            values = values.astype(float)
+            if measure != 'Sale Price':
+                values = values.where(listed)
+            rows[measure + ' count'] = values.notnull().astype(np.int64)
+            rows[measure + ' sum'] = values.fillna(0)
+            rows[measure + ' sum of squares'] = values.fillna(0) ** 2
+
+        # A sale of several buildings counts in the cell of its first row,
+        # so distinct sales sum over cells
+        if 'Excise Tax Number' in input_dataframe.columns:
+            excise = input_dataframe['Excise Tax Number']
+            rows['Number of transactions'] = (
+                excise.notnull() & ~excise.duplicated()).astype(np.int64)
+        else:
+            rows['Number of transactions'] = 0
+
+        grouped = rows.groupby(keys, dropna=False, observed=True, sort=True)
+        cells = grouped.sum()[_cube_columns()]
+
+        # Sketch the values of each cell
+        cell_codes = grouped.ngroup().to_numpy()
+        for measure in cube_sketch_measures:
+            values = np.where(rows[measure + ' count'] > 0,
+                              rows[measure + ' sum'], np.nan)
+            valid = ~np.isnan(values)
+            cells[measure + ' sketch'] = _group_sketches(
+                cell_codes[valid], len(cells), values[valid],
+                np.ones(valid.sum()), self.compression)
+        return cells.reset_index()
+
+    def _sum_cells(self, cells, by):
+        # Sums cells over the dimensions not in by and merges their sketches
+        if by:
+            grouped = cells.groupby(by, dropna=False, observed=True,
+                                    sort=True)
+            table = grouped[_cube_columns()].sum()
+            group_codes = grouped.ngroup().to_numpy()
+        else:
+            table = cells[_cube_columns()].sum().to_frame().T
+            group_codes = np.zeros(len(cells), dtype=np.int64)
+
+        # Merge the centroids of the sketches of each group
+        for measure in cube_sketch_measures:
+            sketches = cells[measure + ' sketch']
+            sizes = [len(sketch.means) for sketch in sketches]
+            extremes = pd.DataFrame(
+                [(sketch.minimum, sketch.maximum) for sketch in sketches],
+                columns=['minimum', 'maximum'], dtype=float).\
+                groupby(group_codes).agg({'minimum': 'min',
+                                          'maximum': 'max'}).\
+                reindex(range(len(table)))
+            table[measure + ' sketch'] = _group_sketches(
+                np.repeat(group_codes, sizes), len(table),
+                np.concatenate([sketch.means for sketch in sketches] +
+                               [np.empty(0)]),
+                np.concatenate([sketch.weights for sketch in sketches] +
+                               [np.empty(0)]),
+                self.compression, extremes['minimum'].to_numpy(),
+                extremes['maximum'].to_numpy())
+        return table
+
+    @_traced
+    def append(self, input_dataframe, zip_locator=None):
+        """ Adds the rows of another joined dataframe to the cells.
+
+        Rows should be new, as rows already aggregated are counted again.
+
+        Args:
+            input_dataframe(DataFrame): Joined data, as for the constructor.
+            zip_locator(ZipLocator): Locator of the listings, as for the
+                constructor.
+
+        Returns:
+            The updated cells.
+        """
+
+        new_cells = self._cells(input_dataframe, zip_locator)
+        keys = ['Zip code', 'Document Date'] + cube_dimensions
+        self.cells = self._sum_cells(
+            pd.concat([self.cells, new_cells], ignore_index=True),
+            keys).reset_index()
+        return self.cells
+
+    def rollup(self, by=('Zip code', 'Document Date')):
+        """ Sums the cells over the dimensions not in by.
+
+        Args:
+            by(list): Dimensions to keep, from Zip code, Document Date,
+                Bedrooms, Building Grade and Year built band. An empty
+                list sums every cell.
+
+        Returns:
+            A Pandas dataframe indexed by the dimensions in by, with the
+            summed columns of cells, '<measure> mean' and '<measure> std'
+            of each measure and '<measure> median' and '<measure> p90' of
+            the sketched prices, NaN without values.
+
+        Raises:
+            KeyError: If passed by holds an unknown dimension
+        """
+
+        by = list(by)
+        keys = ['Zip code', 'Document Date'] + cube_dimensions
+        if not set(by) <= set(keys):
+            raise KeyError('Passed dimensions must be within: ' +
+                           ', '.join(keys))
+
+        table = self._sum_cells(self.cells, by)
+
+        for measure in cube_sketch_measures:
+            quantiles = np.array([sketch.quantile([0.5, 0.9]) for sketch in
+                                  table[measure + ' sketch']]).reshape(-1, 2)
+            table[measure + ' median'] = quantiles[:, 0]
+            table[measure + ' p90'] = quantiles[:, 1]
+        for measure in cube_measures:
+            count = table[measure + ' count'].where(
+                table[measure + ' count'] > 0)
+            total = table[measure + ' sum']
+            table[measure + ' mean'] = total / count
+            variance = ((table[measure + ' sum of squares'] -
+                         total ** 2 / count) / (count - 1)).clip(lower=0)
+            table[measure + ' std'] = np.sqrt(variance)
+        return table
+
+    def by_date(self):
+        """ Returns the sales per period, as from aggregate_by_date()."""
+
+        table = self.rollup(['Document Date'])
+        table = table[table.index.notnull()]
+        table = pd.DataFrame({
+            'Mean sale price': table['Sale Price mean'],
+            'Number of transactions': table['Number of transactions'],
+            'Median sale price': table['Sale Price median'],
+            'P90 sale price': table['Sale Price p90']})
+        return table[table.index < datetime.datetime.now()]
+
+    def by_zip_and_date(self):
+        """ Returns the sales per zip code and period."""
+
+        table = self.rollup(['Zip code', 'Document Date']).reset_index()
+        table = table[table['Document Date'].notnull() &
+                      (table['Document Date'] < datetime.datetime.now())]
+        return pd.DataFrame({
+            'Zip code': table['Zip code'],
+            'Document Date': table['Document Date'],
+            'Mean sale price': table['Sale Price mean'],
+            'Number of transactions': table['Number of transactions'],
+            'Median sale price': table['Sale Price median'],
+            'P90 sale price': table['Sale Price p90']}).\
+            reset_index(drop=True)
+
+    def by_zip(self):
+        """ Returns the listings per zip code, as aggregated by
+        aggregate_by_zip_spacial()."""
+
+        table = self.rollup(['Zip code'])
+        table = table[table['Listing rows'] > 0]
+        table = pd.DataFrame({
+            'Mean sale price': table['PRICE mean'],
+            'Mean days on market': table['DAYS ON MARKET mean'],
+            'Mean size (square feet)': table['SQUARE FEET mean'],
+            'Mean cost per sqft': table['$/SQUARE FEET mean'],
+            'Median sale price': table['PRICE median'],
+            'P90 sale price': table['PRICE p90']})
+        return table.reset_index()
+
+    def save(self, cube_path=None):
+        """ Writes the cube to a directory.
+
+        Args:
+            cube_path(str or Path): Directory of the cube. Defaults to
+                kc_path / 'cube'.
+
+        Returns:
+            The Path of the cube.
+        """
+
+        cube_path = Path(cube_path) if cube_path is not None else \
+            kc_path / 'cube'
+
+        # Write the new cube next to the old one and swap them
+        temp_path = cube_path.with_name(cube_path.name + '.tmp')
+        shutil.rmtree(temp_path, ignore_errors=True)
+        temp_path.mkdir(parents=True)
+        # Sketches are stored as lists of their centroids
+        cells = self.cells.copy()
+        for measure in cube_sketch_measures:
+            sketches = cells.pop(measure + ' sketch')
+            cells[measure + ' centroids'] = [sketch.means for sketch in
+                                             sketches]
+            cells[measure + ' centroid weights'] = [sketch.weights for
+                                                    sketch in sketches]
+            cells[measure + ' minimum'] = [sketch.minimum for sketch in
+                                           sketches]
+            cells[measure + ' maximum'] = [sketch.maximum for sketch in
+                                           sketches]
+        cells.to_parquet(temp_path / 'cells.parquet', index=False)
+        (temp_path / 'cube.json').write_text(json.dumps(
+            {'freq': self.freq, 'compression': self.compression,
+             'measures': cube_measures, 'dimensions': cube_dimensions},
+            indent=1))
+
+        shutil.rmtree(cube_path, ignore_errors=True)
+        temp_path.replace(cube_path)
+
+        return cube_path
+
+
+def _group_sketches(codes, groups, means, weights, compression,
+                    minima=None, maxima=None):
+    """ Sketches centroids by group code.
+
+    Args:
+        codes(array): Group code of each centroid, from 0 to groups - 1.
+        groups(int): Number of groups.
+        means(array): Centroid means.
+        weights(array): Centroid weights.
+        compression(int): Compression of the sketches.
+        minima(array): Smallest value of each group. Defaults to the
+            smallest mean, as when every centroid is a single value.
+        maxima(array): Largest value of each group. Defaults to the
+            largest mean.
+
+    Returns:
+        A list of the QuantileSketch of each group.
+    """
+
+    # Sort the centroids by group and mean in one pass
+    order = np.lexsort((means, codes))
+    codes, means, weights = codes[order], means[order], weights[order]
+    bounds = np.searchsorted(codes, np.arange(groups + 1))
+
+    sketches = []
+    for group, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+        sketch = QuantileSketch(compression=compression)
+        if end > start:
+            minimum = means[start] if minima is None else minima[group]
+            maximum = means[end - 1] if maxima is None else maxima[group]
+            if end - start > 5 * compression:
+                sketch._add(means[start:end], weights[start:end], minimum,
+                            maximum)
+            else:
+                sketch.means = means[start:end]
+                sketch.weights = weights[start:end]
+                sketch.minimum, sketch.maximum = minimum, maximum
+        sketches.append(sketch)
+    return sketches
+
+
+def _cube_columns():
+    """ Returns the aggregate columns of the market cube cells."""
+
+    return ([measure + part for measure in cube_measures
+             for part in (' count', ' sum', ' sum of squares')] +
+            ['Number of transactions', 'Listing rows'])
+
+
+def read_market_cube(cube_path=None):
+    """ Reads a cube written by MarketCube.save().
+
+    Args:
+        cube_path(str or Path): Directory of the cube. Defaults to
+            kc_path / 'cube'.
+
+    Returns:
+        The MarketCube.
+
+    Raises:
+        ValueError: If there is no cube at cube_path.
+    """
+
+    cube_path = Path(cube_path) if cube_path is not None else \
+        kc_path / 'cube'
+    cube_file = cube_path / 'cube.json'
+    if not cube_file.exists():
+        raise ValueError(f'No market cube found at {cube_path}. ' +
+                         'Please run MarketCube.save() first')
+
+    description = json.loads(cube_file.read_text())
+    cube = MarketCube.__new__(MarketCube)
+    cube.freq = description['freq']
+    cube.compression = description['compression']
+    cube.cells = pd.read_parquet(cube_path / 'cells.parquet')
+
+    for measure in cube_sketch_measures:
+        sketches = []
+        for means, weights, minimum, maximum in zip(
+                cube.cells.pop(measure + ' centroids'),
+                cube.cells.pop(measure + ' centroid weights'),
+                cube.cells.pop(measure + ' minimum'),
+                cube.cells.pop(measure + ' maximum')):
+            sketch = QuantileSketch(compression=cube.compression)
+            sketch.means = np.asarray(means, dtype=float)
+            sketch.weights = np.asarray(weights, dtype=float)
+            sketch.minimum, sketch.maximum = minimum, maximum
+            sketches.append(sketch)
+        cube.cells[measure + ' sketch'] = sketches
+    return cube
+
+
+def trend_plot(input_dataframe=None, trend_variable='Mean sale price'):
     """
     Creates a simple matplotlib line graph of the variable of interest
 
@@ -760,17 +3703,138 @@ def trend_plot(input_dataframe=aggregate_by_date(), trend_variable='Mean sale pr
         A saved png of the matplotlib line graph object
 
     """
+    if input_dataframe is None:
+        input_dataframe = aggregate_by_date()
+
     #create simple figure
-    #fig = plt.figure()
-    plt.rcParams["figure.figsize"] = (10, 10)
-    tr_ax = plt.axes()
-    tr_x = input_dataframe.index
-    tr_y = input_dataframe[trend_variable]
-    tr_ax.plot(tr_x, tr_y)
-    plt.title(trend_variable)
-    tr_ax.set_xlim([min(input_dataframe.index), max(input_dataframe.index)])
-    plt.savefig(output_path / 'trend_plot_output.png')
-def plotly_by_date(data, zip_flag=None):
+    _render_chart_chunk([(input_dataframe, trend_variable, trend_variable,
+                          output_path / 'trend_plot_output.png')])
+
+
+def render_charts(jobs, output_dir=None, n_jobs=1, dpi=100):
+    """ Renders trend lines and zip code maps of many slices to PNG files.
+
+    Renders each job like trend_plot(), or zipcode_choro() when its data
+    has a geometry column, with the object-oriented Agg API rather than
+    pyplot, so no state is shared between charts. Each process reuses one
+    figure for its jobs, and with n_jobs the jobs are split between
+    processes.
+
+    Args:
+        jobs(list): Tuples of (data, variable, zip code) to chart: data
+            indexed by date, as from aggregate_by_date(), or with zip
+            code geometries, as from aggregate_by_zip_spacial(), the
+            column to chart and the zip code of the slice, or None for
+            county wide data.
+        output_dir(str or Path): Directory of the PNG files. Defaults to
+            output_path.
+        n_jobs(int): Number of processes rendering charts, -1 for one per
+            CPU.
+        dpi(int): Resolution of the PNG files.
+
+    Returns:
+        A list of the Path of each job's PNG file, named
+        <trend or choro>_<zip code or county>_<variable>.png, numbered
+        when names repeat.
+
+    Raises:
+        ValueError: If a job's variable is not a column of its data
+        ValueError: If passed n_jobs is not a positive integer or -1
+    """
+
+    if not isinstance(n_jobs, int) or not (n_jobs > 0 or n_jobs == -1):
+        raise ValueError('Passed n_jobs must be a positive integer or -1' +
+                         f' not {n_jobs}')
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    output_dir = Path(output_dir) if output_dir is not None else output_path
+
+    # Name each chart after its kind, zip code and variable
+    named_jobs = []
+    names = set()
+    for data, variable, zip_code in jobs:
+        if variable not in data.columns:
+            raise ValueError(f'The variable {variable} is not a column ' +
+                             'of its job\'s data.')
+        kind = 'choro' if 'geometry' in data.columns else 'trend'
+        area = 'county' if zip_code is None else str(zip_code)
+        name = '_'.join([kind, area,
+                         re.sub(r'[^0-9a-z]+', '_', variable.lower()).
+                         strip('_')])
+        unique_name, number = name, 1
+        while unique_name in names:
+            number += 1
+            unique_name = f'{name}_{number}'
+        names.add(unique_name)
+
+        title = variable if zip_code is None else f'{variable} ({zip_code})'
+        named_jobs.append((data, variable, title,
+                           output_dir / (unique_name + '.png')))
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if n_jobs == 1 or len(named_jobs) < 2:
+        _render_chart_chunk(named_jobs, dpi)
+    else:
+        # One chunk per process, each reusing its figure
+        n_jobs = min(n_jobs, len(named_jobs))
+        chunks = [named_jobs[i::n_jobs] for i in range(n_jobs)]
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            list(executor.map(_render_chart_chunk, chunks,
+                              [dpi] * n_jobs))
+
+    return [path for _, _, _, path in named_jobs]
+
+
+def _render_chart_chunk(jobs, dpi=100):
+    """ Renders (data, variable, title, path) jobs on one Agg figure."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.collections import PathCollection
+    from matplotlib.figure import Figure
+
+    figure = Figure()
+    FigureCanvasAgg(figure)
+
+    for data, variable, title, path in jobs:
+        figure.clear()
+        axes = figure.add_subplot()
+        if 'geometry' in data.columns:
+            # GeoDataFrame.plot() draws through pyplot, so zip codes are
+            # drawn as a collection of their outlines instead
+            figure.set_size_inches(6.4, 4.8)
+            mapped = data[data[variable].notnull()]
+            zip_codes = PathCollection(
+                [_geometry_path(geometry) for geometry in mapped.geometry],
+                array=mapped[variable].to_numpy(dtype=float),
+                cmap='viridis', linewidth=0.5, edgecolor='0.5')
+            axes.add_collection(zip_codes)
+            axes.autoscale_view()
+            figure.colorbar(zip_codes, ax=axes)
+            axes.set_axis_off()
+            axes.axis('equal')
+        else:
+            figure.set_size_inches(10, 10)
+            axes.plot(data.index, data[variable])
+            axes.set_xlim([min(data.index), max(data.index)])
+        axes.set_title(title)
+        figure.savefig(path, dpi=dpi)
+
+
+def _geometry_path(geometry):
+    """ Returns a matplotlib Path of the rings of a (multi)polygon."""
+    import shapely
+    from matplotlib.path import Path as PolygonPath
+
+    rings = []
+    for polygon in shapely.get_parts(geometry):
+        rings.append(PolygonPath(np.asarray(polygon.exterior.coords)[:, :2],
+                                 closed=True))
+        rings.extend(PolygonPath(np.asarray(interior.coords)[:, :2],
+                                 closed=True)
+                     for interior in polygon.interiors)
+    return PolygonPath.make_compound_path(*rings)
+
+
+def plotly_by_date(data, zip_flag=None, freq=None, cube=None, show=True):
     """
     Creates a simple Plot.ly line graph of the variable of interest
 
@@ -780,15 +3844,39 @@ def plotly_by_date(data, zip_flag=None):
         dataframe is used.
 
         zip_flag: optional flag so the user can see the line graph broken up by zip code
+
+        freq: optional Pandas frequency, 'W', 'M' or 'Q', to graph the mean sale price
+        per period with PeriodAggregate rather than per day
+
+        cube: optional MarketCube to read the aggregates from instead of data, per
+        period of the cube
+
+        show: whether to display the figure, False to return it instead, e.g.
+        for write_figure_bundle()
     Returns:
-        A Plot.ly Figure
+        A Plot.ly Figure if show is False, otherwise None so notebooks do not
+        display the figure twice
     """
-    if zip_flag == None:
+    import plotly.express as px
+
+    if cube is not None:
+        agg_by_date = (cube.by_date().reset_index() if zip_flag is None
+                       else cube.by_zip_and_date())
+        fig = px.line(agg_by_date, x="Document Date", y="Mean sale price",
+                      color="Zip code" if zip_flag is not None else None,
+                      title='Mean Sale Price per Period During Time Frame')
+    elif freq is not None:
+        agg_by_period = PeriodAggregate(data, freq=freq,
+                                        by_zip=zip_flag is not None).table
+        agg_by_period = agg_by_period.reset_index()
+        fig = px.line(agg_by_period, x="Document Date", y="Mean sale price",
+                      color="Zip code" if zip_flag is not None else None,
+                      title='Mean Sale Price per Period During Time Frame')
+    elif zip_flag == None:
         agg_by_date = aggregate_by_date(data)
         agg_by_date = agg_by_date.reset_index()
         fig = px.line(agg_by_date, x="Document Date", y="Mean sale price",
                       title='Mean Sale Price During Time Frame')
-        fig.show()
     else:
         data['Document Date'] = data['Document Date'].astype('datetime64[ns]')
 
@@ -807,4 +3895,113 @@ def plotly_by_date(data, zip_flag=None):
         fig = px.line(agg_by_date, x="Document Date", y="Mean sale price", color="Zip Code",
               line_group="Zip Code", hover_name="Zip Code",
                       title='Mean Sale Price During Time Frame Broken up by Zip Code')
+    if show:
         fig.show()
+        return None
+    return fig
+
+
+def write_figure_bundle(figures, file_path, include_plotlyjs=True):
+    """ Writes Plotly figures to one HTML or JSON file, sharing their assets.
+
+    Every figure is stored as JSON. The GeoJSON of the map traces is stored
+    once, one collection per featureidkey merging the features of every
+    map, and each trace refers to it. A feature is assumed to have the
+    same geometry in every map that uses it. An HTML bundle loads
+    plotly.js once and draws each figure in its own div, so a report of
+    many maps costs little more than its data.
+
+    Args:
+        figures(list): Plotly Figures, e.g. from zip_code_agg_plotly(...,
+            show=False).
+        file_path(str or Path): File to write, JSON if its suffix is .json
+            and HTML otherwise.
+        include_plotlyjs(bool or str): How an HTML bundle loads plotly.js:
+            True to embed it, 'cdn' to load it from the plotly.js CDN, or
+            'directory' to write plotly.min.js next to file_path for
+            bundles to share.
+
+    Returns:
+        The Path of the bundle.
+
+    Raises:
+        ValueError: If passed include_plotlyjs is not valid
+    """
+    import plotly.io as pio
+    from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+    if include_plotlyjs not in (True, 'cdn', 'directory'):
+        raise ValueError('Passed include_plotlyjs must be True, \'cdn\' or ' +
+                         f'\'directory\' not {include_plotlyjs}')
+    file_path = Path(file_path)
+
+    # Move the GeoJSON of every map trace to the shared collections
+    geojson = {}
+    specs = []
+    for figure in figures:
+        spec = json.loads(pio.to_json(figure, validate=False))
+        for trace in spec.get('data', []):
+            if not isinstance(trace.get('geojson'), dict):
+                continue
+            key = trace.get('featureidkey', 'id')
+            features = geojson.setdefault(key, {})
+            for feature in trace['geojson'].get('features', []):
+                feature_id = feature
+                for part in key.split('.'):
+                    feature_id = (feature_id or {}).get(part)
+                features.setdefault(json.dumps(feature_id), feature)
+            trace['geojson'] = key
+        specs.append(spec)
+
+    bundle = {'geojson': {key: {'type': 'FeatureCollection',
+                                'features': list(features.values())}
+                          for key, features in geojson.items()},
+              'figures': specs}
+    bundle_json = json.dumps(bundle, separators=(',', ':'))
+
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    if file_path.suffix == '.json':
+        file_path.write_text(bundle_json)
+        return file_path
+
+    if include_plotlyjs is True:
+        plotly_script = '<script>' + get_plotlyjs() + '</script>'
+    else:
+        if include_plotlyjs == 'cdn':
+            source = ('https://cdn.plot.ly/plotly-' +
+                      get_plotlyjs_version() + '.min.js')
+        else:
+            source = 'plotly.min.js'
+            plotlyjs_file = file_path.parent / source
+            if not plotlyjs_file.exists():
+                plotlyjs_file.write_text(get_plotlyjs())
+        plotly_script = f'<script src="{source}"></script>'
+
+    # Keep the bundle from closing its script tag early
+    bundle_json = bundle_json.replace('</', '<\\/')
+    divs = '\n'.join(f'<div id="figure-{i}"></div>'
+                     for i in range(len(specs)))
+    file_path.write_text(f'''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+{plotly_script}
+</head>
+<body>
+{divs}
+<script>
+var bundle = {bundle_json};
+bundle.figures.forEach(function(figure, i) {{
+    (figure.data || []).forEach(function(trace) {{
+        if (bundle.geojson.hasOwnProperty(trace.geojson)) {{
+            trace.geojson = bundle.geojson[trace.geojson];
+        }}
+    }});
+    Plotly.newPlot('figure-' + i, figure.data, figure.layout || {{}},
+                   {{responsive: true}});
+}});
+</script>
+</body>
+</html>
+''')
+    return file_path
@@ -22,10 +22,21 @@ print("Thank you for using the King County Real Estate Tool! \n" +
       "listings from Redfin. We will let you know when the data " +
       "is collected.")
 
-df_sale = get_county_data("Real%20Property%20Sales")
-df_building = get_county_data("Residential%20Building")
-df_parcel = get_county_data("Parcel")
-df_lookup = get_county_data("Lookup")
+county_data = get_county_datasets(["Residential%20Building",
+                                   "Parcel",
+                                   "Lookup",
+                                   "Real%20Property%20Sales"],
+                                  use_schema=True)
+df_building = county_data["Residential%20Building"]
+df_parcel = county_data["Parcel"]
+df_lookup = county_data["Lookup"]
+del county_data
+
+# Keep the single family sales of the sales file just cached
+df_sale = get_county_sales(cache_ttl=county_cache_ttl)
+
+# Index the assessor's data for quick queries
+county_session = CountySession(df_sale, df_building, df_parcel, df_lookup)
 
 # Get raw redfin data
 df_redfin = get_redfin_data()
@@ -38,12 +49,14 @@ print("Data is collected. To explore Redfin's King County MLS " +
 ####
 ## Query Data By Zip and Date
 ####
-def lets_begin():
+def lets_begin(trace_file=None):
     """ Begins the data query based on user inputted data. This function allows the user
         to easily query the data by zip_code and date
 
     Args:
-        None
+        trace_file(str or Path): File to write a JSON trace of the time, memory and
+            rows of each query stage to, also printed as a table. Defaults to no
+            tracing.
 
     Returns:
         A Pandas DataFrame
@@ -82,14 +95,23 @@ def lets_begin():
         end_month = (input("Enter end month: "))
         end_day = (input("Enter end day: "))
 
-    print("Querying King County Data")
-    # Organize King County data
-    df_county = organize_county_data(df_sale, df_building, df_parcel, df_lookup,
-                                     zip_code,
-                                     start_year, start_month, start_day,
-                                     end_year, end_month, end_day)
-    print("Joining with Redfin Data")
-
-    # Combine assessor and redfin data
-    result = join_county_redfin(df_county, df_redfin)
+    def query():
+        print("Querying King County Data")
+        # Organize King County data from the zip codes and dates queried
+        df_county = county_session.query(zip_code,
+                                         start_year, start_month, start_day,
+                                         end_year, end_month, end_day)
+        print("Joining with Redfin Data")
+
+        # Combine assessor and redfin data
+        return join_county_redfin(df_county, df_redfin)
+
+    if trace_file is None:
+        return query()
+
+    # Trace the stages of the query
+    with StageTrace() as trace:
+        result = query()
+    trace.to_json(trace_file)
+    print(trace.summary())
     return result
@@ -0,0 +1,187 @@
+import functools
+import http.server
+import tempfile
+import threading
+import unittest
+import zipfile
+from pathlib import Path
+
+import data515_project.kc_real_estate as kc
+
+TEST_DATA = Path(__file__).parent / 'test_data'
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    """Serves files from a directory and records the response codes."""
+
+    status_codes = []
+
+    def log_message(self, format, *args):
+        self.status_codes.append(args[1])
+
+
+# Define a class in which the tests will run
+class UnitTests(unittest.TestCase):
+
+    # Each method in the class to execute a test
+    def setUp(self):
+        """Serves a zipped assessor file locally and points the cache to a
+        temporary directory."""
+
+        self.serve_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = tempfile.TemporaryDirectory()
+
+        with zipfile.ZipFile(Path(self.serve_dir.name) / 'Lookup.zip',
+                             'w') as archive:
+            archive.write(TEST_DATA / 'EXTR_LookUp.csv', 'EXTR_LookUp.csv')
+        with zipfile.ZipFile(Path(self.serve_dir.name) / 'Parcel.zip',
+                             'w') as archive:
+            archive.write(TEST_DATA / 'parcel.csv', 'EXTR_Parcel.csv')
+        with zipfile.ZipFile(Path(self.serve_dir.name) /
+                             'Real Property Sales.zip', 'w') as archive:
+            archive.write(TEST_DATA / 'sale.csv', 'EXTR_RPSale.csv')
+
+        QuietHandler.status_codes = []
+        self.server = http.server.HTTPServer(
+            ('127.0.0.1', 0),
+            functools.partial(QuietHandler, directory=self.serve_dir.name))
+        threading.Thread(target=self.server.serve_forever,
+                         daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_port}/Lookup.zip'
+        self.parcel_url = self.url.replace('Lookup', 'Parcel')
+
+        self.kc_path = kc.kc_path
+        kc.kc_path = Path(self.cache_dir.name)
+
+        self.county_file_url = kc._county_file_url
+        kc._county_file_url = lambda file_name: (
+            file_name, self.url.replace('Lookup', file_name))
+
+    def tearDown(self):
+        """Stops the server and restores the cache location."""
+
+        self.server.shutdown()
+        self.server.server_close()
+        kc.kc_path = self.kc_path
+        kc._county_file_url = self.county_file_url
+        self.serve_dir.cleanup()
+        self.cache_dir.cleanup()
+
+    def test_revalidate(self):
+        """Asserts True if the second read is served from the cache after a
+        304 response."""
+
+        cold = kc._fetch_county_file('Lookup', self.url, encoding='latin-1')
+        warm = kc._fetch_county_file('Lookup', self.url)
+
+        self.assertTrue(cold.equals(warm) and
+                        QuietHandler.status_codes == ['200', '304'])
+
+    def test_ttl(self):
+        """Asserts True if a fresh cached file is read without a request."""
+
+        kc._fetch_county_file('Lookup', self.url, encoding='latin-1')
+        kc._fetch_county_file('Lookup', self.url, cache_ttl=60)
+
+        self.assertTrue(QuietHandler.status_codes == ['200'])
+
+    def test_offline(self):
+        """Asserts True if a cached file is returned when the site is down."""
+
+        cold = kc._fetch_county_file('Lookup', self.url, encoding='latin-1')
+        self.server.shutdown()
+        self.server.server_close()
+        stale = kc._fetch_county_file('Lookup', self.url)
+
+        self.assertTrue(cold.equals(stale))
+
+    def test_schema(self):
+        """Asserts True if a schema read returns only the kept columns in
+        their schema dtypes, cached separately from the full file."""
+
+        full = kc._fetch_county_file('Parcel', self.parcel_url,
+                                     encoding='latin-1')
+        projected = kc._fetch_county_file('Parcel', self.parcel_url,
+                                          encoding='latin-1',
+                                          source='parcel')
+
+        schema = kc._column_schema()
+        schema = schema[(schema['source'] == 'parcel') &
+                        (schema['keep'] == 1)]
+        dtypes = dict(zip(schema['raw_name'], schema['dtype']))
+
+        self.assertTrue(full.shape[1] == 81 and
+                        projected.columns.tolist() == list(dtypes) and
+                        all(str(projected[col].dtype) == dtypes[col]
+                            for col in projected.columns
+                            if dtypes[col] != 'object') and
+                        QuietHandler.status_codes == ['200', '200'])
+
+    def test_sales_chunks(self):
+        """Asserts True if chunked sales reads from the download and from
+        the cache match a filtered full read and record the full date
+        range."""
+
+        sales = kc.get_county_data('Real%20Property%20Sales',
+                                   use_schema=True)
+        named = sales.rename(columns=str.strip)
+        pins = named[['Major', 'Minor']].drop_duplicates().head(500)
+        expected = sales[((named['PropertyType'] == 11) &
+                          (named['DocumentDate'] >= '2010-01-01') &
+                          (named['Major'] * 10000 + named['Minor']).isin(
+                              pins['Major'] * 10000 + pins['Minor'])).
+                         to_numpy(dtype=bool, na_value=False)]
+
+        results = [kc.get_county_sales('2010-01-01', pins=pins,
+                                       use_cache=use_cache, chunk_size=1000)
+                   for use_cache in (False, True)]
+
+        self.assertTrue(all(
+            result.astype(object).equals(
+                expected.reset_index(drop=True).astype(object)) and
+            result.attrs['Document Date range'] ==
+            (named['DocumentDate'].min(), named['DocumentDate'].max())
+            for result in results))
+
+    def test_sales_cache(self):
+        """Asserts True if chunked sales reads cache the download themselves,
+        so the second read is revalidated with a 304 response."""
+
+        cold = kc.get_county_sales('2010-01-01', chunk_size=1000)
+        warm = kc.get_county_sales('2010-01-01', chunk_size=1000)
+
+        self.assertTrue(cold.equals(warm) and
+                        QuietHandler.status_codes == ['200', '304'])
+
+    def test_datasets(self):
+        """Asserts True if several files fetched in one call match their
+        get_county_data() reads, with use_schema passed through."""
+
+        file_names = ['Lookup', 'Parcel', 'Real%20Property%20Sales']
+        expected = {use_schema: {file_name: kc.get_county_data(
+            file_name, use_cache=False, use_schema=use_schema)
+                                 for file_name in file_names}
+                    for use_schema in (False, True)}
+        fetched = {use_schema: kc.get_county_datasets(
+            file_names, use_cache=False, use_schema=use_schema)
+                   for use_schema in (False, True)}
+
+        self.assertTrue(all(
+            list(fetched[use_schema]) == file_names and
+            all(fetched[use_schema][file_name].equals(
+                expected[use_schema][file_name])
+                for file_name in file_names)
+            for use_schema in (False, True)) and
+                        fetched[True]['Parcel'].shape[1] <
+                        fetched[False]['Parcel'].shape[1])
+
+    def test_datasets_error(self):
+        """Asserts True if a file that fails to download raises from the
+        call fetching it with others."""
+
+        with self.assertRaises(OSError):
+            kc.get_county_datasets(['Lookup', 'Missing', 'Parcel'],
+                                   use_cache=False)
+
+if __name__ == '__main__':
+    unittest.main()
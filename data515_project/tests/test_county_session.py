@@ -0,0 +1,55 @@
+import unittest
+from pathlib import Path
+
+import pandas as pd
+from data515_project.kc_real_estate import CountySession, organize_county_data
+
+TEST_DATA = Path(__file__).parent / 'test_data'
+
+
+# Define a class in which the tests will run
+class UnitTests(unittest.TestCase):
+
+    # Each method in the class to execute a test
+    def setUp(self):
+        """Builds a session over the test data."""
+
+        def read(file_name):
+            return pd.read_csv(TEST_DATA / file_name, encoding='latin-1',
+                               low_memory=False)
+
+        self.frames = (read('sale.csv'), read('building.csv'),
+                       read('parcel.csv'), read('EXTR_LookUp.csv'))
+        self.columns = [data.columns.tolist() for data in self.frames]
+        self.session = CountySession(*self.frames)
+
+    def test_query(self):
+        """Asserts True if queries return the same data as
+        organize_county_data()."""
+
+        queries = [(['98136', '98108', '98115', '98133', '98038'],
+                    {'start_year': '2000', 'end_year': '2020'}),
+                   (['98115', '98103'],
+                    {'start_year': '2010', 'end_year': '2019',
+                     'end_month': '12', 'end_day': '31'})]
+
+        self.assertTrue(all(
+            self.session.query(zip_code, **dates).equals(
+                organize_county_data(*self.frames, zip_code, **dates))
+            for zip_code, dates in queries))
+
+    def test_not_modified(self):
+        """Asserts True if the passed frames keep their columns."""
+
+        self.assertTrue([data.columns.tolist() for data in self.frames] ==
+                        self.columns)
+
+    def test_dates(self):
+        """Asserts True if a start year before the first sale raises a
+        ValueError."""
+
+        with self.assertRaises(ValueError):
+            self.session.query(['98115'], start_year='1900')
+
+if __name__ == '__main__':
+    unittest.main()
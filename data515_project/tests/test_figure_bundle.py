@@ -0,0 +1,100 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+
+from benchmarks import synthetic
+from data515_project import kc_real_estate as kc
+
+
+# Define a class in which the tests will run
+class UnitTests(unittest.TestCase):
+
+    # Each method in the class to execute a test
+    def setUp(self):
+        """Makes maps of overlapping sets of zip codes and a trend line."""
+
+        df_zip_shape = synthetic.make_zip_boundaries(
+            synthetic.make_zip_codes(12))
+        self.figures = []
+        for zip_codes in (df_zip_shape['ZIP'][:8], df_zip_shape['ZIP'][4:]):
+            geojson = kc.get_zip_geojson(zip_codes, zoom=9,
+                                         df_zip_shape=df_zip_shape)
+            self.figures.append(go.Figure(go.Choropleth(
+                geojson=geojson, locations=zip_codes.astype(int),
+                z=np.arange(8), featureidkey='properties.ZIP')))
+        self.figures.append(kc.plotly_by_date(kc._sample_data(),
+                                              show=False))
+
+        self.bundle_dir = tempfile.TemporaryDirectory()
+        self.bundle_path = Path(self.bundle_dir.name)
+
+    def tearDown(self):
+        """Removes the bundles."""
+
+        self.bundle_dir.cleanup()
+
+    def test_json(self):
+        """Asserts True if the maps refer to one collection of all their
+        features."""
+
+        bundle = json.loads(kc.write_figure_bundle(
+            self.figures, self.bundle_path / 'report.json').read_text())
+
+        self.assertTrue(
+            list(bundle['geojson']) == ['properties.ZIP'] and
+            len(bundle['geojson']['properties.ZIP']['features']) == 12 and
+            [figure['data'][0].get('geojson') for figure in
+             bundle['figures']] ==
+            ['properties.ZIP', 'properties.ZIP', None])
+
+    def test_html(self):
+        """Asserts True if plotly.js is embedded once, for a bundle smaller
+        than the figures' own HTML."""
+
+        html = kc.write_figure_bundle(
+            self.figures, self.bundle_path / 'report.html').read_text()
+
+        self.assertTrue(html.count(get_plotlyjs()[:200]) == 1 and
+                        html.count('<div id="figure-') == 3 and
+                        len(html) < sum(len(pio.to_html(figure))
+                                        for figure in self.figures) / 2)
+
+    def test_directory(self):
+        """Asserts True if bundles share a plotly.js file next to them."""
+
+        html = kc.write_figure_bundle(self.figures,
+                                      self.bundle_path / 'report.html',
+                                      include_plotlyjs='directory').\
+            read_text()
+
+        self.assertTrue('<script src="plotly.min.js"></script>' in html and
+                        (self.bundle_path / 'plotly.min.js').exists() and
+                        len(html) < len(get_plotlyjs()))
+
+    def test_show(self):
+        """Asserts True if a shown figure is not also returned, so notebooks
+        display it once."""
+
+        with mock.patch.object(go.Figure, 'show') as show:
+            shown = kc.plotly_by_date(kc._sample_data())
+
+        self.assertTrue(shown is None and show.call_count == 1)
+
+    def test_invalid_plotlyjs(self):
+        """Asserts True if an unknown include_plotlyjs raises a
+        ValueError."""
+
+        with self.assertRaises(ValueError):
+            kc.write_figure_bundle(self.figures,
+                                   self.bundle_path / 'report.html',
+                                   include_plotlyjs='inline')
+
+if __name__ == '__main__':
+    unittest.main()
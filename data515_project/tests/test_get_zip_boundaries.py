@@ -0,0 +1,80 @@
+import functools
+import http.server
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+import data515_project.kc_real_estate as kc
+
+TEST_DATA = Path(__file__).parent / 'test_data'
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    """Serves files from a directory and counts the requests."""
+
+    requests = 0
+
+    def log_message(self, format, *args):
+        QuietHandler.requests += 1
+
+
+# Define a class in which the tests will run
+class UnitTests(unittest.TestCase):
+
+    # Each method in the class to execute a test
+    def setUp(self):
+        """Serves the test boundaries locally and points the cache to a
+        temporary directory."""
+
+        QuietHandler.requests = 0
+        self.server = http.server.HTTPServer(
+            ('127.0.0.1', 0),
+            functools.partial(QuietHandler, directory=str(TEST_DATA)))
+        threading.Thread(target=self.server.serve_forever,
+                         daemon=True).start()
+
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.kc_path = kc.kc_path
+        self.url = kc.zip_boundaries_url
+        kc.kc_path = Path(self.cache_dir.name)
+        kc.zip_boundaries_url = ('http://127.0.0.1:' +
+                                 f'{self.server.server_port}/' +
+                                 'zip_boundaries.geojson')
+        kc.get_zip_boundaries.cache_clear()
+
+    def tearDown(self):
+        """Stops the server and restores the boundary settings."""
+
+        self.server.shutdown()
+        self.server.server_close()
+        kc.kc_path = self.kc_path
+        kc.zip_boundaries_url = self.url
+        kc.get_zip_boundaries.cache_clear()
+        self.cache_dir.cleanup()
+
+    def test_memoized(self):
+        """Asserts True if repeated calls return the same parsed objects
+        after a single download."""
+
+        first = kc.get_zip_boundaries()
+        second = kc.get_zip_boundaries()
+
+        self.assertTrue(first[0] is second[0] and first[1] is second[1] and
+                        QuietHandler.requests == 1)
+
+    def test_cached(self):
+        """Asserts True if a new process would load the boundaries from the
+        local cache without downloading them."""
+
+        df_zip_shape, data = kc.get_zip_boundaries()
+        kc.get_zip_boundaries.cache_clear()
+        self.server.shutdown()
+        cached_shape, cached_data = kc.get_zip_boundaries()
+
+        self.assertTrue(cached_shape.equals(df_zip_shape) and
+                        cached_data == data and
+                        sorted(cached_shape['ZIP']) == [98039, 98075, 98122])
+
+if __name__ == '__main__':
+    unittest.main()
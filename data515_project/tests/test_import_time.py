@@ -0,0 +1,65 @@
+import json
+import subprocess
+import sys
+import unittest
+
+# Seconds importing kc_real_estate may take, including pandas
+IMPORT_BUDGET = 3.0
+
+# Imports the module in a fresh interpreter with network and file reads
+# through pandas disabled, then reports the time taken and heavy modules
+IMPORT_SCRIPT = """
+import json, socket, sys, time
+import pandas as pd
+
+def no_io(*args, **kwargs):
+    raise RuntimeError('I/O at import time')
+
+socket.socket.connect = no_io
+pd.read_csv = no_io
+
+start = time.perf_counter()
+import data515_project.kc_real_estate
+elapsed = time.perf_counter() - start
+
+print(json.dumps({'elapsed': elapsed,
+                  'modules': [name for name in ('geopandas', 'matplotlib',
+                                                'plotly')
+                              if name in sys.modules]}))
+"""
+
+
+# Define a class in which the tests will run
+class UnitTests(unittest.TestCase):
+
+    # Each method in the class to execute a test
+    def setUp(self):
+        """Imports kc_real_estate in a separate interpreter."""
+
+        result = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT],
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE,
+                                universal_newlines=True)
+        self.returncode = result.returncode
+        self.stderr = result.stderr
+        self.report = (json.loads(result.stdout.splitlines()[-1])
+                       if result.returncode == 0 else {})
+
+    def test_no_io(self):
+        """Asserts True if the import succeeds without network or file reads."""
+
+        self.assertTrue(self.returncode == 0, self.stderr)
+
+    def test_no_heavy_modules(self):
+        """Asserts True if the geo and plotting stacks are not imported."""
+
+        self.assertTrue(self.report.get('modules') == [])
+
+    def test_budget(self):
+        """Asserts True if the import finishes within IMPORT_BUDGET seconds."""
+
+        self.assertTrue(self.report.get('elapsed', IMPORT_BUDGET) <
+                        IMPORT_BUDGET)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import collections
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+from data515_project.kc_real_estate import (ingest_county_data,
+                                            organize_county_data,
+                                            read_county_catalog)
+
+TEST_DATA = Path(__file__).parent / 'test_data'
+
+
+# Define a class in which the tests will run
+class UnitTests(unittest.TestCase):
+
+    # Each method in the class to execute a test
+    def setUp(self):
+        """Writes the test data to a store in a temporary directory."""
+
+        def read(file_name):
+            return pd.read_csv(TEST_DATA / file_name, encoding='latin-1',
+                               low_memory=False)
+
+        self.frames = (read('sale.csv'), read('building.csv'),
+                       read('parcel.csv'), read('EXTR_LookUp.csv'))
+
+        self.store_dir = tempfile.TemporaryDirectory()
+        self.store_path = ingest_county_data(*self.frames,
+                                             store_path=Path(
+                                                 self.store_dir.name) /
+                                             'store')
+
+        self.zip_code = ['98136', '98108', '98115', '98133']
+        self.dates = {'start_year': '2018', 'start_month': '1',
+                      'start_day': '1', 'end_year': '2019',
+                      'end_month': '12', 'end_day': '31'}
+
+    def tearDown(self):
+        """Removes the store."""
+
+        self.store_dir.cleanup()
+
+    def test_partitions(self):
+        """Asserts True if buildings are partitioned by zip code and sales
+        by zip code and year."""
+
+        zips = sorted(path.name for path in
+                      (self.store_path / 'building').iterdir())
+        years = sorted(path.name for path in
+                       (self.store_path / 'sale' / 'zip=98115').iterdir())
+
+        self.assertTrue('zip=98115' in zips and len(zips) > 10 and
+                        'year=2018' in years and len(years) > 2)
+
+    def test_organize(self):
+        """Asserts True if organizing from the store gives the rows of
+        organizing the full frames."""
+
+        expected = organize_county_data(*self.frames, self.zip_code,
+                                        **self.dates)
+        stored = organize_county_data(zip_code=self.zip_code,
+                                      store_path=self.store_path,
+                                      **self.dates)
+
+        # Nulls come back from parquet as None rather than NaN
+        def rows(data):
+            return collections.Counter(
+                map(tuple, data.astype(object).where(data.notnull(), None).
+                    astype(str).values))
+
+        self.assertTrue(list(stored.columns) == list(expected.columns) and
+                        len(stored) > 0 and rows(stored) == rows(expected))
+
+    def test_catalog(self):
+        """Asserts True if the catalog describes the stored data."""
+
+        catalog = read_county_catalog(self.store_path)
+        df_sale, df_building = self.frames[:2]
+        dates = pd.to_datetime(df_sale['DocumentDate'])
+
+        self.assertTrue(
+            set(self.zip_code) <= set(catalog['zip codes']) and
+            all(code.startswith('98') for code in catalog['zip codes']) and
+            catalog['Document Date range'] == [str(dates.min()),
+                                               str(dates.max())] and
+            catalog['rows']['building']['98115'] ==
+            (df_building['ZipCode'] == 98115).sum() and
+            catalog['null counts']['building']['Address'] ==
+            df_building['Address'].isnull().sum())
+
+    def test_all_zip_codes(self):
+        """Asserts True if no zip code organizes every zip code, from the
+        frames and from the store."""
+
+        zip_codes = read_county_catalog(self.store_path)['zip codes']
+        expected = organize_county_data(*self.frames, zip_codes, **self.dates)
+        from_frames = organize_county_data(*self.frames, **self.dates)
+        from_store = organize_county_data(store_path=self.store_path,
+                                          **self.dates)
+
+        self.assertTrue(len(expected) > 0 and from_frames.equals(expected) and
+                        len(from_store) == len(expected) and
+                        set(from_store['Zip code']) ==
+                        set(expected['Zip code']))
+
+    def test_invalid_zip(self):
+        """Asserts True if a zip code outside King County raises a
+        ValueError."""
+
+        with self.assertRaises(ValueError):
+            organize_county_data(zip_code=['98115', '12345'],
+                                 store_path=self.store_path, **self.dates)
+
+    def test_no_store(self):
+        """Asserts True if organizing without frames or a store raises a
+        ValueError."""
+
+        with self.assertRaises(ValueError):
+            organize_county_data(zip_code=self.zip_code,
+                                 store_path=self.store_path / 'missing',
+                                 **self.dates)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+import pandas as pd
+from data515_project.kc_real_estate import join_county_redfin
+
+
+# Define a class in which the tests will run
+class UnitTests(unittest.TestCase):
+
+    # Each method in the class to execute a test
+    def setUp(self):
+        """Reads the local King County sample and Redfin listings."""
+
+        sample = pd.read_csv('./examples/sample_data_98075_2018-19.csv',
+                             low_memory=False)
+        self.kc_data = sample[['Major', 'Minor', 'Situs Address', 'Zip code']]
+
+        # Add parcels in a second zip code so there is more than one subset
+        other = self.kc_data.copy()
+        other['Minor'] += 10000
+        other['Zip code'] = 98029
+        other['Situs Address'] = other['Situs Address'].str.replace('98075',
+                                                                    '98029')
+        self.kc_data = pd.concat([self.kc_data, other], ignore_index=True)
+
+        self.redfin_data = pd.read_csv('./data515_project/data/redfin/' +
+                                       'All_King_Redfin.csv',
+                                       low_memory=False)
+
+    def test_n_jobs(self):
+        """Asserts True if joining in a process pool gives the same result
+        as joining in this process."""
+
+        serial = join_county_redfin(self.kc_data, self.redfin_data)
+        parallel = join_county_redfin(self.kc_data, self.redfin_data,
+                                      n_jobs=2)
+
+        self.assertTrue(parallel.equals(serial) and
+                        serial['MLS#'].notnull().any())
+
+    def test_n_jobs_invalid(self):
+        """Asserts True if an invalid n_jobs raises a ValueError."""
+
+        with self.assertRaises(ValueError):
+            join_county_redfin(self.kc_data, self.redfin_data, n_jobs=0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from benchmarks import synthetic
+from data515_project import kc_real_estate as kc
+
+
+# Define a class in which the tests will run
+class UnitTests(unittest.TestCase):
+
+    # Each method in the class to execute a test
+    def setUp(self):
+        """Joins a small synthetic county and builds its daily cube."""
+
+        frames = synthetic.make_county_data(2000, zip_codes=5)
+        zip_codes = synthetic.make_zip_codes(5)
+        self.df_zip_shape = synthetic.make_zip_boundaries(zip_codes)
+        redfin = synthetic.make_redfin_data(200, frames[1],
+                                            self.df_zip_shape)
+        organized = kc.organize_county_data(*frames, zip_code=zip_codes)
+        self.joined = kc.join_county_redfin(organized, redfin)
+        self.cube = kc.MarketCube(self.joined.copy(), freq='D',
+                                  zip_locator=kc.ZipLocator(
+                                      self.df_zip_shape))
+
+    def test_by_date(self):
+        """Asserts True if the cube gives the aggregates of
+        aggregate_by_date()."""
+
+        expected = kc.aggregate_by_date(self.joined.copy()).astype(float)
+        cubed = kc.aggregate_by_date(cube=self.cube)
+
+        self.assertTrue(expected.index.equals(cubed.index) and
+                        np.allclose(expected, cubed, equal_nan=True))
+
+    def test_by_zip(self):
+        """Asserts True if the cube gives the aggregates of
+        aggregate_by_zip_spacial()."""
+
+        locator = kc.ZipLocator(self.df_zip_shape)
+        expected = kc.aggregate_by_zip_spacial(self.joined.copy(), locator)
+        cubed = kc.aggregate_by_zip_spacial(zip_locator=locator,
+                                            cube=self.cube)
+        columns = ['Mean sale price', 'Mean days on market',
+                   'Mean size (square feet)', 'Mean cost per sqft',
+                   'Median sale price', 'P90 sale price']
+
+        self.assertTrue(len(expected) > 0 and
+                        (expected['ZIP'] == cubed['ZIP']).all() and
+                        np.allclose(expected[columns], cubed[columns],
+                                    equal_nan=True))
+
+    def test_rollup(self):
+        """Asserts True if the roll-up gives the mean and standard
+        deviation of the sale prices per bedrooms."""
+
+        expected = self.joined.groupby('Bedrooms')['Sale Price'].agg(
+            ['mean', 'std']).astype(float)
+        rolled = self.cube.rollup(['Bedrooms']).loc[expected.index]
+
+        self.assertTrue(np.allclose(expected['mean'],
+                                    rolled['Sale Price mean'],
+                                    equal_nan=True) and
+                        np.allclose(expected['std'],
+                                    rolled['Sale Price std'],
+                                    equal_nan=True))
+
+    def test_append(self):
+        """Asserts True if appending the later sales to the cube of the
+        earlier ones gives the cube of all sales."""
+
+        dates = self.joined['Document Date']
+        earlier = dates < dates.median()
+        cube = kc.MarketCube(self.joined[earlier].copy(), freq='D')
+        cube.append(self.joined[~earlier].copy())
+        whole = kc.MarketCube(self.joined.copy(), freq='D')
+
+        self.assertTrue(np.allclose(
+            cube.rollup(['Zip code']).select_dtypes('number'),
+            whole.rollup(['Zip code']).select_dtypes('number'),
+            equal_nan=True))
+
+    def test_save(self):
+        """Asserts True if a saved cube reads back the same."""
+
+        with tempfile.TemporaryDirectory() as cube_dir:
+            cube_path = self.cube.save(cube_dir + '/cube')
+            cube = kc.read_market_cube(cube_path)
+
+        self.assertTrue(cube.freq == 'D' and np.allclose(
+            cube.rollup().select_dtypes('number'),
+            self.cube.rollup().select_dtypes('number'), equal_nan=True))
+
+    def test_unknown_dimension(self):
+        """Asserts True if rolling up by an unknown dimension raises a
+        KeyError."""
+
+        with self.assertRaises(KeyError):
+            self.cube.rollup(['Bathrooms'])
+
+if __name__ == '__main__':
+    unittest.main()
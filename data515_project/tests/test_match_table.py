@@ -0,0 +1,77 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+import data515_project.kc_real_estate as kc
+
+
+# Define a class in which the tests will run
+class UnitTests(unittest.TestCase):
+
+    # Each method in the class to execute a test
+    def setUp(self):
+        """Reads the local data and counts the listings fuzzy matched."""
+
+        sample = pd.read_csv('./examples/sample_data_98075_2018-19.csv',
+                             low_memory=False)
+        self.kc_data = sample[['Major', 'Minor', 'Situs Address', 'Zip code']]
+        self.redfin_data = pd.read_csv('./data515_project/data/redfin/' +
+                                       'All_King_Redfin.csv',
+                                       low_memory=False)
+
+        self.table_dir = tempfile.TemporaryDirectory()
+        self.match_table = Path(self.table_dir.name) / 'matches.parquet'
+
+        self.fuzzy_listings = []
+        self.match_zip = kc._match_zip
+
+        def count_listings(temp_rf, temp_kc):
+            self.fuzzy_listings.append(len(temp_rf))
+            return self.match_zip(temp_rf, temp_kc)
+
+        kc._match_zip = count_listings
+
+    def tearDown(self):
+        """Restores the fuzzy matching and removes the match table."""
+
+        kc._match_zip = self.match_zip
+        self.table_dir.cleanup()
+
+    def join(self, redfin_data):
+        # Joins with the match table, sorted to compare results
+        self.fuzzy_listings.clear()
+        joined = kc.join_county_redfin(self.kc_data, redfin_data,
+                                       match_table=self.match_table)
+        return (joined.sort_values(['Major', 'Minor', 'MLS#']).
+                reset_index(drop=True), sum(self.fuzzy_listings))
+
+    def test_reuse(self):
+        """Asserts True if a repeated join reuses the stored matches and
+        returns the same result."""
+
+        cold, cold_listings = self.join(self.redfin_data)
+        warm, warm_listings = self.join(self.redfin_data)
+
+        self.assertTrue(warm.equals(cold) and
+                        self.match_table.exists() and
+                        warm_listings < cold_listings)
+
+    def test_address_changed(self):
+        """Asserts True if a listing whose address changed loses its stored
+        match."""
+
+        cold, _ = self.join(self.redfin_data)
+        mls = cold['MLS#'].dropna().iloc[0]
+
+        moved = self.redfin_data.copy()
+        moved.loc[moved['MLS#'] == mls, 'ADDRESS'] = '1 Nowhere Rd'
+        warm, _ = self.join(moved)
+
+        self.assertTrue(mls not in set(warm['MLS#']) and
+                        mls not in set(pd.read_parquet(self.match_table)
+                                       ['MLS key']))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+import pandas as pd
+from data515_project.kc_real_estate import (_normalize_address,
+                                            _normalize_addresses)
+
+
+# Define a class in which the tests will run
+class UnitTests(unittest.TestCase):
+
+    # Each method in the class to execute a test
+    def test_county(self):
+        """Asserts True if Assessor addresses lose their zip code and extra
+        whitespace."""
+
+        self.assertTrue(
+            _normalize_address('829   198TH PL SE  98075') ==
+            ('829 198th pl se', None) and
+            _normalize_address('4300 EAST LAKE SAMMAMISH PKWY SE 98075-1234')
+            == ('4300 e lake sammamish pkwy se', None))
+
+    def test_redfin(self):
+        """Asserts True if Redfin addresses are split from their units and
+        notes and use the Assessor's abbreviations."""
+
+        self.assertTrue(
+            _normalize_address('5953 Fauntleroy Way SW Unit B') ==
+            ('5953 fauntleroy way sw', 'b') and
+            _normalize_address('535 20th Avenue East #101') ==
+            ('535 20th ave e', '101') and
+            _normalize_address('24920 SE 13th (homesite 6) Pl') ==
+            ('24920 se 13th pl', None) and
+            _normalize_address('123 University Street') ==
+            ('123 university st', None))
+
+    def test_memoized(self):
+        """Asserts True if repeated addresses are normalized once."""
+
+        _normalize_address.cache_clear()
+        addresses = pd.Series(['1321 Seneca St #1707', None,
+                               '1321 Seneca St #1707'] * 100)
+        normalized = _normalize_addresses(addresses)
+        _normalize_addresses(addresses)
+        info = _normalize_address.cache_info()
+
+        self.assertTrue(normalized.iloc[:3].tolist() ==
+                        ['1321 seneca st', None, '1321 seneca st'] and
+                        info.misses == 2 and info.hits == 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -62,6 +62,14 @@ class UnitTests(unittest.TestCase):
 
         self.assertTrue(property_bool and unit_bool)
 
+    def test_lookup_categories(self):
+        """Asserts True if decoded columns sharing a Look Up Type share one categorical dtype."""
+        view_cols = [col for col in self.df_kc.columns if col.startswith('View: ')]
+        dtypes = [self.df_kc[col].dtype for col in view_cols]
+
+        self.assertTrue(len(view_cols) > 1 and
+                        all(dtype == 'category' and dtype == dtypes[0] for dtype in dtypes))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from data515_project.kc_real_estate import PeriodAggregate, _sample_data
+
+
+# Define a class in which the tests will run
+class UnitTests(unittest.TestCase):
+
+    # Each method in the class to execute a test
+    def setUp(self):
+        """Builds sales in two zip codes over two years."""
+
+        rng = np.random.default_rng(0)
+        dates = pd.Timestamp('2018-01-01') + pd.to_timedelta(
+            rng.integers(0, 730, 2000), unit='D')
+        self.sales = pd.DataFrame({
+            'Document Date': dates.astype(str),
+            'Sale Price': rng.integers(200, 2000, 2000) * 1000.0,
+            'Zip code': rng.choice(['98075', '98115'], 2000),
+            'Excise Tax Number': np.arange(2000)})
+
+    def window_prices(self, zip_code, period, window):
+        # Returns the prices of the window periods ending with period
+        periods = pd.to_datetime(self.sales['Document Date']).\
+            dt.to_period('M')
+        in_window = ((self.sales['Zip code'] == zip_code) &
+                     (periods > period - window) & (periods <= period))
+        return self.sales.loc[in_window, 'Sale Price']
+
+    def test_monthly(self):
+        """Asserts True if monthly counts and means match the sales."""
+
+        table = PeriodAggregate(self.sales).table
+        row = table.loc[('98115', pd.Timestamp('2019-03-01'))]
+        prices = self.window_prices('98115', pd.Period('2019-03', 'M'), 1)
+
+        self.assertTrue(len(table) == 48 and
+                        row['Number of transactions'] == len(prices) and
+                        np.isclose(row['Mean sale price'], prices.mean()))
+
+    def test_rolling(self):
+        """Asserts True if rolling means and quantiles match the sales of
+        each window."""
+
+        table = PeriodAggregate(self.sales, window=3,
+                                quantiles=(0.5, 0.9)).table
+        self.assertTrue(all(
+            np.isclose(row['Rolling mean sale price'], prices.mean()) and
+            np.isclose(row['Rolling median sale price'], prices.median()) and
+            np.isclose(row['Rolling p90 sale price'], prices.quantile(0.9))
+            for (zip_code, date), row in table.iterrows()
+            for prices in [self.window_prices(
+                zip_code, pd.Period(date, 'M'), 3)]))
+
+    def test_append(self):
+        """Asserts True if appending sales gives the aggregates of all
+        the sales and skips sales already aggregated."""
+
+        late = pd.to_datetime(self.sales['Document Date']) >= '2019-07-15'
+        aggregate = PeriodAggregate(self.sales[~late], window=3)
+        aggregate.append(self.sales[late])
+        aggregate.append(self.sales.iloc[:100])
+
+        expected = PeriodAggregate(self.sales, window=3).table
+        self.assertTrue(aggregate.table.index.equals(expected.index) and
+                        np.allclose(aggregate.table, expected))
+
+    def test_county(self):
+        """Asserts True if quarters county wide count every sale."""
+
+        table = PeriodAggregate(self.sales, freq='Q', by_zip=False).table
+
+        self.assertTrue(len(table) == 8 and
+                        table['Number of transactions'].sum() == 2000)
+
+    def test_sample(self):
+        """Asserts True if the example data is aggregated by default."""
+
+        self.assertTrue(PeriodAggregate().table.equals(
+            PeriodAggregate(_sample_data()).table))
+
+    def test_window_invalid(self):
+        """Asserts True if an invalid window raises a ValueError."""
+
+        with self.assertRaises(ValueError):
+            PeriodAggregate(self.sales, window=0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+
+import numpy as np
+
+from data515_project.kc_real_estate import QuantileSketch
+
+
+# Define a class in which the tests will run
+class UnitTests(unittest.TestCase):
+
+    # Each method in the class to execute a test
+    def setUp(self):
+        """Draws skewed prices, like sale prices, in many small chunks."""
+
+        rng = np.random.default_rng(0)
+        self.prices = rng.lognormal(13, 0.8, 200000)
+        self.chunks = np.array_split(self.prices, 2000)
+
+    def test_exact(self):
+        """Asserts True if a sketch of few values gives the quantiles of
+        numpy."""
+
+        quantiles = [0, 0.1, 0.5, 0.9, 1]
+        self.assertTrue(np.allclose(
+            QuantileSketch(self.chunks[0][:500]).quantile(quantiles),
+            np.quantile(self.chunks[0][:500], quantiles)))
+
+    def test_merge(self):
+        """Asserts True if merged sketches of chunks keep bounded centroids
+        and rank errors below the documented 1%."""
+
+        sketch = QuantileSketch()
+        for chunk in self.chunks:
+            sketch.merge(QuantileSketch(chunk))
+        quantiles = np.linspace(0.001, 0.999, 999)
+        ranks = np.searchsorted(np.sort(self.prices),
+                                sketch.quantile(quantiles)) / \
+            len(self.prices)
+
+        self.assertTrue(sketch.count == len(self.prices) and
+                        len(sketch.means) <= 5 * sketch.compression and
+                        np.abs(ranks - quantiles).max() < 0.01 and
+                        sketch.quantile(1) == self.prices.max())
+
+    def test_update(self):
+        """Asserts True if updating chunk by chunk gives the quantiles of
+        merging sketches of the chunks."""
+
+        updated = QuantileSketch()
+        merged = QuantileSketch()
+        for chunk in self.chunks:
+            updated.update(chunk)
+            merged.merge(QuantileSketch(chunk))
+
+        self.assertTrue(np.allclose(updated.quantile([0.5, 0.9]),
+                                    merged.quantile([0.5, 0.9]),
+                                    rtol=0.01))
+
+    def test_empty(self):
+        """Asserts True if an empty sketch, or one of missing values, gives
+        NaN quantiles."""
+
+        self.assertTrue(np.isnan(QuantileSketch().quantile(0.5)) and
+                        np.isnan(QuantileSketch([np.nan]).quantile(0.9)))
+
+    def test_invalid_quantile(self):
+        """Asserts True if a quantile outside [0, 1] raises a ValueError."""
+
+        with self.assertRaises(ValueError):
+            QuantileSketch(self.chunks[0]).quantile(1.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import datetime
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+import data515_project.kc_real_estate as kc
+
+
+# Define a class in which the tests will run
+class UnitTests(unittest.TestCase):
+
+    # Each method in the class to execute a test
+    def setUp(self):
+        """Stores three snapshots of the local Redfin data, with listings
+        added, delisted and repriced between them."""
+
+        self.snapshot_dir = tempfile.TemporaryDirectory()
+        self.snapshot_path = Path(self.snapshot_dir.name)
+
+        redfin = pd.read_csv(kc.redfin_path / 'All_King_Redfin.csv',
+                             low_memory=False)
+        redfin = redfin[redfin['MLS#'].notnull()].drop_duplicates('MLS#')
+        self.first = redfin.iloc[:1000]
+        self.second = redfin.iloc[10:1010].copy()
+        self.second.iloc[:5, self.second.columns.get_loc('PRICE')] -= 1000
+        self.third = self.second.iloc[:990]
+
+        self.times = [datetime.datetime(2020, 5, day) for day in (1, 2, 3)]
+        for data, snapshot_time in zip((self.first, self.second,
+                                        self.third), self.times):
+            kc.save_redfin_snapshot(data, snapshot_time, self.snapshot_path)
+
+    def tearDown(self):
+        """Removes the snapshots."""
+
+        self.snapshot_dir.cleanup()
+
+    def test_list(self):
+        """Asserts True if the snapshots and dated csv pulls are listed
+        by time."""
+
+        snapshots = kc.list_redfin_snapshots(self.snapshot_path)
+        pulls = kc.list_redfin_snapshots()
+
+        self.assertTrue(
+            list(snapshots.index) == self.times and
+            all(path.suffix == '.parquet' for path in snapshots) and
+            pd.Timestamp('2020-04-21 15:31:48') in pulls.index)
+
+    def test_read_columns(self):
+        """Asserts True if only the passed columns are read."""
+
+        data = kc.read_redfin_snapshot('2020-05-02', ['MLS#', 'PRICE'],
+                                       self.snapshot_path)
+
+        self.assertTrue(list(data.columns) == ['MLS#', 'PRICE'] and
+                        data['PRICE'].tolist() ==
+                        self.second['PRICE'].tolist())
+
+    def test_delta(self):
+        """Asserts True if new, delisted and repriced listings are found."""
+
+        delta = kc.redfin_snapshot_delta('2020-05-01', '2020-05-02',
+                                         self.snapshot_path)
+        changes = delta.groupby('Change')['MLS#'].apply(set)
+
+        self.assertTrue(
+            changes['new'] == set(self.second['MLS#'].iloc[-10:]) and
+            changes['delisted'] == set(self.first['MLS#'].iloc[:10]) and
+            changes['price changed'] == set(self.second['MLS#'].iloc[:5])
+            and len(delta) == 25)
+
+    def test_delta_unpriced(self):
+        """Asserts True if a listing without a price in both snapshots is
+        not reported as repriced."""
+
+        unpriced = self.third.copy()
+        unpriced.iloc[:5, unpriced.columns.get_loc('PRICE')] = None
+        for day in (4, 5):
+            kc.save_redfin_snapshot(unpriced, datetime.datetime(2020, 5, day),
+                                    self.snapshot_path)
+
+        delta = kc.redfin_snapshot_delta('2020-05-04', '2020-05-05',
+                                         self.snapshot_path)
+
+        self.assertTrue(delta.empty)
+
+    def test_market_movement(self):
+        """Asserts True if consecutive snapshots are summarized."""
+
+        movement = kc.redfin_market_movement(
+            snapshot_path=self.snapshot_path)
+
+        self.assertTrue(
+            list(movement.index) == self.times[1:] and
+            movement['Active listings'].tolist() == [1000, 990] and
+            movement['New listings'].tolist() == [10, 0] and
+            movement['Delisted listings'].tolist() == [10, 10] and
+            movement['Price cuts'].tolist() == [5, 0] and
+            movement['Mean price change'].iloc[0] == -1000)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import threading
+import unittest
+import urllib.parse
+
+import numpy as np
+import pandas as pd
+import requests
+
+import data515_project.kc_real_estate as kc
+
+
+class FakeResponse:
+    """Response of the fake Redfin API."""
+
+    def __init__(self, status_code, content=b''):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(str(self.status_code), response=self)
+
+
+class FakeSession:
+    """Serves listings in the requested bounds, up to the cap, throttling
+    the first requests and optionally blocking every request."""
+
+    def __init__(self, listings, throttled=0, blocked=False):
+        self.listings = listings
+        self.throttled = throttled
+        self.blocked = blocked
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def get(self, url, timeout=None):
+        with self.lock:
+            self.requests += 1
+            if self.requests <= self.throttled:
+                return FakeResponse(429)
+        if self.blocked:
+            return FakeResponse(200, b'you look like a spam bot')
+
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)
+        corners = [tuple(map(float, corner.split()))
+                   for corner in query['cluster_bounds'][0].split(',')]
+        (west, south), (east, north) = corners[0], corners[2]
+        listings = self.listings
+        inside = listings[listings['LONGITUDE'].between(west, east) &
+                          listings['LATITUDE'].between(south, north)]
+        return FakeResponse(200, inside.head(kc.redfin_home_cap).
+                            to_csv(index=False).encode())
+
+
+# Define a class in which the tests will run
+class UnitTests(unittest.TestCase):
+
+    # Each method in the class to execute a test
+    def setUp(self):
+        """Spreads more listings than the cap over the county."""
+
+        rng = np.random.default_rng(0)
+        west, south, east, north = kc.redfin_bounds
+        count = 3 * kc.redfin_home_cap
+        self.listings = pd.DataFrame({
+            'MLS#': np.arange(count).astype(str),
+            'ADDRESS': [f'{i} Main St' for i in range(count)],
+            'LONGITUDE': rng.uniform(west, east, count).round(5),
+            'LATITUDE': rng.uniform(south, north, count).round(5)})
+
+    def test_complete(self):
+        """Asserts True if every listing is returned once although the
+        county holds more than the cap."""
+
+        session = FakeSession(self.listings)
+        data = kc.get_redfin_data(session=session, rate_limit=None,
+                                  save_snapshot=False)
+
+        self.assertTrue(len(data) == len(self.listings) and
+                        set(data['MLS#'].astype(str)) ==
+                        set(self.listings['MLS#']) and
+                        session.requests > 1)
+
+    def test_border(self):
+        """Asserts True if a listing on a tile border is kept once."""
+
+        listings = self.listings.copy()
+        west, south, east, north = kc.redfin_bounds
+        listings.loc[0, ['LONGITUDE', 'LATITUDE']] = [(west + east) / 2,
+                                                      (south + north) / 2]
+        data = kc.get_redfin_data(session=FakeSession(listings),
+                                  rate_limit=None, save_snapshot=False)
+
+        self.assertTrue((data['MLS#'].astype(str) == '0').sum() == 1)
+
+    def test_cap_at_max_depth(self):
+        """Asserts True if tiles still at the cap after the last split
+        raise a warning naming their bounds."""
+
+        session = FakeSession(self.listings)
+        session.get = lambda url, timeout=None: FakeResponse(
+            200, self.listings.head(kc.redfin_home_cap).
+            to_csv(index=False).encode())
+
+        with self.assertWarnsRegex(UserWarning,
+                                   r'Redfin tile \(.*\) still holds'):
+            data = kc.get_redfin_data(session=session, rate_limit=None,
+                                      max_depth=1, save_snapshot=False)
+
+        self.assertTrue(len(data) == kc.redfin_home_cap)
+
+    def test_throttled(self):
+        """Asserts True if throttled requests are retried."""
+
+        session = FakeSession(self.listings.head(100), throttled=1)
+        data = kc.get_redfin_data(session=session, rate_limit=None,
+                                  retries=1, save_snapshot=False)
+
+        self.assertTrue(len(data) == 100 and session.requests == 2)
+
+    def test_blocked(self):
+        """Asserts True if a blocked API falls back to the local file."""
+
+        data = kc.get_redfin_data(session=FakeSession(self.listings,
+                                                      blocked=True),
+                                  rate_limit=None, save_snapshot=False)
+
+        self.assertTrue(len(data) == len(pd.read_csv(
+            kc.redfin_path / 'All_King_Redfin.csv')))
+
+if __name__ == '__main__':
+    unittest.main()
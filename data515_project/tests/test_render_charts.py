@@ -0,0 +1,69 @@
+import tempfile
+import unittest
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from benchmarks import synthetic
+from data515_project.kc_real_estate import render_charts
+
+
+# Define a class in which the tests will run
+class UnitTests(unittest.TestCase):
+
+    # Each method in the class to execute a test
+    def setUp(self):
+        """Makes monthly trends of two zip codes and a map of four."""
+
+        dates = pd.date_range('2018-01-01', periods=24, freq='MS')
+        trend = pd.DataFrame({'Mean sale price': np.linspace(5e5, 7e5, 24),
+                              'Number of transactions': np.arange(24)},
+                             index=dates)
+        df_zip_shape = synthetic.make_zip_boundaries(
+            synthetic.make_zip_codes(4))
+        df_zip_shape['Mean sale price'] = [5e5, 6e5, np.nan, 8e5]
+
+        self.jobs = [(trend, variable, zip_code)
+                     for zip_code in ('98001', '98002')
+                     for variable in trend.columns]
+        self.jobs += [(df_zip_shape, 'Mean sale price', None)] * 2
+        self.output_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Removes the charts."""
+
+        self.output_dir.cleanup()
+
+    def test_render(self):
+        """Asserts True if every job gets its own PNG file and no pyplot
+        figure is left open."""
+
+        paths = render_charts(self.jobs, self.output_dir.name)
+
+        self.assertTrue(len(set(paths)) == len(self.jobs) and
+                        all(path.read_bytes()[:4] == b'\x89PNG'
+                            for path in paths) and
+                        paths[0].name == 'trend_98001_mean_sale_price.png' and
+                        paths[-1].name == 'choro_county_mean_sale_price_2.png'
+                        and plt.get_fignums() == [])
+
+    def test_processes(self):
+        """Asserts True if rendering in processes writes the same files."""
+
+        paths = render_charts(self.jobs, self.output_dir.name, n_jobs=2)
+
+        self.assertTrue(paths == render_charts(self.jobs,
+                                               self.output_dir.name) and
+                        all(path.exists() for path in paths))
+
+    def test_invalid_variable(self):
+        """Asserts True if a variable missing from its data raises a
+        ValueError."""
+
+        with self.assertRaises(ValueError):
+            render_charts([(self.jobs[0][0], 'Median days on market',
+                            '98001')], self.output_dir.name)
+
+if __name__ == '__main__':
+    unittest.main()
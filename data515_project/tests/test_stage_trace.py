@@ -0,0 +1,120 @@
+import json
+import tempfile
+import threading
+import tracemalloc
+import unittest
+from pathlib import Path
+
+import pandas as pd
+from data515_project.kc_real_estate import (StageTrace, _stage,
+                                            aggregate_by_date,
+                                            join_county_redfin,
+                                            organize_county_data)
+
+TEST_DATA = Path(__file__).parent / 'test_data'
+
+
+# Define a class in which the tests will run
+class UnitTests(unittest.TestCase):
+
+    # Each method in the class to execute a test
+    def setUp(self):
+        """Reads the test data and the local sample and Redfin data."""
+
+        def read(file_name):
+            return pd.read_csv(TEST_DATA / file_name, encoding='latin-1',
+                               low_memory=False)
+
+        self.frames = (read('sale.csv'), read('building.csv'),
+                       read('parcel.csv'), read('EXTR_LookUp.csv'))
+        sample = pd.read_csv('./examples/sample_data_98075_2018-19.csv',
+                             low_memory=False)
+        self.kc_data = sample[['Major', 'Minor', 'Situs Address', 'Zip code']]
+        self.redfin_data = pd.read_csv('./data515_project/data/redfin/' +
+                                       'All_King_Redfin.csv',
+                                       low_memory=False)
+
+    def test_stages(self):
+        """Asserts True if pipeline functions and their nested stages are
+        recorded with their rows."""
+
+        with StageTrace() as trace:
+            organize_county_data(*self.frames, ['98115'])
+            join_county_redfin(self.kc_data, self.redfin_data)
+        stages = {record['path']: record for record in trace.records}
+
+        self.assertTrue(
+            stages['organize_county_data']['rows_in'] ==
+            sum(len(data) for data in self.frames) and
+            'organize_county_data/decode lookups' in stages and
+            stages['join_county_redfin/fuzzy match/zip 98075']['depth']
+            == 2 and
+            stages['join_county_redfin']['rows_out'] > 0 and
+            all(record['seconds'] >= 0 and record['memory_mb'] >= 0
+                for record in trace.records))
+
+    @unittest.skipUnless(hasattr(tracemalloc, 'reset_peak'),
+                         'nested peaks need Python 3.9')
+    def test_threads(self):
+        """Asserts True if a stage keeps its peak when a stage in another
+        thread starts after it."""
+
+        allocated = threading.Event()
+        started = threading.Event()
+
+        def allocate():
+            with _stage('allocate'):
+                block = bytearray(20 * 2 ** 20)
+                del block
+                allocated.set()
+                started.wait(10)
+
+        def start():
+            allocated.wait(10)
+            with _stage('start'):
+                pass
+            started.set()
+
+        with StageTrace() as trace:
+            threads = [threading.Thread(target=target)
+                       for target in (allocate, start)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        stages = {record['stage']: record for record in trace.records}
+
+        self.assertTrue(stages['allocate']['memory_mb'] >= 20 and
+                        stages['start']['memory_mb'] < 1)
+
+    def test_inactive(self):
+        """Asserts True if nothing is recorded outside of a trace and
+        memory tracing stops with the trace."""
+
+        with StageTrace() as trace:
+            pass
+        aggregate_by_date()
+
+        self.assertTrue(trace.records == [] and
+                        not tracemalloc.is_tracing())
+
+    def test_report(self):
+        """Asserts True if the JSON report and the summary list every
+        stage."""
+
+        with StageTrace(trace_memory=False) as trace:
+            aggregate_by_date()
+
+        with tempfile.TemporaryDirectory() as report_dir:
+            report_file = Path(report_dir) / 'trace.json'
+            trace.to_json(report_file)
+            report = json.loads(report_file.read_text())
+
+        self.assertTrue(
+            [stage['stage'] for stage in report['stages']] ==
+            ['aggregate_by_date'] and
+            report['stages'][0]['memory_mb'] is None and
+            'aggregate_by_date' in trace.summary().splitlines()[1])
+
+if __name__ == '__main__':
+    unittest.main()
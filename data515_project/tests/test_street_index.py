@@ -0,0 +1,55 @@
+import difflib
+import unittest
+
+import pandas as pd
+from data515_project.kc_real_estate import _StreetIndex
+
+
+# Define a class in which the tests will run
+class UnitTests(unittest.TestCase):
+
+    # Each method in the class to execute a test
+    def setUp(self):
+        """Indexes the street names of the sample parcels."""
+
+        sample = pd.read_csv('./examples/sample_data_98075_2018-19.csv',
+                             low_memory=False)
+        address = (sample['Situs Address'].str.replace('98075', '').
+                   str.split().str.join(' ').str.lower().str.split(n=1))
+        self.parcels = pd.DataFrame({'number': address.str[0],
+                                     'street': address.str[1]}).dropna()
+        self.index = _StreetIndex(self.parcels['number'],
+                                  self.parcels['street'])
+
+    def test_difflib(self):
+        """Asserts True if matches equal difflib get_close_matches() over
+        the streets with the same building number."""
+
+        queries = self.parcels.drop_duplicates().head(300)
+        streets = (queries['street'].str.replace('ave', 'avenue').
+                   str.replace(' se', ' s e'))
+
+        matched = self.index.match(queries['number'], streets)
+        expected = []
+        for number, street in zip(queries['number'], streets):
+            block = self.parcels.loc[self.parcels['number'] == number,
+                                     'street'].drop_duplicates()
+            match = difflib.get_close_matches(street, block, n=1, cutoff=0.6)
+            expected.append(match[0] if match else None)
+
+        self.assertTrue(list(matched) == expected and
+                        all(match is not None for match in matched))
+
+    def test_no_match(self):
+        """Asserts True if unknown building numbers and dissimilar streets
+        are not matched."""
+
+        number = self.parcels['number'].iloc[0]
+        matched = self.index.match(['0', number, number],
+                                   [self.parcels['street'].iloc[0],
+                                    'zzzzzzzzzz', float('nan')])
+
+        self.assertTrue(all(match is None for match in matched))
+
+if __name__ == '__main__':
+    unittest.main()
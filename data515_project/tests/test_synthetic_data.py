@@ -0,0 +1,54 @@
+import unittest
+
+from benchmarks import synthetic
+from data515_project import kc_real_estate as kc
+
+
+# Define a class in which the tests will run
+class UnitTests(unittest.TestCase):
+
+    # Each method in the class to execute a test
+    def setUp(self):
+        """Generates a small synthetic county."""
+
+        self.frames = synthetic.make_county_data(2000, zip_codes=5)
+        self.zip_codes = synthetic.make_zip_codes(5)
+        self.df_zip_shape = synthetic.make_zip_boundaries(self.zip_codes)
+        self.redfin = synthetic.make_redfin_data(200, self.frames[1],
+                                                 self.df_zip_shape)
+
+    def test_schema(self):
+        """Asserts True if the frames have the schema columns and dtypes."""
+
+        schema = kc._column_schema()
+        self.assertTrue(all(
+            list(data.columns) ==
+            schema.loc[schema['source'] == source, 'raw_name'].tolist() and
+            list(data.dtypes.astype(str)) ==
+            schema.loc[schema['source'] == source, 'dtype'].tolist()
+            for data, source in zip(self.frames, ('sale', 'building',
+                                                  'parcel', 'lookup'))))
+
+    def test_seed(self):
+        """Asserts True if the same seed gives the same frames."""
+
+        self.assertTrue(all(
+            data.equals(again) for data, again in
+            zip(self.frames, synthetic.make_county_data(2000, zip_codes=5))))
+
+    def test_pipeline(self):
+        """Asserts True if the generated data is organized, joined and
+        located into its zip codes."""
+
+        organized = kc.organize_county_data(*self.frames,
+                                            zip_code=self.zip_codes)
+        joined = kc.join_county_redfin(organized, self.redfin)
+        located = kc.ZipLocator(self.df_zip_shape).locate(
+            self.redfin['LATITUDE'], self.redfin['LONGITUDE'])
+
+        self.assertTrue(len(organized) > 0 and
+                        joined['MLS#'].notnull().any() and
+                        (located == self.redfin['ZIP OR POSTAL CODE']).all())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import json
+import unittest
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+from data515_project.kc_real_estate import get_zip_geojson
+
+
+# Define a class in which the tests will run
+class UnitTests(unittest.TestCase):
+
+    # Each method in the class to execute a test
+    def setUp(self):
+        """Makes 30 zip codes with detailed, winding shared borders."""
+
+        rng = np.random.default_rng(0)
+        area = shapely.box(-122.5, 47.2, -121.5, 47.8)
+        points = shapely.multipoints(rng.uniform([-122.5, 47.2],
+                                                 [-121.5, 47.8], (30, 2)))
+        polygons = shapely.intersection(shapely.get_parts(
+            shapely.voronoi_polygons(points, extend_to=area)), area)
+        polygons = shapely.set_precision(shapely.segmentize(polygons,
+                                                            0.0005), 1e-9)
+        polygons = shapely.transform(
+            polygons, lambda coords: coords +
+            0.002 * np.sin(coords[:, ::-1] * 300))
+
+        self.df_zip_shape = gpd.GeoDataFrame(
+            {'ZIP': np.arange(98001, 98031), 'NAME': 'zip code'},
+            geometry=polygons, crs='epsg:4326')
+
+    def geometry(self, geojson):
+        # Returns the geometries of GeoJSON features
+        return gpd.GeoDataFrame.from_features(geojson['features']).\
+            geometry.to_numpy()
+
+    def test_levels(self):
+        """Asserts True if lower zooms get fewer coordinates and zooms
+        beyond the finest level get full resolution."""
+
+        coordinates = [shapely.get_num_coordinates(self.geometry(
+            get_zip_geojson(zoom=zoom, df_zip_shape=self.df_zip_shape))).
+                       sum() for zoom in (8, 10, 12, 13)]
+        full = shapely.get_num_coordinates(
+            self.df_zip_shape.geometry.to_numpy()).sum()
+
+        self.assertTrue(coordinates == sorted(coordinates) and
+                        coordinates[0] < full / 10 and
+                        coordinates[-1] == full)
+
+    def test_coverage(self):
+        """Asserts True if simplified zip codes neither overlap nor leave
+        gaps."""
+
+        geometry = self.geometry(get_zip_geojson(
+            zoom=9, df_zip_shape=self.df_zip_shape))
+        area = shapely.union_all(self.df_zip_shape.geometry).area
+
+        self.assertTrue(np.isclose(shapely.area(geometry).sum(),
+                                   shapely.union_all(geometry).area) and
+                        np.isclose(shapely.union_all(geometry).area, area,
+                                   rtol=1e-3))
+
+    def test_subset(self):
+        """Asserts True if only the passed zip codes are kept, with only
+        their ZIP property, in a smaller payload."""
+
+        geojson = get_zip_geojson(['98001', 98002], zoom=9,
+                                  df_zip_shape=self.df_zip_shape)
+        full = json.loads(self.df_zip_shape.to_json())
+
+        self.assertTrue([feature['properties'] for feature in
+                         geojson['features']] ==
+                        [{'ZIP': 98001}, {'ZIP': 98002}] and
+                        len(json.dumps(geojson)) <
+                        len(json.dumps(full)) / 10)
+
+if __name__ == '__main__':
+    unittest.main()
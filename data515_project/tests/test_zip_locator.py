@@ -0,0 +1,61 @@
+import unittest
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from data515_project.kc_real_estate import ZipLocator, aggregate_by_zip_spacial
+
+TEST_DATA = Path(__file__).parent / 'test_data'
+
+
+# Define a class in which the tests will run
+class UnitTests(unittest.TestCase):
+
+    # Each method in the class to execute a test
+    def setUp(self):
+        """Builds a locator over the test zip boundaries."""
+
+        self.df_zip_shape = gpd.read_file(TEST_DATA / 'zip_boundaries.geojson')
+        self.locator = ZipLocator(self.df_zip_shape)
+
+        self.sample = pd.read_csv('./examples/sample_data_98075_2018-19.csv',
+                                  low_memory=False)
+
+    def test_locate(self):
+        """Asserts True if points get the zip of the polygon containing them
+        and NaN when missing or outside all polygons."""
+
+        centers = self.df_zip_shape.geometry.representative_point()
+        latitude = np.append(centers.y.to_numpy(), [47.0, np.nan])
+        longitude = np.append(centers.x.to_numpy(), [-120.0, -122.3])
+
+        located = self.locator.locate(latitude, longitude)
+
+        self.assertTrue(np.array_equal(located[:-2], self.df_zip_shape['ZIP']) and
+                        np.isnan(located[-2:]).all())
+
+    def test_memoized(self):
+        """Asserts True if repeated coordinates are only queried once."""
+
+        latitude = self.sample['LATITUDE'].dropna()
+        longitude = self.sample['LONGITUDE'].dropna()
+
+        first = self.locator.locate(latitude, longitude)
+        assigned = len(self.locator._assigned)
+        second = self.locator.locate(np.tile(latitude, 3), np.tile(longitude, 3))
+
+        self.assertTrue(assigned == len(set(zip(latitude, longitude))) and
+                        len(self.locator._assigned) == assigned and
+                        np.array_equal(np.tile(first, 3), second) and
+                        (first == 98075).all())
+
+    def test_aggregate(self):
+        """Asserts True if aggregate_by_zip_spacial uses the passed locator."""
+
+        aggregated = aggregate_by_zip_spacial(self.sample, self.locator)
+
+        self.assertTrue(aggregated['Zip code'].tolist() == [98075])
+
+if __name__ == '__main__':
+    unittest.main()
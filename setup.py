@@ -14,5 +14,9 @@ setuptools.setup(
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    python_requires='>=3.6'
+    install_requires=[
+        "pyarrow>=8.0",
+        "shapely>=2.0",
+    ],
+    python_requires='>=3.8'
 )
\ No newline at end of file